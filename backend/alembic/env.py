@@ -23,11 +23,14 @@ config = context.config
 # Override sqlalchemy.url from environment
 config.set_main_option(
     "sqlalchemy.url",
-    settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
+    settings.DATABASE_URL
+    .replace("postgresql://", "postgresql+asyncpg://")
+    .replace("sqlite://", "sqlite+aiosqlite://")
 )
 
-# Interpret the config file for Python logging
-if config.config_file_name is not None:
+# Interpret the config file for Python logging (skipped when the app
+# runs migrations itself, so its loggers are left alone)
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
     fileConfig(config.config_file_name)
 
 # add your model's MetaData object here
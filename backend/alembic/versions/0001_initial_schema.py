@@ -0,0 +1,128 @@
+"""Initial schema
+
+Revision ID: 0001_initial_schema
+Revises:
+Create Date: 2026-10-17 00:00:00.000000
+
+Databases created before migrations existed were built with
+``Base.metadata.create_all``; tables that already exist are left untouched
+so those databases can be upgraded in place.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_initial_schema"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+raffle_type = sa.Enum("EXPRESS", "STANDARD", "PREMIUM", name="raffletype")
+raffle_status = sa.Enum("ACTIVE", "WAITING", "DRAWING", "COMPLETED", "CANCELLED", name="rafflestatus")
+transaction_type = sa.Enum("ENTRY", "PRIZE", name="transactiontype")
+transaction_status = sa.Enum("PENDING", "CONFIRMED", "FAILED", name="transactionstatus")
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("telegram_id", sa.Integer(), nullable=False),
+            sa.Column("username", sa.String(length=255), nullable=True),
+            sa.Column("ton_wallet", sa.String(length=255), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("last_active", sa.DateTime(), nullable=False),
+            sa.Column("total_participations", sa.Integer(), nullable=True),
+            sa.Column("total_wins", sa.Integer(), nullable=True),
+            sa.Column("total_spent_ton", sa.Float(), nullable=True),
+            sa.Column("total_won_ton", sa.Float(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_telegram_id", "users", ["telegram_id"], unique=True)
+
+    if "raffles" not in existing:
+        op.create_table(
+            "raffles",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("type", raffle_type, nullable=False),
+            sa.Column("status", raffle_status, nullable=False),
+            sa.Column("min_participants", sa.Integer(), nullable=False),
+            sa.Column("entry_fee_ton", sa.Float(), nullable=False),
+            sa.Column("prize_pool_ton", sa.Float(), nullable=False),
+            sa.Column("commission_percent", sa.Float(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("waiting_until", sa.DateTime(), nullable=True),
+            sa.Column("drawn_at", sa.DateTime(), nullable=True),
+            sa.Column("winner_id", sa.Integer(), nullable=True),
+            sa.Column("random_org_signature", sa.Text(), nullable=True),
+            sa.Column("random_org_url", sa.String(length=500), nullable=True),
+            sa.ForeignKeyConstraint(["winner_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_raffles_id", "raffles", ["id"])
+        op.create_index("ix_raffles_type", "raffles", ["type"])
+        op.create_index("ix_raffles_status", "raffles", ["status"])
+        op.create_index("ix_raffles_created_at", "raffles", ["created_at"])
+
+    if "participants" not in existing:
+        op.create_table(
+            "participants",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("raffle_id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("joined_at", sa.DateTime(), nullable=False),
+            sa.Column("transaction_hash", sa.String(length=255), nullable=True),
+            sa.Column("is_winner", sa.Boolean(), nullable=True),
+            sa.Column("prize_sent", sa.Boolean(), nullable=True),
+            sa.Column("prize_tx_hash", sa.String(length=255), nullable=True),
+            sa.ForeignKeyConstraint(["raffle_id"], ["raffles.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("transaction_hash"),
+        )
+        op.create_index("ix_participants_id", "participants", ["id"])
+        op.create_index("ix_participants_raffle_id", "participants", ["raffle_id"])
+        op.create_index("ix_participants_user_id", "participants", ["user_id"])
+
+    if "transactions" not in existing:
+        op.create_table(
+            "transactions",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("raffle_id", sa.Integer(), nullable=True),
+            sa.Column("tx_hash", sa.String(length=255), nullable=False),
+            sa.Column("from_wallet", sa.String(length=255), nullable=False),
+            sa.Column("to_wallet", sa.String(length=255), nullable=False),
+            sa.Column("amount_ton", sa.Float(), nullable=False),
+            sa.Column("type", transaction_type, nullable=False),
+            sa.Column("status", transaction_status, nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("confirmed_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["raffle_id"], ["raffles.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_transactions_id", "transactions", ["id"])
+        op.create_index("ix_transactions_user_id", "transactions", ["user_id"])
+        op.create_index("ix_transactions_raffle_id", "transactions", ["raffle_id"])
+        op.create_index("ix_transactions_tx_hash", "transactions", ["tx_hash"], unique=True)
+        op.create_index("ix_transactions_created_at", "transactions", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("transactions")
+    op.drop_table("participants")
+    op.drop_table("raffles")
+    op.drop_table("users")
+
+    bind = op.get_bind()
+    for enum in (transaction_status, transaction_type, raffle_status, raffle_type):
+        enum.drop(bind, checkfirst=True)
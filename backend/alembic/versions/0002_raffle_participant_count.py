@@ -0,0 +1,36 @@
+"""Add denormalized participant counter to raffles
+
+Revision ID: 0002_raffle_participant_count
+Revises: 0001_initial_schema
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_raffle_participant_count"
+down_revision: Union[str, None] = "0001_initial_schema"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "raffles",
+        sa.Column("participant_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    # Backfill from existing participant rows
+    op.execute(
+        "UPDATE raffles SET participant_count = ("
+        "SELECT COUNT(*) FROM participants WHERE participants.raffle_id = raffles.id"
+        ")"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("raffles", "participant_count")
@@ -0,0 +1,32 @@
+"""Add user history index on participants
+
+Revision ID: 0003_participants_history_idx
+Revises: 0002_raffle_participant_count
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_participants_history_idx"
+down_revision: Union[str, None] = "0002_raffle_participant_count"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keyset pagination on (user_id, joined_at, id); raffle_id is included so
+    # the join to raffles is resolved from the index alone on Postgres
+    op.create_index(
+        "ix_participants_user_id_joined_at_id",
+        "participants",
+        ["user_id", "joined_at", "id"],
+        postgresql_include=["raffle_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_participants_user_id_joined_at_id", table_name="participants")
@@ -0,0 +1,52 @@
+"""Add raffle state machine indexes and participant uniqueness
+
+Revision ID: 0004_raffle_state_indexes
+Revises: 0003_participants_history_idx
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_raffle_state_indexes"
+down_revision: Union[str, None] = "0003_participants_history_idx"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Active/waiting lookups by type, newest first; supersedes ix_raffles_status
+    op.create_index(
+        "ix_raffles_status_type_created_at",
+        "raffles",
+        ["status", "type", "created_at"],
+    )
+    op.drop_index("ix_raffles_status", table_name="raffles")
+
+    # Draw readiness scan only ever looks at WAITING raffles
+    op.create_index(
+        "ix_raffles_waiting_until_waiting",
+        "raffles",
+        ["waiting_until"],
+        postgresql_where=sa.text("status = 'WAITING'"),
+        sqlite_where=sa.text("status = 'WAITING'"),
+    )
+
+    # Fails if duplicate joins already exist; resolve them manually first
+    with op.batch_alter_table("participants") as batch_op:
+        batch_op.create_unique_constraint(
+            "uq_participants_raffle_id_user_id", ["raffle_id", "user_id"]
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("participants") as batch_op:
+        batch_op.drop_constraint("uq_participants_raffle_id_user_id", type_="unique")
+
+    op.drop_index("ix_raffles_waiting_until_waiting", table_name="raffles")
+    op.create_index("ix_raffles_status", "raffles", ["status"])
+    op.drop_index("ix_raffles_status_type_created_at", table_name="raffles")
@@ -0,0 +1,48 @@
+"""Add join requests for asynchronous payment verification
+
+Revision ID: 0005_join_requests
+Revises: 0004_raffle_state_indexes
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_join_requests"
+down_revision: Union[str, None] = "0004_raffle_state_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+join_request_status = sa.Enum("PENDING", "ACCEPTED", "REJECTED", name="joinrequeststatus")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "join_requests",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("raffle_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("tx_hash", sa.String(length=255), nullable=False),
+        sa.Column("status", join_request_status, nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("participant_id", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("processed_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["raffle_id"], ["raffles.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["participant_id"], ["participants.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("tx_hash"),
+    )
+    op.create_index("ix_join_requests_id", "join_requests", ["id"])
+    op.create_index("ix_join_requests_user_id", "join_requests", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("join_requests")
+    join_request_status.drop(op.get_bind(), checkfirst=True)
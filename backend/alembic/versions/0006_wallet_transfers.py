@@ -0,0 +1,49 @@
+"""Add wallet transfer index and indexer cursors
+
+Revision ID: 0006_wallet_transfers
+Revises: 0005_join_requests
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_wallet_transfers"
+down_revision: Union[str, None] = "0005_join_requests"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "wallet_transfers",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("tx_hash", sa.String(length=255), nullable=False),
+        sa.Column("lt", sa.BigInteger(), nullable=False),
+        sa.Column("source", sa.String(length=255), nullable=True),
+        sa.Column("destination", sa.String(length=255), nullable=True),
+        sa.Column("amount_nano", sa.BigInteger(), nullable=False),
+        sa.Column("utime", sa.DateTime(), nullable=True),
+        sa.Column("indexed_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_wallet_transfers_id", "wallet_transfers", ["id"])
+    op.create_index("ix_wallet_transfers_tx_hash", "wallet_transfers", ["tx_hash"], unique=True)
+
+    op.create_table(
+        "indexer_cursors",
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("lt", sa.BigInteger(), nullable=False),
+        sa.Column("tx_hash", sa.String(length=255), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("indexer_cursors")
+    op.drop_table("wallet_transfers")
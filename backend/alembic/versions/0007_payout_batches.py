@@ -0,0 +1,60 @@
+"""Add batched prize payouts
+
+Revision ID: 0007_payout_batches
+Revises: 0006_wallet_transfers
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_payout_batches"
+down_revision: Union[str, None] = "0006_wallet_transfers"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+payout_batch_status = sa.Enum("PENDING", "SENT", "FAILED", name="payoutbatchstatus")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "payout_batches",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("query_id", sa.BigInteger(), nullable=False),
+        sa.Column("boc", sa.Text(), nullable=False),
+        sa.Column("status", payout_batch_status, nullable=False),
+        sa.Column("message_hash", sa.String(length=255), nullable=True),
+        sa.Column("total_ton", sa.Float(), nullable=False),
+        sa.Column("recipients", sa.Integer(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("query_id"),
+    )
+    op.create_index("ix_payout_batches_id", "payout_batches", ["id"])
+    op.create_index("ix_payout_batches_status", "payout_batches", ["status"])
+
+    with op.batch_alter_table("participants") as batch_op:
+        batch_op.add_column(sa.Column("payout_batch_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            "fk_participants_payout_batch_id", "payout_batches", ["payout_batch_id"], ["id"]
+        )
+        batch_op.create_index("ix_participants_payout_batch_id", ["payout_batch_id"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("participants") as batch_op:
+        batch_op.drop_index("ix_participants_payout_batch_id")
+        batch_op.drop_constraint("fk_participants_payout_batch_id", type_="foreignkey")
+        batch_op.drop_column("payout_batch_id")
+
+    op.drop_table("payout_batches")
+    payout_batch_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,44 @@
+"""Add payout confirmation and retry backoff
+
+Revision ID: 0008_payout_retries
+Revises: 0007_payout_batches
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_payout_retries"
+down_revision: Union[str, None] = "0007_payout_batches"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE payoutbatchstatus ADD VALUE IF NOT EXISTS 'CONFIRMED' AFTER 'SENT'")
+
+    with op.batch_alter_table("payout_batches") as batch_op:
+        batch_op.add_column(sa.Column("next_attempt_at", sa.DateTime(), nullable=True))
+
+    with op.batch_alter_table("participants") as batch_op:
+        batch_op.add_column(
+            sa.Column("payout_attempts", sa.Integer(), nullable=False, server_default="0")
+        )
+        batch_op.add_column(sa.Column("payout_retry_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("participants") as batch_op:
+        batch_op.drop_column("payout_retry_at")
+        batch_op.drop_column("payout_attempts")
+
+    with op.batch_alter_table("payout_batches") as batch_op:
+        batch_op.drop_column("next_attempt_at")
+
+    # PostgreSQL cannot drop an enum value; CONFIRMED stays in payoutbatchstatus
@@ -0,0 +1,30 @@
+"""Store signed Random.org data for batched draws
+
+Revision ID: 0009_random_org_batches
+Revises: 0008_payout_retries
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009_random_org_batches"
+down_revision: Union[str, None] = "0008_payout_retries"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("raffles") as batch_op:
+        batch_op.add_column(sa.Column("random_org_random", sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column("random_org_index", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("raffles") as batch_op:
+        batch_op.drop_column("random_org_index")
+        batch_op.drop_column("random_org_random")
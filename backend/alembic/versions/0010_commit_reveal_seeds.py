@@ -0,0 +1,32 @@
+"""Store seed commitments and proofs for commit-reveal draws
+
+Revision ID: 0010_commit_reveal_seeds
+Revises: 0009_random_org_batches
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010_commit_reveal_seeds"
+down_revision: Union[str, None] = "0009_random_org_batches"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("raffles") as batch_op:
+        batch_op.add_column(sa.Column("seed_commitment", sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column("server_seed", sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column("draw_proof", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("raffles") as batch_op:
+        batch_op.drop_column("draw_proof")
+        batch_op.drop_column("server_seed")
+        batch_op.drop_column("seed_commitment")
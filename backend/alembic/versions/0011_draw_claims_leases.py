@@ -0,0 +1,38 @@
+"""Track draw claims and add scheduler leader leases
+
+Revision ID: 0011_draw_claims_leases
+Revises: 0010_commit_reveal_seeds
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0011_draw_claims_leases"
+down_revision: Union[str, None] = "0010_commit_reveal_seeds"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("raffles") as batch_op:
+        batch_op.add_column(sa.Column("draw_claimed_at", sa.DateTime(), nullable=True))
+
+    op.create_table(
+        "scheduler_leases",
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("holder", sa.String(length=255), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("scheduler_leases")
+
+    with op.batch_alter_table("raffles") as batch_op:
+        batch_op.drop_column("draw_claimed_at")
@@ -0,0 +1,41 @@
+"""Add pending status for the provisioned next raffle of each type
+
+Revision ID: 0012_pending_raffles
+Revises: 0011_draw_claims_leases
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0012_pending_raffles"
+down_revision: Union[str, None] = "0011_draw_claims_leases"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # ALTER TYPE ... ADD VALUE cannot run inside a transaction block on older servers
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE rafflestatus ADD VALUE IF NOT EXISTS 'PENDING' BEFORE 'ACTIVE'")
+
+    op.create_index(
+        "uq_raffles_type_pending",
+        "raffles",
+        ["type"],
+        unique=True,
+        postgresql_where=sa.text("status = 'PENDING'"),
+        sqlite_where=sa.text("status = 'PENDING'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_raffles_type_pending", table_name="raffles")
+
+    # Enum values cannot be dropped; remove the rows that use it
+    op.execute("DELETE FROM raffles WHERE status = 'PENDING'")
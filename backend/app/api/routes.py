@@ -1,18 +1,34 @@
 """FastAPI routes"""
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.session import get_db
+from app.database.session import get_db, get_pool_stats
 from app.database.models import User
 from app.api.auth import verify_telegram_auth
+from app.api.websocket import websocket_manager
+from app.config import settings
 from app.services.raffle_service import raffle_service
-from app.database.crud import RaffleCRUD, UserCRUD
+from app.services.join_service import join_service, JoinQueueFullError
+from app.services.http_client import http_client
+from app.services.random_service import random_service
+from app.services.ton_service import ton_service
+from app.services.payout_service import payout_service
+from app.services.confirmation_service import confirmation_service
+from app.services.scheduler_service import scheduler_service
+from app.services.leader_service import leader_election
+from app.services.task_queue import task_queue
+from app.database.crud import RaffleCRUD, UserCRUD, ParticipantCRUD, JoinRequestCRUD
+from app.utils.pagination import encode_cursor, decode_cursor
 from app.schemas.pydantic import (
     RaffleResponse,
     RaffleDetailResponse,
+    RaffleVerificationResponse,
     JoinRaffleRequest,
+    JoinRequestResponse,
     UserStatsResponse,
     HistoryResponse,
     ParticipantResponse
@@ -21,6 +37,8 @@ from app.schemas.pydantic import (
 
 router = APIRouter(prefix="/api/v1", tags=["api"])
 
+RECENT_PARTICIPATIONS_LIMIT = 5
+
 
 @router.get("/health")
 async def health_check():
@@ -28,36 +46,83 @@ async def health_check():
     return {"status": "ok"}
 
 
+@router.get("/health/db-pool")
+async def db_pool_stats():
+    """Database connection pool statistics"""
+    return get_pool_stats()
+
+
+@router.get("/health/http")
+async def http_client_stats():
+    """Shared HTTP client connection reuse statistics"""
+    return http_client.get_stats()
+
+
+@router.get("/health/ton-cache")
+async def ton_cache_stats():
+    """toncenter response cache and request coalescing statistics"""
+    return ton_service.get_cache_stats()
+
+
+@router.get("/health/ton-rate-limit")
+async def ton_rate_limit_stats():
+    """toncenter client-side rate limiter statistics"""
+    return ton_service.get_rate_limit_stats()
+
+
+@router.get("/health/breakers")
+async def circuit_breaker_stats():
+    """External provider circuit breakers and toncenter hedging statistics"""
+    return {
+        "toncenter": ton_service.get_breaker_stats(),
+        "random_org": random_service.get_stats(),
+    }
+
+
+@router.get("/health/draws")
+async def draw_stats():
+    """Draw concurrency, queue wait and execution time statistics"""
+    return scheduler_service.get_draw_stats()
+
+
+@router.get("/health/leader")
+async def leader_stats():
+    """Singleton job leader election state of this node"""
+    return leader_election.get_stats()
+
+
+@router.get("/health/websocket")
+async def websocket_stats():
+    """WebSocket connections and topic subscriptions"""
+    return websocket_manager.get_stats()
+
+
+@router.get("/health/tasks")
+async def task_queue_stats():
+    """Task queue throughput, retries and queue depths"""
+    return await task_queue.get_stats()
+
+
+@router.get("/health/payouts")
+async def payout_stats():
+    """Batched prize payout statistics"""
+    return payout_service.get_stats()
+
+
+@router.get("/health/confirmations")
+async def confirmation_stats():
+    """Transaction confirmation worker statistics"""
+    return confirmation_service.get_stats()
+
+
 @router.get("/raffles/active", response_model=List[RaffleResponse])
 async def get_active_raffles(
     db: AsyncSession = Depends(get_db),
     user: User = Depends(verify_telegram_auth)
 ):
     """Get all active raffles (3 types)"""
-    raffles = await RaffleCRUD.get_all_active(db)
-
-    # Convert to response format with current_participants
-    response = []
-    for raffle in raffles:
-        raffle_dict = {
-            "id": raffle.id,
-            "type": raffle.type.value,
-            "status": raffle.status.value,
-            "min_participants": raffle.min_participants,
-            "current_participants": len(raffle.participants),
-            "entry_fee_ton": raffle.entry_fee_ton,
-            "prize_pool_ton": raffle.prize_pool_ton,
-            "commission_percent": raffle.commission_percent,
-            "created_at": raffle.created_at,
-            "waiting_until": raffle.waiting_until,
-            "drawn_at": raffle.drawn_at,
-            "winner_id": raffle.winner_id,
-            "random_org_signature": raffle.random_org_signature,
-            "random_org_url": raffle.random_org_url,
-        }
-        response.append(RaffleResponse(**raffle_dict))
-
-    return response
+    rows = await RaffleCRUD.get_active_summaries(db)
+    return [RaffleResponse.model_validate(row) for row in rows]
 
 
 @router.get("/raffles/{raffle_id}", response_model=RaffleDetailResponse)
@@ -67,7 +132,7 @@ async def get_raffle_details(
     user: User = Depends(verify_telegram_auth)
 ):
     """Get details of a specific raffle"""
-    raffle = await RaffleCRUD.get_by_id(db, raffle_id)
+    raffle = await RaffleCRUD.get_by_id_with_participants(db, raffle_id)
     if not raffle:
         raise HTTPException(status_code=404, detail="Raffle not found")
 
@@ -77,7 +142,7 @@ async def get_raffle_details(
         "type": raffle.type.value,
         "status": raffle.status.value,
         "min_participants": raffle.min_participants,
-        "current_participants": len(raffle.participants),
+        "current_participants": raffle.participant_count,
         "entry_fee_ton": raffle.entry_fee_ton,
         "prize_pool_ton": raffle.prize_pool_ton,
         "commission_percent": raffle.commission_percent,
@@ -87,6 +152,10 @@ async def get_raffle_details(
         "winner_id": raffle.winner_id,
         "random_org_signature": raffle.random_org_signature,
         "random_org_url": raffle.random_org_url,
+        "random_org_random": raffle.random_org_random,
+        "random_org_index": raffle.random_org_index,
+        "seed_commitment": raffle.seed_commitment,
+        "draw_proof": raffle.draw_proof,
         "participants": [
             ParticipantResponse(
                 id=p.id,
@@ -104,14 +173,58 @@ async def get_raffle_details(
     return RaffleDetailResponse(**raffle_dict)
 
 
-@router.post("/raffles/{raffle_id}/join", response_model=ParticipantResponse)
+@router.get("/raffles/{raffle_id}/verify", response_model=RaffleVerificationResponse)
+async def verify_raffle(
+    raffle_id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    """Verify a completed raffle's Random.org signature and winner"""
+    raffle = await RaffleCRUD.get_by_id_with_participants(db, raffle_id)
+    if not raffle:
+        raise HTTPException(status_code=404, detail="Raffle not found")
+
+    try:
+        return raffle_service.verify_raffle(raffle)
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@router.post(
+    "/raffles/{raffle_id}/join",
+    response_model=ParticipantResponse,
+    responses={202: {"model": JoinRequestResponse}}
+)
 async def join_raffle(
     raffle_id: int,
     request: JoinRaffleRequest,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(verify_telegram_auth)
 ):
-    """Join a raffle after payment"""
+    """
+    Join a raffle after payment
+
+    With JOIN_ASYNC_VERIFICATION enabled the join is recorded as pending and
+    202 is returned; the result is pushed over /ws and available from
+    GET /joins/{request_id}.
+    """
+    if settings.JOIN_ASYNC_VERIFICATION:
+        try:
+            join_request = await join_service.submit(
+                db,
+                raffle_id=raffle_id,
+                user_id=user.id,
+                tx_hash=request.tx_hash
+            )
+        except JoinQueueFullError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return JSONResponse(
+            status_code=202,
+            content=jsonable_encoder(JoinRequestResponse.model_validate(join_request))
+        )
+
     try:
         participant = await raffle_service.join_raffle(
             db=db,
@@ -134,6 +247,20 @@ async def join_raffle(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.get("/joins/{request_id}", response_model=JoinRequestResponse)
+async def get_join_request(
+    request_id: int,
+    db: AsyncSession = Depends(get_db),
+    user: User = Depends(verify_telegram_auth)
+):
+    """Get status of an asynchronous join request"""
+    join_request = await JoinRequestCRUD.get_by_id(db, request_id)
+    if not join_request or join_request.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Join request not found")
+
+    return JoinRequestResponse.model_validate(join_request)
+
+
 @router.get("/user/stats", response_model=UserStatsResponse)
 async def get_user_stats(
     db: AsyncSession = Depends(get_db),
@@ -143,8 +270,8 @@ async def get_user_stats(
     # Refresh user from DB
     user = await UserCRUD.get_by_id(db, user.id)
 
-    # TODO: Get recent participations
-    recent_raffles = []
+    rows = await ParticipantCRUD.get_user_history(db, user.id, limit=RECENT_PARTICIPATIONS_LIMIT)
+    recent_raffles = [RaffleResponse.model_validate(row) for row in rows]
 
     from app.schemas.pydantic import UserResponse
 
@@ -167,14 +294,29 @@ async def get_user_stats(
 
 @router.get("/history", response_model=HistoryResponse)
 async def get_raffle_history(
-    limit: int = 20,
-    offset: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     user: User = Depends(verify_telegram_auth)
 ):
-    """Get user's raffle history"""
-    # TODO: Implement history query
+    """Get user's raffle history (newest first, cursor-paginated)"""
+    before = None
+    if cursor:
+        try:
+            before = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    # Fetch one extra row to know whether another page exists
+    rows = await ParticipantCRUD.get_user_history(db, user.id, limit=limit + 1, before=before)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].joined_at, rows[-1].participant_id)
+
     return HistoryResponse(
-        raffles=[],
-        total=0
+        raffles=[RaffleResponse.model_validate(row) for row in rows],
+        total=user.total_participations or 0,
+        next_cursor=next_cursor
     )
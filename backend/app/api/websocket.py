@@ -1,75 +1,339 @@
 """WebSocket manager for real-time updates"""
 
-from typing import List
+import asyncio
+import json
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Set
 from fastapi import WebSocket
 from loguru import logger
 
+from app.config import settings
+from app.database.models import RaffleType
+from app.services.backplane import InMemoryBackplane, create_backplane
+
+# Every raffle event, for the raffle list
+RAFFLES_TOPIC = "raffles"
+
+# Every connection (broadcasts)
+ALL_TOPIC = "*"
+
+# Topics clients may subscribe to; personal "user:<id>" topics are bound on connect only
+SUBSCRIBABLE_TOPIC = re.compile(
+    rf"^(raffles|raffle:\d+|type:({'|'.join(raffle_type.value for raffle_type in RaffleType)}))$"
+)
+
+
+def raffle_topic(raffle_id: int) -> str:
+    """Topic of one raffle's events"""
+    return f"raffle:{raffle_id}"
+
+
+def type_topic(raffle_type: str) -> str:
+    """Topic of events of every raffle of a type"""
+    return f"type:{raffle_type}"
+
+
+def user_topic(user_id: int) -> str:
+    """Personal topic of a user's connections"""
+    return f"user:{user_id}"
+
+
+class Connection:
+    """A client socket with its bounded send queue, drained by its own writer task"""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.topics: Set[str] = set()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.WS_SEND_QUEUE_SIZE)
+        self.writer: Optional[asyncio.Task] = None
+
 
 class ConnectionManager:
-    """WebSocket connection manager"""
+    """
+    WebSocket connection manager with topic subscriptions
+
+    Connections are indexed by topic, so an event is only sent to the
+    sockets subscribed to one of its topics, and connecting or
+    disconnecting costs O(1) per subscribed topic. New connections are
+    subscribed to every raffle event ("raffles"), as before topics existed;
+    clients may unsubscribe and pick narrower topics.
 
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    Messages are serialized once and queued to each recipient without
+    waiting; every connection has a writer task sending its queue, so a
+    slow client only delays itself. A client whose queue overflows, or
+    whose send takes longer than WS_SEND_TIMEOUT_SECONDS, is disconnected.
 
-    async def connect(self, websocket: WebSocket):
-        """Accept new WebSocket connection"""
+    Published events go through the backplane (WS_BACKPLANE), so every
+    process delivers them to its own subscribers, wherever they were
+    published.
+    """
+
+    def __init__(self, backplane: Optional[InMemoryBackplane] = None):
+        self.backplane = backplane or create_backplane()
+        self.backplane.subscribe(self._deliver)
+        self.connections: Dict[WebSocket, Connection] = {}
+        self.topics: Dict[str, Set[WebSocket]] = {}
+        self.stats: Dict[str, float] = {
+            "fanouts": 0,
+            "delivered": 0,
+            "sent": 0,
+            "evicted": 0,
+            "send_failures": 0,
+            "total_fanout_seconds": 0.0,
+            "max_fanout_seconds": 0.0,
+        }
+
+    async def start(self):
+        """Start receiving events published by other processes"""
+        await self.backplane.start()
+
+    async def stop(self):
+        """Stop receiving events from other processes"""
+        await self.backplane.stop()
+
+    async def connect(self, websocket: WebSocket, user_id: Optional[int] = None):
+        """Accept new WebSocket connection, optionally bound to an authenticated user"""
         await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
+        connection = Connection(websocket)
+        connection.writer = asyncio.create_task(self._write(connection))
+        self.connections[websocket] = connection
+        self._subscribe(connection, RAFFLES_TOPIC)
+        if user_id is not None:
+            self._subscribe(connection, user_topic(user_id))
+        logger.info(f"WebSocket connected. Total connections: {len(self.connections)}")
 
     def disconnect(self, websocket: WebSocket):
-        """Remove WebSocket connection"""
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-        logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
+        """Remove WebSocket connection, its subscriptions and its writer"""
+        connection = self._unregister(websocket)
+        if connection is not None:
+            connection.writer.cancel()
+
+    def _unregister(self, websocket: WebSocket) -> Optional[Connection]:
+        connection = self.connections.pop(websocket, None)
+        if connection is None:
+            return None
+
+        for topic in connection.topics:
+            self._remove_from_topic(websocket, topic)
+
+        logger.info(f"WebSocket disconnected. Total connections: {len(self.connections)}")
+        return connection
+
+    def _subscribe(self, connection: Connection, topic: str):
+        self.topics.setdefault(topic, set()).add(connection.websocket)
+        connection.topics.add(topic)
+
+    def _remove_from_topic(self, websocket: WebSocket, topic: str):
+        sockets = self.topics.get(topic)
+        if sockets:
+            sockets.discard(websocket)
+            if not sockets:
+                del self.topics[topic]
+
+    async def _write(self, connection: Connection):
+        """Writer task: send a connection's queued messages in order"""
+        websocket = connection.websocket
+        while True:
+            text = await connection.queue.get()
+            if text is None:
+                break  # Evicted
+
+            try:
+                await asyncio.wait_for(websocket.send_text(text), settings.WS_SEND_TIMEOUT_SECONDS)
+                self.stats["sent"] += 1
+            except Exception as e:
+                self.stats["send_failures"] += 1
+                logger.warning(f"Failed to send to WebSocket client, disconnecting: {e!r}")
+                self._unregister(websocket)
+                break
+
+        # Tell the client to reconnect later
+        try:
+            await asyncio.wait_for(websocket.close(code=1013), settings.WS_SEND_TIMEOUT_SECONDS)
+        except Exception:
+            pass
+
+    def _enqueue(self, connection: Connection, text: str):
+        """Queue a message to a connection without waiting, evicting it if its queue is full"""
+        try:
+            connection.queue.put_nowait(text)
+        except asyncio.QueueFull:
+            self.stats["evicted"] += 1
+            logger.warning(
+                f"WebSocket client fell {connection.queue.qsize()} messages behind, disconnecting"
+            )
+            self._unregister(connection.websocket)
+            # Drop its backlog and have the writer close the socket
+            while not connection.queue.empty():
+                connection.queue.get_nowait()
+            connection.queue.put_nowait(None)
+
+    def subscribe(self, websocket: WebSocket, topics: List[str]) -> List[str]:
+        """
+        Subscribe a connection to topics
+
+        Returns:
+            Topics the connection is now subscribed to
+
+        Raises:
+            ValueError: If a topic is unknown or the subscription limit is exceeded
+        """
+        invalid = [topic for topic in topics if not isinstance(topic, str) or not SUBSCRIBABLE_TOPIC.match(topic)]
+        if invalid:
+            raise ValueError(f"Unknown topics: {invalid}")
+
+        connection = self.connections[websocket]
+        if len(connection.topics | set(topics)) > settings.WS_MAX_SUBSCRIPTIONS:
+            raise ValueError(f"At most {settings.WS_MAX_SUBSCRIPTIONS} subscriptions per connection")
+
+        for topic in topics:
+            self._subscribe(connection, topic)
+        return sorted(connection.topics)
+
+    def unsubscribe(self, websocket: WebSocket, topics: List[str]) -> List[str]:
+        """
+        Unsubscribe a connection from topics (its personal topic stays)
+
+        Returns:
+            Topics the connection is still subscribed to
+
+        Raises:
+            ValueError: If a topic is unknown
+        """
+        invalid = [topic for topic in topics if not isinstance(topic, str) or not SUBSCRIBABLE_TOPIC.match(topic)]
+        if invalid:
+            raise ValueError(f"Unknown topics: {invalid}")
+
+        current = self.connections[websocket].topics
+        for topic in topics:
+            if topic in current:
+                current.discard(topic)
+                self._remove_from_topic(websocket, topic)
+        return sorted(current)
+
+    async def handle_message(self, websocket: WebSocket, message: dict):
+        """
+        Handle a client message:
+        {"action": "subscribe" | "unsubscribe", "topics": [...]} or {"action": "ping"}
+        """
+        action = message.get("action")
+        topics = message.get("topics") or []
+        try:
+            if action not in ("subscribe", "unsubscribe"):
+                await self.send_personal_message({"type": "pong"}, websocket)
+                return
+            if not isinstance(topics, list):
+                raise ValueError("topics must be a list")
+
+            if action == "subscribe":
+                topics = self.subscribe(websocket, topics)
+            else:
+                topics = self.unsubscribe(websocket, topics)
+        except ValueError as e:
+            await self.send_personal_message({"type": "error", "detail": str(e)}, websocket)
+            return
+
+        await self.send_personal_message({"type": "subscriptions", "topics": topics}, websocket)
 
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         """Send message to specific client"""
-        try:
-            await websocket.send_json(message)
-        except Exception as e:
-            logger.error(f"Failed to send personal message: {e}")
-            self.disconnect(websocket)
+        connection = self.connections.get(websocket)
+        if connection is not None:
+            self._enqueue(connection, json.dumps(message, default=str))
+
+    async def send_to_user(self, user_id: int, message: dict):
+        """Send message to every connection of a user"""
+        await self.publish([user_topic(user_id)], message)
+
+    async def publish(self, topics: Iterable[str], message: dict):
+        """Send message once to every connection, in any process, subscribed to any of the topics"""
+        await self.backplane.publish(list(topics), json.dumps(message, default=str))
 
     async def broadcast(self, message: dict):
         """Broadcast message to all connected clients"""
-        disconnected = []
+        await self.publish([ALL_TOPIC], message)
 
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Failed to broadcast to client: {e}")
-                disconnected.append(connection)
+    async def _deliver(self, topics: List[str], text: str):
+        """Backplane handler: queue an event to this process's subscribers"""
+        if ALL_TOPIC in topics:
+            recipients = set(self.connections)
+        else:
+            recipients: Set[WebSocket] = set()
+            for topic in topics:
+                recipients |= self.topics.get(topic, set())
+        self._fan_out(recipients, text)
 
-        # Remove disconnected clients
-        for connection in disconnected:
-            self.disconnect(connection)
+    def _fan_out(self, recipients: Set[WebSocket], text: str):
+        """Queue a serialized message to every recipient"""
+        if not recipients:
+            return
 
-    async def broadcast_raffle_update(self, raffle_id: int, raffle_data: dict):
-        """Broadcast raffle update"""
-        await self.broadcast({
+        started = time.perf_counter()
+        for websocket in recipients:
+            connection = self.connections.get(websocket)
+            if connection is not None:
+                self._enqueue(connection, text)
+
+        elapsed = time.perf_counter() - started
+        self.stats["fanouts"] += 1
+        self.stats["delivered"] += len(recipients)
+        self.stats["total_fanout_seconds"] += elapsed
+        self.stats["max_fanout_seconds"] = max(self.stats["max_fanout_seconds"], elapsed)
+
+    @staticmethod
+    def _raffle_topics(raffle_id: int, raffle_type: str) -> List[str]:
+        return [raffle_topic(raffle_id), type_topic(raffle_type), RAFFLES_TOPIC]
+
+    async def broadcast_raffle_update(self, raffle_id: int, raffle_type: str, raffle_data: dict):
+        """Publish raffle update"""
+        await self.publish(self._raffle_topics(raffle_id, raffle_type), {
             "type": "raffle_update",
             "raffle_id": raffle_id,
             "data": raffle_data
         })
 
-    async def broadcast_raffle_started(self, raffle_id: int, waiting_until: str):
-        """Broadcast raffle timer started"""
-        await self.broadcast({
+    async def broadcast_raffle_started(self, raffle_id: int, raffle_type: str, waiting_until: str):
+        """Publish raffle timer started"""
+        await self.publish(self._raffle_topics(raffle_id, raffle_type), {
             "type": "raffle_started",
             "raffle_id": raffle_id,
             "waiting_until": waiting_until
         })
 
-    async def broadcast_raffle_completed(self, raffle_id: int, winner_id: int):
-        """Broadcast raffle completed"""
-        await self.broadcast({
+    async def broadcast_raffle_completed(self, raffle_id: int, raffle_type: str, winner_id: int):
+        """Publish raffle completed"""
+        await self.publish(self._raffle_topics(raffle_id, raffle_type), {
             "type": "raffle_completed",
             "raffle_id": raffle_id,
             "winner_id": winner_id
         })
 
+    async def send_join_result(self, user_id: int, join_request: dict):
+        """Notify a user about the outcome of their join request"""
+        await self.send_to_user(user_id, {
+            "type": "join_result",
+            "data": join_request
+        })
+
+    def get_stats(self) -> Dict:
+        """Get connection, subscription, fan-out and eviction statistics"""
+        stats = {key: round(value, 6) if isinstance(value, float) else value for key, value in self.stats.items()}
+        queued = [connection.queue.qsize() for connection in self.connections.values()]
+        return {
+            **stats,
+            "connections": len(self.connections),
+            "topics": len(self.topics),
+            "subscriptions": sum(len(connection.topics) for connection in self.connections.values()),
+            "queued_messages": sum(queued),
+            "max_queue_depth": max(queued, default=0),
+            "avg_fanout_seconds": (
+                round(self.stats["total_fanout_seconds"] / self.stats["fanouts"], 6)
+                if self.stats["fanouts"] else 0.0
+            ),
+            "backplane": self.backplane.get_stats(),
+        }
+
 
 # Global WebSocket manager
 websocket_manager = ConnectionManager()
@@ -5,7 +5,7 @@ from loguru import logger
 
 
 async def notify_winner(bot: Bot, telegram_id: int, prize_amount: float, raffle_type: str):
-    """Notify winner about their prize"""
+    """Notify winner about their prize (errors are re-raised so the task is retried)"""
     try:
         message = (
             f"🎉 <b>Поздравляем! Вы выиграли!</b>\n\n"
@@ -24,6 +24,7 @@ async def notify_winner(bot: Bot, telegram_id: int, prize_amount: float, raffle_
 
     except Exception as e:
         logger.error(f"Failed to send winner notification: {e}")
+        raise
 
 
 async def notify_raffle_started(bot: Bot, telegram_id: int, raffle_type: str, minutes: int):
@@ -1,7 +1,7 @@
 """Application configuration"""
 
 import os
-from typing import List
+from typing import List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -18,6 +18,15 @@ class Settings(BaseSettings):
     DATABASE_URL: str = Field(...)
     REDIS_URL: str = Field(...)
 
+    # Database connection pool (ignored for SQLite)
+    DB_POOL_ENABLED: bool = Field(default=True)
+    DB_POOL_SIZE: int = Field(default=10)
+    DB_MAX_OVERFLOW: int = Field(default=20)
+    DB_POOL_TIMEOUT: float = Field(default=30.0)
+    DB_POOL_PRE_PING: bool = Field(default=True)
+    DB_POOL_RECYCLE: int = Field(default=1800)
+    DB_STATEMENT_CACHE_SIZE: int = Field(default=100)
+
     # Telegram
     TELEGRAM_BOT_TOKEN: str = Field(...)
     ADMIN_USER_ID: int = Field(...)
@@ -26,9 +35,57 @@ class Settings(BaseSettings):
     RAFFLE_WALLET_ADDRESS: str = Field(...)
     RAFFLE_WALLET_MNEMONIC: str = Field(...)
     TON_CENTER_API_KEY: str = Field(...)
+    TON_CENTER_API_URL: str = Field(default="https://toncenter.com/api/v2")
+    TON_CENTER_RPS: float = Field(default=10.0)
+    TON_CENTER_BURST: int = Field(default=10)
+    TON_CENTER_MAX_RETRIES: int = Field(default=3)
+    TON_CENTER_BREAKER_FAILURES: int = Field(default=5)  # Consecutive failures that open the circuit
+    TON_CENTER_BREAKER_RESET_SECONDS: float = Field(default=30.0)  # Open time before a probe call
+    TON_CENTER_HEDGE_DELAY_SECONDS: float = Field(default=1.0)  # Start a backup lookup after this long
+    TON_CENTER_HEDGES: int = Field(default=1)  # Backup requests per lookup (0 disables hedging)
+    TON_CACHE_TTL_SECONDS: float = Field(default=2.0)
+    TON_BALANCE_CACHE_TTL_SECONDS: float = Field(default=10.0)
+    TON_CACHE_MAX_ENTRIES: int = Field(default=256)
+
+    # TON indexer: follows the raffle wallet so payments are verified locally
+    TON_INDEXER_ENABLED: bool = Field(default=True)
+    TON_INDEXER_POLL_SECONDS: float = Field(default=2.0)
+    TON_INDEXER_PAGE_SIZE: int = Field(default=50)
+    TON_INDEXER_MAX_PAGES: int = Field(default=20)  # Pages per poll; a longer backlog is caught up over the next polls
+    TON_VERIFY_WAIT_SECONDS: float = Field(default=10.0)
+
+    # Prize payouts: batched transfers from the raffle wallet (highload wallet v2)
+    PAYOUT_BATCH_SIZE: int = Field(default=100)  # Highload v2 allows up to 254 messages
+    PAYOUT_FLUSH_SECONDS: float = Field(default=30.0)
+    PAYOUT_MESSAGE_TTL_SECONDS: int = Field(default=600)
+    PAYOUT_RETRY_BASE_SECONDS: float = Field(default=30.0)
+    PAYOUT_RETRY_MAX_SECONDS: float = Field(default=3600.0)
+    PAYOUT_MAX_ATTEMPTS: int = Field(default=5)
+    PAYOUT_CONFIRM_GRACE_SECONDS: int = Field(default=120)  # After expiry, before a batch is failed
+
+    # Transaction confirmation worker
+    TX_CONFIRM_INTERVAL_SECONDS: int = Field(default=5)
+    TX_CONFIRM_PAGE_SIZE: int = Field(default=100)
+    TX_CONFIRM_MAX_PAGES: int = Field(default=5)
+    TX_CONFIRM_TIMEOUT_SECONDS: int = Field(default=3600)  # Pending entries older than this fail
+
+    # Shared HTTP client for external APIs
+    HTTP_POOL_LIMIT: int = Field(default=100)
+    HTTP_POOL_LIMIT_PER_HOST: int = Field(default=20)
+    HTTP_DNS_CACHE_SECONDS: int = Field(default=300)
+    HTTP_KEEPALIVE_SECONDS: float = Field(default=30.0)
+    HTTP_TIMEOUT_SECONDS: float = Field(default=15.0)
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = Field(default=5.0)
+
+    # Randomness: "random_org" (signed by Random.org) or "commit_reveal" (local seed committed at creation)
+    RANDOMNESS_BACKEND: str = Field(default="random_org")
 
     # Random.org
     RANDOM_ORG_API_KEY: str = Field(...)
+    RANDOM_ORG_BATCH_SIZE: int = Field(default=50)  # Raffles drawn per signed request
+    RANDOM_ORG_PUBLIC_KEY_PATH: Optional[str] = Field(default=None)  # PEM certificate or public key
+    RANDOM_ORG_BREAKER_FAILURES: int = Field(default=3)
+    RANDOM_ORG_BREAKER_RESET_SECONDS: float = Field(default=30.0)
 
     # Raffle Configuration
     EXPRESS_MIN_PARTICIPANTS: int = Field(default=5)
@@ -45,6 +102,42 @@ class Settings(BaseSettings):
 
     COMMISSION_PERCENT: float = Field(default=10.0)
 
+    # Draws run on a one-shot timer at waiting_until; the sweep catches missed ones
+    DRAW_SWEEP_INTERVAL_SECONDS: int = Field(default=60)
+    DRAW_SWEEP_GRACE_SECONDS: int = Field(default=5)  # Sweep leaves raffles this fresh to their timers
+    DRAW_CONCURRENCY: int = Field(default=4)  # Draw batches running at once
+    DRAW_TIMEOUT_SECONDS: float = Field(default=60.0)  # A slower draw is abandoned and retried
+    DRAW_CLAIM_TTL_SECONDS: int = Field(default=300)  # Claims older than this (node died) are released
+
+    # Multi-replica: one node, holding a database lease, runs singleton jobs
+    LEADER_LEASE_SECONDS: int = Field(default=30)  # Renewed every third of this
+
+    # Durable task queue (Redis Streams) for post-draw work; runs inline when disabled
+    TASK_QUEUE_ENABLED: bool = Field(default=False)
+    TASK_QUEUE_STREAM: str = Field(default="raffle:tasks")
+    TASK_WORKERS: int = Field(default=4)  # Concurrent consumers per process
+    TASK_MAX_ATTEMPTS: int = Field(default=5)  # Then the task is dead-lettered
+    TASK_RETRY_BASE_SECONDS: float = Field(default=5.0)
+    TASK_RETRY_MAX_SECONDS: float = Field(default=300.0)
+    TASK_TIMEOUT_SECONDS: float = Field(default=60.0)
+    TASK_CLAIM_IDLE_SECONDS: int = Field(default=300)  # Unacked tasks of a dead consumer are taken over after this
+
+    # Asynchronous joins: accept with 202 and verify payment in the background
+    JOIN_ASYNC_VERIFICATION: bool = Field(default=False)
+    JOIN_VERIFY_WORKERS: int = Field(default=4)
+    JOIN_VERIFY_QUEUE_SIZE: int = Field(default=1000)
+    JOIN_VERIFY_RETRY_BASE_SECONDS: float = Field(default=5.0)
+    JOIN_VERIFY_RETRY_MAX_SECONDS: float = Field(default=60.0)
+    JOIN_VERIFY_DEADLINE_SECONDS: int = Field(default=900)  # Unverifiable payments are retried this long, then rejected
+
+    # WebSocket: clients only receive events of the topics they subscribe to ("raffles" on connect)
+    WS_MAX_SUBSCRIPTIONS: int = Field(default=50)  # Topics per connection
+    WS_SEND_QUEUE_SIZE: int = Field(default=100)  # Messages a client may fall behind before it is dropped
+    WS_SEND_TIMEOUT_SECONDS: float = Field(default=10.0)  # A slower send drops the client
+    # Carries events between processes: "memory" (single process) or "redis" (several workers or replicas)
+    WS_BACKPLANE: str = Field(default="memory")
+    WS_BACKPLANE_CHANNEL: str = Field(default="raffle:ws")
+
     # CORS
     CORS_ORIGINS: str = Field(default="*")
 
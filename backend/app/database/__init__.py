@@ -1,7 +1,10 @@
 """Database package"""
 
-from app.database.models import Base, User, Raffle, Participant, Transaction
-from app.database.session import get_db, init_db, close_db
+from app.database.models import (
+    Base, User, Raffle, Participant, Transaction, JoinRequest,
+    WalletTransfer, IndexerCursor, PayoutBatch,
+)
+from app.database.session import get_db, init_db, close_db, get_pool_stats
 from app.database import crud
 
 __all__ = [
@@ -10,8 +13,13 @@ __all__ = [
     "Raffle",
     "Participant",
     "Transaction",
+    "JoinRequest",
+    "WalletTransfer",
+    "IndexerCursor",
+    "PayoutBatch",
     "get_db",
     "init_db",
     "close_db",
+    "get_pool_stats",
     "crud",
 ]
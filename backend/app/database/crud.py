@@ -1,13 +1,26 @@
 """CRUD operations for database models"""
 
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from datetime import datetime
 
-from sqlalchemy import select, update, delete
+from sqlalchemy import Row, select, and_, update, delete, func, or_, tuple_, case, literal, exists, text
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
-from app.database.models import User, Raffle, Participant, Transaction, RaffleType, RaffleStatus
+from app.database.models import (
+    User, Raffle, Participant, Transaction, JoinRequest, WalletTransfer, IndexerCursor,
+    PayoutBatch, SchedulerLease, RaffleType, RaffleStatus, TransactionType, TransactionStatus,
+    JoinRequestStatus, PayoutBatchStatus,
+)
+
+
+def _upsert(db: AsyncSession, model):
+    """Dialect-specific INSERT supporting ON CONFLICT"""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
 
 
 class UserCRUD:
@@ -51,12 +64,31 @@ class UserCRUD:
                 user.username = username
         return user
 
+    @staticmethod
+    async def add_participation(db: AsyncSession, user_id: int, amount_ton: float):
+        """Atomically increment user participation stats"""
+        await db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                total_participations=User.total_participations + 1,
+                total_spent_ton=User.total_spent_ton + amount_ton,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
 
 class RaffleCRUD:
     """CRUD operations for Raffle model"""
 
     @staticmethod
     async def get_by_id(db: AsyncSession, raffle_id: int) -> Optional[Raffle]:
+        """Get raffle by ID"""
+        result = await db.execute(select(Raffle).where(Raffle.id == raffle_id))
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def get_by_id_with_participants(db: AsyncSession, raffle_id: int) -> Optional[Raffle]:
         """Get raffle by ID with participants"""
         result = await db.execute(
             select(Raffle)
@@ -70,24 +102,250 @@ class RaffleCRUD:
         """Get active raffle by type"""
         result = await db.execute(
             select(Raffle)
-            .options(selectinload(Raffle.participants))
             .where(Raffle.type == raffle_type)
             .where(Raffle.status.in_([RaffleStatus.ACTIVE, RaffleStatus.WAITING]))
             .order_by(Raffle.created_at.desc())
+            .limit(1)  # A promoted raffle may briefly coexist with a released one
         )
         return result.scalar_one_or_none()
 
+    @staticmethod
+    async def has_open_raffle(db: AsyncSession, raffle_type: RaffleType) -> bool:
+        """Check whether a raffle of the type is accepting participants"""
+        result = await db.execute(
+            select(Raffle.id)
+            .where(Raffle.type == raffle_type)
+            .where(Raffle.status.in_([RaffleStatus.ACTIVE, RaffleStatus.WAITING]))
+            .limit(1)
+        )
+        return result.first() is not None
+
     @staticmethod
     async def get_all_active(db: AsyncSession) -> List[Raffle]:
         """Get all active raffles"""
         result = await db.execute(
             select(Raffle)
-            .options(selectinload(Raffle.participants))
             .where(Raffle.status.in_([RaffleStatus.ACTIVE, RaffleStatus.WAITING]))
             .order_by(Raffle.created_at.desc())
         )
         return list(result.scalars().all())
 
+    @staticmethod
+    async def get_ready_to_draw_ids(db: AsyncSession, now: datetime) -> List[int]:
+        """Get IDs of waiting raffles whose timer expired by the given time"""
+        result = await db.execute(
+            select(Raffle.id)
+            .where(Raffle.status == RaffleStatus.WAITING)
+            .where(Raffle.waiting_until <= now)
+            .order_by(Raffle.waiting_until)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get_draw_timers(db: AsyncSession) -> List[Row]:
+        """Get (id, waiting_until) of all waiting raffles"""
+        result = await db.execute(
+            select(Raffle.id, Raffle.waiting_until)
+            .where(Raffle.status == RaffleStatus.WAITING)
+            .order_by(Raffle.waiting_until)
+        )
+        return list(result.all())
+
+    @staticmethod
+    async def get_active_summaries(db: AsyncSession) -> List[Row]:
+        """Get column-only summaries of all active raffles (no ORM hydration)"""
+        result = await db.execute(
+            select(
+                Raffle.id,
+                Raffle.type,
+                Raffle.status,
+                Raffle.min_participants,
+                Raffle.participant_count.label("current_participants"),
+                Raffle.entry_fee_ton,
+                Raffle.prize_pool_ton,
+                Raffle.commission_percent,
+                Raffle.created_at,
+                Raffle.waiting_until,
+                Raffle.drawn_at,
+                Raffle.winner_id,
+                Raffle.random_org_signature,
+                Raffle.random_org_url,
+                Raffle.seed_commitment,
+            )
+            .where(Raffle.status.in_([RaffleStatus.ACTIVE, RaffleStatus.WAITING]))
+            .order_by(Raffle.created_at.desc())
+        )
+        return list(result.all())
+
+    @staticmethod
+    async def register_participant(
+        db: AsyncSession,
+        raffle: Raffle,
+        waiting_until: datetime,
+    ) -> bool:
+        """
+        Count a new participant and start the timer once the minimum is reached
+
+        A single UPDATE that locks the raffle row until commit, so concurrent
+        joins serialize on it. The in-session raffle is updated from RETURNING.
+
+        Args:
+            db: Database session
+            raffle: Raffle being joined
+            waiting_until: Draw time to set if this join reaches the minimum
+
+        Returns:
+            False if the raffle is no longer accepting participants
+        """
+        reaches_minimum = (
+            (Raffle.status == RaffleStatus.ACTIVE)
+            & (Raffle.participant_count + 1 >= Raffle.min_participants)
+        )
+        result = await db.execute(
+            update(Raffle)
+            .where(Raffle.id == raffle.id)
+            .where(Raffle.status.in_([RaffleStatus.ACTIVE, RaffleStatus.WAITING]))
+            .values(
+                participant_count=Raffle.participant_count + 1,
+                status=case(
+                    (reaches_minimum, literal(RaffleStatus.WAITING, Raffle.status.type)),
+                    else_=Raffle.status,
+                ),
+                waiting_until=case((reaches_minimum, waiting_until), else_=Raffle.waiting_until),
+            )
+            .returning(Raffle.participant_count, Raffle.status, Raffle.waiting_until)
+            .execution_options(synchronize_session=False)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return False
+
+        set_committed_value(raffle, "participant_count", row.participant_count)
+        set_committed_value(raffle, "status", row.status)
+        set_committed_value(raffle, "waiting_until", row.waiting_until)
+        return True
+
+    @staticmethod
+    async def claim_draws(db: AsyncSession, raffle_ids: List[int], now: datetime) -> List[int]:
+        """
+        Claim expired raffles for drawing (WAITING -> DRAWING) in one UPDATE
+
+        Rows another node is claiming right now are skipped rather than
+        waited for (FOR UPDATE SKIP LOCKED), so concurrent nodes split the
+        work and each raffle is claimed exactly once.
+
+        Returns:
+            (id, type) of the raffles claimed by this call
+        """
+        claimable = (
+            select(Raffle.id)
+            .where(Raffle.id.in_(raffle_ids))
+            .where(Raffle.status == RaffleStatus.WAITING)
+            .where(Raffle.waiting_until <= now)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(Raffle)
+            .where(Raffle.id.in_(claimable), Raffle.status == RaffleStatus.WAITING)
+            .values(status=RaffleStatus.DRAWING, draw_claimed_at=now)
+            .returning(Raffle.id, Raffle.type)
+            .execution_options(synchronize_session=False)
+        )
+        return list(result.all())
+
+    @staticmethod
+    async def promote_pending(db: AsyncSession, raffle_types: List[RaffleType]) -> List[Row]:
+        """
+        Open the provisioned next raffle (PENDING -> ACTIVE) of each type that
+        has no raffle accepting participants
+
+        Returns:
+            (id, type) of the raffles opened
+        """
+        open_raffle = aliased(Raffle)
+        result = await db.execute(
+            update(Raffle)
+            .where(Raffle.status == RaffleStatus.PENDING)
+            .where(Raffle.type.in_(raffle_types))
+            .where(
+                ~exists()
+                .where(open_raffle.type == Raffle.type)
+                .where(open_raffle.status.in_([RaffleStatus.ACTIVE, RaffleStatus.WAITING]))
+            )
+            .values(status=RaffleStatus.ACTIVE)
+            .returning(Raffle.id, Raffle.type)
+            .execution_options(synchronize_session=False)
+        )
+        return list(result.all())
+
+    @staticmethod
+    async def release_stale_draws(db: AsyncSession, claimed_before: datetime) -> int:
+        """
+        Return raffles whose draw claim is older than the given time to WAITING
+        (the node drawing them died)
+
+        Returns:
+            Number of raffles released
+        """
+        result = await db.execute(
+            update(Raffle)
+            .where(Raffle.status == RaffleStatus.DRAWING)
+            .where(or_(Raffle.draw_claimed_at < claimed_before, Raffle.draw_claimed_at.is_(None)))
+            .values(status=RaffleStatus.WAITING)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    @staticmethod
+    async def release_draws(db: AsyncSession, raffle_ids: List[int], claimed_at: datetime) -> int:
+        """
+        Return raffles still held by the given claim to WAITING
+
+        Raffles released or re-claimed since (e.g. by release_stale_draws
+        and another node) carry a different claim and are left alone.
+
+        Returns:
+            Number of raffles released
+        """
+        result = await db.execute(
+            update(Raffle)
+            .where(Raffle.id.in_(raffle_ids))
+            .where(Raffle.status == RaffleStatus.DRAWING)
+            .where(Raffle.draw_claimed_at == claimed_at)
+            .values(status=RaffleStatus.WAITING)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    @staticmethod
+    async def finish_draw(db: AsyncSession, raffle: Raffle, claimed_at: datetime, **values) -> bool:
+        """
+        Record a draw result (DRAWING -> COMPLETED) if the raffle is still
+        held by the given claim
+
+        A single guarded UPDATE, so a draw whose claim was released and
+        taken over by another node cannot complete the raffle a second
+        time. The in-session raffle is updated on success.
+
+        Returns:
+            False if the raffle is no longer held by this claim
+        """
+        values["status"] = RaffleStatus.COMPLETED
+        result = await db.execute(
+            update(Raffle)
+            .where(Raffle.id == raffle.id)
+            .where(Raffle.status == RaffleStatus.DRAWING)
+            .where(Raffle.draw_claimed_at == claimed_at)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            return False
+
+        for key, value in values.items():
+            set_committed_value(raffle, key, value)
+        return True
+
     @staticmethod
     async def create(
         db: AsyncSession,
@@ -96,6 +354,8 @@ class RaffleCRUD:
         entry_fee_ton: float,
         prize_pool_ton: float,
         commission_percent: float = 10.0,
+        server_seed: Optional[str] = None,
+        seed_commitment: Optional[str] = None,
     ) -> Raffle:
         """Create new raffle"""
         raffle = Raffle(
@@ -105,12 +365,45 @@ class RaffleCRUD:
             entry_fee_ton=entry_fee_ton,
             prize_pool_ton=prize_pool_ton,
             commission_percent=commission_percent,
+            server_seed=server_seed,
+            seed_commitment=seed_commitment,
             created_at=datetime.utcnow(),
         )
         db.add(raffle)
         await db.flush()
         return raffle
 
+    @staticmethod
+    async def create_pending(
+        db: AsyncSession,
+        raffle_type: RaffleType,
+        min_participants: int,
+        entry_fee_ton: float,
+        prize_pool_ton: float,
+        commission_percent: float = 10.0,
+        server_seed: Optional[str] = None,
+        seed_commitment: Optional[str] = None,
+    ) -> Optional[Raffle]:
+        """Create the next raffle of the type, or return None if one is already provisioned"""
+        result = await db.execute(
+            _upsert(db, Raffle)
+            .values(
+                type=raffle_type,
+                status=RaffleStatus.PENDING,
+                min_participants=min_participants,
+                entry_fee_ton=entry_fee_ton,
+                prize_pool_ton=prize_pool_ton,
+                commission_percent=commission_percent,
+                participant_count=0,
+                server_seed=server_seed,
+                seed_commitment=seed_commitment,
+                created_at=datetime.utcnow(),
+            )
+            .on_conflict_do_nothing(index_elements=["type"], index_where=text("status = 'PENDING'"))
+            .returning(Raffle)
+        )
+        return result.scalar_one_or_none()
+
 
 class ParticipantCRUD:
     """CRUD operations for Participant model"""
@@ -121,30 +414,88 @@ class ParticipantCRUD:
         raffle_id: int,
         user_id: int,
         transaction_hash: Optional[str] = None,
-    ) -> Participant:
-        """Create new participant"""
-        participant = Participant(
-            raffle_id=raffle_id,
-            user_id=user_id,
-            transaction_hash=transaction_hash,
-            joined_at=datetime.utcnow(),
+    ) -> Optional[Participant]:
+        """
+        Create new participant
+
+        Returns:
+            The participant, or None if the user already joined this raffle
+            (or the transaction hash is already attached to a participant)
+        """
+        result = await db.execute(
+            _upsert(db, Participant)
+            .values(
+                raffle_id=raffle_id,
+                user_id=user_id,
+                transaction_hash=transaction_hash,
+                joined_at=datetime.utcnow(),
+                is_winner=False,
+                prize_sent=False,
+            )
+            .on_conflict_do_nothing()
+            .returning(Participant)
         )
-        db.add(participant)
-        await db.flush()
-        return participant
+        return result.scalar_one_or_none()
 
     @staticmethod
-    async def get_by_raffle_and_user(
-        db: AsyncSession, raffle_id: int, user_id: int
-    ) -> Optional[Participant]:
-        """Check if user is already participant"""
+    async def get_by_transaction_hash(db: AsyncSession, tx_hash: str) -> Optional[Participant]:
+        """Get participant by entry transaction hash"""
         result = await db.execute(
-            select(Participant)
-            .where(Participant.raffle_id == raffle_id)
-            .where(Participant.user_id == user_id)
+            select(Participant).where(Participant.transaction_hash == tx_hash)
         )
         return result.scalar_one_or_none()
 
+    @staticmethod
+    async def get_user_history(
+        db: AsyncSession,
+        user_id: int,
+        limit: int,
+        before: Optional[Tuple[datetime, int]] = None,
+    ) -> List[Row]:
+        """
+        Get a page of the user's participations joined with raffle summaries
+
+        Keyset-paginated on (joined_at, id) descending, so each page costs
+        O(limit) regardless of depth.
+
+        Args:
+            db: Database session
+            user_id: User ID
+            limit: Page size
+            before: (joined_at, participant id) of the last row of the previous page
+        """
+        query = (
+            select(
+                Raffle.id,
+                Raffle.type,
+                Raffle.status,
+                Raffle.min_participants,
+                Raffle.participant_count.label("current_participants"),
+                Raffle.entry_fee_ton,
+                Raffle.prize_pool_ton,
+                Raffle.commission_percent,
+                Raffle.created_at,
+                Raffle.waiting_until,
+                Raffle.drawn_at,
+                Raffle.winner_id,
+                Raffle.random_org_signature,
+                Raffle.random_org_url,
+                Raffle.seed_commitment,
+                Participant.id.label("participant_id"),
+                Participant.joined_at,
+            )
+            .join(Raffle, Raffle.id == Participant.raffle_id)
+            .where(Participant.user_id == user_id)
+            .order_by(Participant.joined_at.desc(), Participant.id.desc())
+            .limit(limit)
+        )
+
+        if before is not None:
+            query = query.where(tuple_(Participant.joined_at, Participant.id) < tuple_(*before))
+
+        result = await db.execute(query)
+        return list(result.all())
+
 
 class TransactionCRUD:
     """CRUD operations for Transaction model"""
@@ -175,6 +526,36 @@ class TransactionCRUD:
         await db.flush()
         return transaction
 
+    @staticmethod
+    async def create_if_absent(
+        db: AsyncSession,
+        user_id: int,
+        tx_hash: str,
+        from_wallet: str,
+        to_wallet: str,
+        amount_ton: float,
+        tx_type: TransactionType,
+        raffle_id: Optional[int] = None,
+    ) -> Optional[Transaction]:
+        """Create new transaction, or return None if the hash is already recorded"""
+        result = await db.execute(
+            _upsert(db, Transaction)
+            .values(
+                user_id=user_id,
+                raffle_id=raffle_id,
+                tx_hash=tx_hash,
+                from_wallet=from_wallet,
+                to_wallet=to_wallet,
+                amount_ton=amount_ton,
+                type=tx_type,
+                status=TransactionStatus.PENDING,
+                created_at=datetime.utcnow(),
+            )
+            .on_conflict_do_nothing(index_elements=["tx_hash"])
+            .returning(Transaction)
+        )
+        return result.scalar_one_or_none()
+
     @staticmethod
     async def get_by_hash(db: AsyncSession, tx_hash: str) -> Optional[Transaction]:
         """Get transaction by hash"""
@@ -182,3 +563,449 @@ class TransactionCRUD:
             select(Transaction).where(Transaction.tx_hash == tx_hash)
         )
         return result.scalar_one_or_none()
+
+    @staticmethod
+    async def get_oldest_pending_entry_time(db: AsyncSession, since: datetime) -> Optional[datetime]:
+        """Get creation time of the oldest pending entry payment created after since"""
+        result = await db.execute(
+            select(func.min(Transaction.created_at))
+            .where(
+                Transaction.type == TransactionType.ENTRY,
+                Transaction.status == TransactionStatus.PENDING,
+                Transaction.created_at >= since,
+            )
+        )
+        return result.scalar_one()
+
+    @staticmethod
+    async def confirm_indexed_entries(db: AsyncSession, confirmed_at: datetime) -> int:
+        """Confirm all pending entry payments present in wallet_transfers"""
+        result = await db.execute(
+            update(Transaction)
+            .where(
+                Transaction.type == TransactionType.ENTRY,
+                Transaction.status == TransactionStatus.PENDING,
+                Transaction.tx_hash.in_(select(WalletTransfer.tx_hash)),
+            )
+            .values(status=TransactionStatus.CONFIRMED, confirmed_at=confirmed_at)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    @staticmethod
+    async def set_status_many(
+        db: AsyncSession,
+        tx_hashes: List[str],
+        status: TransactionStatus,
+        confirmed_at: Optional[datetime] = None,
+        tx_type: Optional[TransactionType] = None,
+    ) -> int:
+        """Move pending transactions with the given hashes to a final status"""
+        if not tx_hashes:
+            return 0
+
+        stmt = update(Transaction).where(
+            Transaction.status == TransactionStatus.PENDING,
+            Transaction.tx_hash.in_(tx_hashes),
+        )
+        if tx_type is not None:
+            stmt = stmt.where(Transaction.type == tx_type)
+
+        result = await db.execute(
+            stmt.values(status=status, confirmed_at=confirmed_at)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    @staticmethod
+    async def fail_stale_entries(db: AsyncSession, before: datetime) -> int:
+        """Fail pending entry payments created before the given time"""
+        result = await db.execute(
+            update(Transaction)
+            .where(
+                Transaction.type == TransactionType.ENTRY,
+                Transaction.status == TransactionStatus.PENDING,
+                Transaction.created_at < before,
+            )
+            .values(status=TransactionStatus.FAILED)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+
+class JoinRequestCRUD:
+    """CRUD operations for JoinRequest model"""
+
+    @staticmethod
+    async def create(
+        db: AsyncSession,
+        raffle_id: int,
+        user_id: int,
+        tx_hash: str,
+    ) -> Optional[JoinRequest]:
+        """
+        Create pending join request, or reset the user's rejected request with
+        the same hash; return None if the hash was already submitted otherwise
+        """
+        values = dict(
+            raffle_id=raffle_id,
+            user_id=user_id,
+            tx_hash=tx_hash,
+            status=JoinRequestStatus.PENDING,
+            created_at=datetime.utcnow(),
+        )
+        result = await db.execute(
+            _upsert(db, JoinRequest)
+            .values(**values)
+            .on_conflict_do_update(
+                index_elements=["tx_hash"],
+                set_=dict(values, error=None, participant_id=None, processed_at=None),
+                where=and_(
+                    JoinRequest.status == JoinRequestStatus.REJECTED,
+                    JoinRequest.user_id == user_id,
+                ),
+            )
+            .returning(JoinRequest)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def get_by_id(db: AsyncSession, request_id: int) -> Optional[JoinRequest]:
+        """Get join request by ID"""
+        result = await db.execute(select(JoinRequest).where(JoinRequest.id == request_id))
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def get_pending_ids(db: AsyncSession) -> List[int]:
+        """Get IDs of all pending join requests, oldest first"""
+        result = await db.execute(
+            select(JoinRequest.id)
+            .where(JoinRequest.status == JoinRequestStatus.PENDING)
+            .order_by(JoinRequest.id)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def mark_processed(
+        db: AsyncSession,
+        request_id: int,
+        status: JoinRequestStatus,
+        participant_id: Optional[int] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        """
+        Record the outcome of a join request if it is still pending
+
+        Guarded on PENDING, so a replica that lost the race for the same
+        request cannot overwrite the outcome recorded by the winner.
+
+        Returns:
+            False if the request was already processed
+        """
+        result = await db.execute(
+            update(JoinRequest)
+            .where(JoinRequest.id == request_id)
+            .where(JoinRequest.status == JoinRequestStatus.PENDING)
+            .values(
+                status=status,
+                participant_id=participant_id,
+                error=error,
+                processed_at=datetime.utcnow(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+
+class WalletTransferCRUD:
+    """CRUD operations for WalletTransfer and IndexerCursor models"""
+
+    @staticmethod
+    async def get_by_hash(db: AsyncSession, tx_hash: str) -> Optional[WalletTransfer]:
+        """Get indexed transfer by transaction hash"""
+        result = await db.execute(
+            select(WalletTransfer).where(WalletTransfer.tx_hash == tx_hash)
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def add_many(db: AsyncSession, transfers: List[dict]) -> int:
+        """Insert transfers, skipping hashes that are already indexed"""
+        if not transfers:
+            return 0
+
+        now = datetime.utcnow()
+        result = await db.execute(
+            _upsert(db, WalletTransfer)
+            .values([{**transfer, "indexed_at": now} for transfer in transfers])
+            .on_conflict_do_nothing(index_elements=["tx_hash"])
+        )
+        return result.rowcount
+
+    @staticmethod
+    async def get_cursor(db: AsyncSession, name: str) -> Optional[IndexerCursor]:
+        """Get indexer cursor by name"""
+        return await db.get(IndexerCursor, name)
+
+    @staticmethod
+    async def set_cursor(db: AsyncSession, name: str, lt: int, tx_hash: str):
+        """Create or move indexer cursor"""
+        stmt = _upsert(db, IndexerCursor).values(
+            name=name, lt=lt, tx_hash=tx_hash, updated_at=datetime.utcnow()
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["name"],
+                set_={"lt": stmt.excluded.lt, "tx_hash": stmt.excluded.tx_hash,
+                      "updated_at": stmt.excluded.updated_at},
+            )
+        )
+
+
+class PayoutCRUD:
+    """CRUD operations for PayoutBatch model and pending prizes"""
+
+    @staticmethod
+    async def get_unbatched_prizes(
+        db: AsyncSession,
+        limit: int,
+        now: datetime,
+        max_attempts: int,
+    ) -> List[Row]:
+        """
+        Get unpaid prizes not yet assigned to a batch, oldest first
+
+        Prizes still backing off after a failed payout, or out of attempts,
+        are skipped. Rows are locked (SKIP LOCKED) so concurrent flushes take
+        disjoint sets.
+
+        Returns:
+            Rows with participant_id, raffle_id, user_id, ton_wallet and prize_pool_ton
+        """
+        result = await db.execute(
+            select(
+                Participant.id.label("participant_id"),
+                Participant.raffle_id,
+                Participant.user_id,
+                User.ton_wallet,
+                Raffle.prize_pool_ton,
+            )
+            .join(User, User.id == Participant.user_id)
+            .join(Raffle, Raffle.id == Participant.raffle_id)
+            .where(
+                Participant.is_winner.is_(True),
+                Participant.prize_sent.is_(False),
+                Participant.payout_batch_id.is_(None),
+                Participant.payout_attempts < max_attempts,
+                or_(Participant.payout_retry_at.is_(None), Participant.payout_retry_at <= now),
+                User.ton_wallet.is_not(None),
+            )
+            .order_by(Participant.id)
+            .limit(limit)
+            .with_for_update(of=Participant, skip_locked=True)
+        )
+        return list(result.all())
+
+    @staticmethod
+    async def create_batch(
+        db: AsyncSession,
+        query_id: int,
+        boc: str,
+        message_hash: str,
+        expires_at: datetime,
+        prizes: List[Row],
+        from_wallet: str,
+    ) -> PayoutBatch:
+        """
+        Store a signed batch and assign its prizes to it
+
+        Each prize gets the hash "<message_hash>:<index>" of its message in the
+        batch and a pending PRIZE transaction recording recipient and amount.
+
+        Args:
+            prizes: Rows from get_unbatched_prizes, in message order
+        """
+        now = datetime.utcnow()
+        batch = PayoutBatch(
+            query_id=query_id,
+            boc=boc,
+            message_hash=message_hash,
+            status=PayoutBatchStatus.PENDING,
+            total_ton=sum(prize.prize_pool_ton for prize in prizes),
+            recipients=len(prizes),
+            attempts=0,
+            created_at=now,
+            expires_at=expires_at,
+        )
+        db.add(batch)
+        await db.flush()
+
+        tx_hashes = {
+            prize.participant_id: f"{message_hash}:{index}"
+            for index, prize in enumerate(prizes)
+        }
+        await db.execute(
+            update(Participant)
+            .where(Participant.id.in_(tx_hashes.keys()))
+            .values(
+                payout_batch_id=batch.id,
+                prize_tx_hash=case(tx_hashes, value=Participant.id),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(
+            _upsert(db, Transaction)
+            .values([
+                {
+                    "user_id": prize.user_id,
+                    "raffle_id": prize.raffle_id,
+                    "tx_hash": tx_hashes[prize.participant_id],
+                    "from_wallet": from_wallet,
+                    "to_wallet": prize.ton_wallet,
+                    "amount_ton": prize.prize_pool_ton,
+                    "type": TransactionType.PRIZE,
+                    "status": TransactionStatus.PENDING,
+                    "created_at": now,
+                }
+                for prize in prizes
+            ])
+            .on_conflict_do_nothing(index_elements=["tx_hash"])
+        )
+        return batch
+
+    @staticmethod
+    async def get_unsent_batches(db: AsyncSession, now: datetime) -> List[PayoutBatch]:
+        """Get unexpired batches not yet accepted by the network and due for a send"""
+        result = await db.execute(
+            select(PayoutBatch)
+            .where(
+                PayoutBatch.status == PayoutBatchStatus.PENDING,
+                PayoutBatch.expires_at > now,
+                or_(PayoutBatch.next_attempt_at.is_(None), PayoutBatch.next_attempt_at <= now),
+            )
+            .order_by(PayoutBatch.id)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def mark_sent(db: AsyncSession, batch: PayoutBatch) -> int:
+        """
+        Record a batch accepted by the network
+
+        Returns:
+            Number of prizes in the batch
+        """
+        batch.status = PayoutBatchStatus.SENT
+        batch.sent_at = datetime.utcnow()
+        batch.last_error = None
+        batch.next_attempt_at = None
+
+        result = await db.execute(
+            update(Participant)
+            .where(Participant.payout_batch_id == batch.id)
+            .values(prize_sent=True)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    @staticmethod
+    async def mark_attempt_failed(
+        db: AsyncSession,
+        batch: PayoutBatch,
+        error: str,
+        next_attempt_at: datetime,
+    ):
+        """Record a failed send and when to try again"""
+        batch.last_error = error
+        batch.next_attempt_at = next_attempt_at
+
+    @staticmethod
+    async def get_unconfirmed_batches(db: AsyncSession) -> List[PayoutBatch]:
+        """Get batches whose on-chain outcome is not known yet"""
+        result = await db.execute(
+            select(PayoutBatch)
+            .where(PayoutBatch.status.in_([PayoutBatchStatus.PENDING, PayoutBatchStatus.SENT]))
+            .order_by(PayoutBatch.id)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get_batch_prizes(db: AsyncSession, batch_id: int) -> List[Row]:
+        """
+        Get prizes of a batch in message order
+
+        Returns:
+            Rows with participant_id, payout_attempts, and tx_hash, to_wallet
+            and amount_ton of the prize transaction
+        """
+        result = await db.execute(
+            select(
+                Participant.id.label("participant_id"),
+                Participant.payout_attempts,
+                Transaction.tx_hash,
+                Transaction.to_wallet,
+                Transaction.amount_ton,
+            )
+            .join(Transaction, Transaction.tx_hash == Participant.prize_tx_hash)
+            .where(Participant.payout_batch_id == batch_id)
+            .order_by(Participant.id)
+        )
+        return list(result.all())
+
+    @staticmethod
+    async def release_prizes(db: AsyncSession, participant_ids: List[int], retry_at: datetime):
+        """Detach unpaid prizes from their batch so a later batch retries them"""
+        await db.execute(
+            update(Participant)
+            .where(Participant.id.in_(participant_ids))
+            .values(
+                payout_batch_id=None,
+                prize_sent=False,
+                prize_tx_hash=None,
+                payout_attempts=Participant.payout_attempts + 1,
+                payout_retry_at=retry_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+
+class LeaseCRUD:
+    """CRUD operations for SchedulerLease model"""
+
+    @staticmethod
+    async def acquire(
+        db: AsyncSession,
+        name: str,
+        holder: str,
+        now: datetime,
+        expires_at: datetime,
+    ) -> bool:
+        """
+        Take or renew a lease if it is free, expired or already ours
+
+        Returns:
+            True if the holder owns the lease until expires_at
+        """
+        # Create the lease already expired, so the UPDATE below can take it
+        await db.execute(
+            _upsert(db, SchedulerLease)
+            .values(name=name, holder=holder, expires_at=now)
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+        result = await db.execute(
+            update(SchedulerLease)
+            .where(SchedulerLease.name == name)
+            .where(or_(SchedulerLease.holder == holder, SchedulerLease.expires_at <= now))
+            .values(holder=holder, expires_at=expires_at)
+        )
+        return result.rowcount == 1
+
+    @staticmethod
+    async def release(db: AsyncSession, name: str, holder: str, now: datetime):
+        """Expire a lease we hold so another node can take it right away"""
+        await db.execute(
+            update(SchedulerLease)
+            .where(SchedulerLease.name == name, SchedulerLease.holder == holder)
+            .values(expires_at=now)
+        )
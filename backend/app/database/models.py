@@ -4,7 +4,7 @@ from datetime import datetime
 from typing import List
 import enum
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Enum, ForeignKey, Boolean, Text
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, Enum, ForeignKey, Boolean, Text, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship, DeclarativeBase
 
 
@@ -22,6 +22,7 @@ class RaffleType(str, enum.Enum):
 
 class RaffleStatus(str, enum.Enum):
     """Raffle statuses"""
+    PENDING = "pending"  # Provisioned next round, opens when the current one is drawn
     ACTIVE = "active"  # Collecting participants
     WAITING = "waiting"  # Timer running
     DRAWING = "drawing"  # Drawing in progress
@@ -42,6 +43,21 @@ class TransactionStatus(str, enum.Enum):
     FAILED = "failed"
 
 
+class PayoutBatchStatus(str, enum.Enum):
+    """Prize payout batch statuses"""
+    PENDING = "pending"  # Signed and stored, not yet accepted by the network
+    SENT = "sent"  # Accepted by the network
+    CONFIRMED = "confirmed"  # Processed on chain, per-prize results recorded
+    FAILED = "failed"  # Expired without being processed, prizes released for retry
+
+
+class JoinRequestStatus(str, enum.Enum):
+    """Asynchronous join request statuses"""
+    PENDING = "pending"  # Waiting for payment verification
+    ACCEPTED = "accepted"  # Participant created
+    REJECTED = "rejected"  # Verification or validation failed
+
+
 class User(Base):
     """User model"""
     __tablename__ = "users"
@@ -72,7 +88,7 @@ class Raffle(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     type = Column(Enum(RaffleType), nullable=False, index=True)
-    status = Column(Enum(RaffleStatus), default=RaffleStatus.ACTIVE, nullable=False, index=True)
+    status = Column(Enum(RaffleStatus), default=RaffleStatus.ACTIVE, nullable=False)
 
     # Parameters
     min_participants = Column(Integer, nullable=False)
@@ -80,25 +96,57 @@ class Raffle(Base):
     prize_pool_ton = Column(Float, nullable=False)
     commission_percent = Column(Float, default=10.0)
 
+    # Denormalized participant counter, maintained by RaffleCRUD.register_participant
+    participant_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     # Timestamps
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
     waiting_until = Column(DateTime, nullable=True)  # When drawing will start
     drawn_at = Column(DateTime, nullable=True)  # When drawing happened
+    draw_claimed_at = Column(DateTime, nullable=True)  # When a node claimed it for drawing
 
     # Result
     winner_id = Column(Integer, ForeignKey('users.id'), nullable=True)
     random_org_signature = Column(Text, nullable=True)  # Random.org signature
     random_org_url = Column(String(500), nullable=True)  # Verification URL
+    random_org_random = Column(Text, nullable=True)  # Signed random object (JSON), may cover several raffles
+    random_org_index = Column(Integer, nullable=True)  # This raffle's sequence in random_org_random
+    seed_commitment = Column(String(64), nullable=True)  # SHA-256 of server_seed, public from creation
+    server_seed = Column(String(64), nullable=True)  # Secret until the raffle is drawn
+    draw_proof = Column(Text, nullable=True)  # Commit-reveal proof (JSON, includes the revealed seed)
 
     # Relationships
-    participants = relationship("Participant", back_populates="raffle", cascade="all, delete-orphan")
+    participants = relationship(
+        "Participant", back_populates="raffle", cascade="all, delete-orphan",
+        order_by="Participant.id"  # Winner index refers to this order
+    )
     winner = relationship("User", back_populates="won_raffles", foreign_keys=[winner_id])
     transactions = relationship("Transaction", back_populates="raffle")
 
+    __table_args__ = (
+        # Active raffle lookups (status IN (...) AND type = ... ORDER BY created_at)
+        Index("ix_raffles_status_type_created_at", "status", "type", "created_at"),
+        # Draw readiness scan
+        Index(
+            "ix_raffles_waiting_until_waiting",
+            "waiting_until",
+            postgresql_where=text("status = 'WAITING'"),
+            sqlite_where=text("status = 'WAITING'"),
+        ),
+        # At most one provisioned next raffle per type
+        Index(
+            "uq_raffles_type_pending",
+            "type",
+            unique=True,
+            postgresql_where=text("status = 'PENDING'"),
+            sqlite_where=text("status = 'PENDING'"),
+        ),
+    )
+
     @property
     def current_participants(self) -> int:
         """Get current number of participants"""
-        return len(self.participants)
+        return self.participant_count
 
 
 class Participant(Base):
@@ -114,11 +162,24 @@ class Participant(Base):
     is_winner = Column(Boolean, default=False)
     prize_sent = Column(Boolean, default=False)
     prize_tx_hash = Column(String(255), nullable=True)
+    payout_batch_id = Column(Integer, ForeignKey('payout_batches.id'), nullable=True, index=True)
+    payout_attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    payout_retry_at = Column(DateTime, nullable=True)  # Backoff after a failed payout
 
     # Relationships
     raffle = relationship("Raffle", back_populates="participants")
     user = relationship("User", back_populates="participations", foreign_keys=[user_id])
 
+    __table_args__ = (
+        UniqueConstraint("raffle_id", "user_id", name="uq_participants_raffle_id_user_id"),
+        # User history keyset pagination
+        Index(
+            "ix_participants_user_id_joined_at_id",
+            "user_id", "joined_at", "id",
+            postgresql_include=["raffle_id"],
+        ),
+    )
+
 
 class Transaction(Base):
     """Transaction model"""
@@ -142,3 +203,76 @@ class Transaction(Base):
     # Relationships
     user = relationship("User", back_populates="transactions")
     raffle = relationship("Raffle", back_populates="transactions")
+
+
+class JoinRequest(Base):
+    """Join request awaiting background payment verification"""
+    __tablename__ = "join_requests"
+
+    id = Column(Integer, primary_key=True, index=True)
+    raffle_id = Column(Integer, ForeignKey('raffles.id'), nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
+    tx_hash = Column(String(255), unique=True, nullable=False)
+
+    status = Column(Enum(JoinRequestStatus), default=JoinRequestStatus.PENDING, nullable=False)
+    error = Column(Text, nullable=True)
+    participant_id = Column(Integer, ForeignKey('participants.id'), nullable=True)
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
+
+
+class WalletTransfer(Base):
+    """Incoming transfer to the raffle wallet, recorded by the TON indexer"""
+    __tablename__ = "wallet_transfers"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tx_hash = Column(String(255), unique=True, nullable=False, index=True)
+    lt = Column(BigInteger, nullable=False)
+
+    source = Column(String(255), nullable=True)
+    destination = Column(String(255), nullable=True)
+    amount_nano = Column(BigInteger, nullable=False)
+
+    utime = Column(DateTime, nullable=True)  # Block time of the transaction
+    indexed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class IndexerCursor(Base):
+    """Position of a blockchain indexer (last processed transaction)"""
+    __tablename__ = "indexer_cursors"
+
+    name = Column(String(100), primary_key=True)
+    lt = Column(BigInteger, nullable=False)
+    tx_hash = Column(String(255), nullable=False)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class SchedulerLease(Base):
+    """Time-limited lease electing the one node that runs a singleton job"""
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String(100), primary_key=True)
+    holder = Column(String(255), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+
+class PayoutBatch(Base):
+    """Multi-message prize transfer from the highload payout wallet"""
+    __tablename__ = "payout_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    query_id = Column(BigInteger, unique=True, nullable=False)  # Replay protection on the wallet
+    boc = Column(Text, nullable=False)  # Signed external message, base64
+    status = Column(Enum(PayoutBatchStatus), default=PayoutBatchStatus.PENDING, nullable=False, index=True)
+    message_hash = Column(String(255), nullable=True)
+    total_ton = Column(Float, nullable=False)
+    recipients = Column(Integer, nullable=False)
+
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime, nullable=True)  # Backoff after a failed send
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)  # Wallet rejects the message after this
+    sent_at = Column(DateTime, nullable=True)
@@ -1,11 +1,16 @@
 """Database session management"""
 
-from typing import AsyncGenerator
+import asyncio
+import time
+from pathlib import Path
+from typing import AsyncGenerator, Dict
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import exc
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import NullPool, AsyncAdaptedQueuePool
 
 from app.config import settings
-from app.database.models import Base
 
 
 # Create async engine - handle different database types
@@ -16,10 +21,65 @@ elif database_url.startswith("sqlite://"):
     # SQLite needs aiosqlite driver for async operations
     database_url = database_url.replace("sqlite://", "sqlite+aiosqlite://")
 
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that records checkout waiters and wait time"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waiters = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def connect(self):
+        self.waiters += 1
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.waiters -= 1
+            waited = time.perf_counter() - started
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+        self.checkouts += 1
+        return connection
+
+
+def _engine_options(url: str) -> dict:
+    """Build engine pool options from settings"""
+    if not settings.DB_POOL_ENABLED or url.startswith("sqlite"):
+        return {"poolclass": NullPool}
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+    if url.startswith("postgresql+asyncpg"):
+        # SQLAlchemy-level and asyncpg-level prepared statement caches
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+
+    return options
+
+
 engine = create_async_engine(
     database_url,
     echo=settings.ENVIRONMENT == "development",
-    poolclass=NullPool,
+    **_engine_options(database_url),
 )
 
 # Create async session factory
@@ -45,10 +105,46 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+def get_pool_stats() -> Dict:
+    """Get connection pool statistics"""
+    pool = engine.sync_engine.pool
+
+    if not isinstance(pool, InstrumentedQueuePool):
+        return {"pooled": False, "pool_class": type(pool).__name__}
+
+    attempts = pool.checkouts + pool.timeouts
+
+    return {
+        "pooled": True,
+        "pool_class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "waiters": pool.waiters,
+        "checkouts": pool.checkouts,
+        "timeouts": pool.timeouts,
+        "total_wait_seconds": round(pool.total_wait_seconds, 6),
+        "avg_wait_seconds": round(pool.total_wait_seconds / attempts, 6) if attempts else 0.0,
+        "max_wait_seconds": round(pool.max_wait_seconds, 6),
+    }
+
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+def _upgrade_to_head():
+    """Apply Alembic migrations up to head"""
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
+
+
 async def init_db():
-    """Initialize database (create tables)"""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    """Initialize database (apply migrations)"""
+    # Alembic's env.py drives its own event loop, so run it off the app loop
+    await asyncio.to_thread(_upgrade_to_head)
 
 
 async def close_db():
@@ -1,8 +1,10 @@
 """Main application entry point"""
 
 import asyncio
+import json
 from contextlib import asynccontextmanager
 
+from typing import Optional
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from aiogram import Bot, Dispatcher
@@ -10,10 +12,19 @@ from aiogram.enums import ParseMode
 from loguru import logger
 
 from app.config import settings
-from app.database.session import init_db, close_db
+from app.database.session import init_db, close_db, AsyncSessionLocal
+from app.database.crud import UserCRUD
 from app.api.routes import router as api_router
+from app.api.auth import verify_telegram_webapp_data
 from app.api.websocket import websocket_manager
 from app.services.scheduler_service import scheduler_service
+from app.services.leader_service import leader_election
+from app.services.join_service import join_service
+from app.services.ton_indexer import ton_indexer
+from app.services.payout_service import payout_service
+from app.services.task_queue import task_queue
+from app.services.raffle_tasks import register_raffle_tasks
+from app.services.http_client import http_client
 from app.bot.handlers import start
 
 
@@ -35,9 +46,31 @@ async def lifespan(app: FastAPI):
     await init_db()
     logger.info("Database initialized")
 
+    # Shared HTTP client for TON and Random.org
+    await http_client.start()
+
+    # Draw follow-up tasks (queued to workers, or inline without the queue).
+    # Among API replicas only the leader consumes; scale out with app.worker
+    register_raffle_tasks(bot)
+    await task_queue.start(active=lambda: leader_election.is_leader)
+
+    # WebSocket events published by other workers and replicas
+    await websocket_manager.start()
+
     # Start scheduler
     scheduler_service.start()
 
+    # Start TON wallet indexer (polls on the leader only)
+    if settings.TON_INDEXER_ENABLED:
+        ton_indexer.start()
+
+    # Start batched prize payouts (flushed on the leader only)
+    payout_service.start()
+
+    # Start background join verification
+    if settings.JOIN_ASYNC_VERIFICATION:
+        await join_service.start()
+
     # Start bot polling in background
     asyncio.create_task(dp.start_polling(bot))
     logger.info("Bot started")
@@ -47,6 +80,15 @@ async def lifespan(app: FastAPI):
     # Cleanup
     logger.info("Shutting down application...")
     scheduler_service.stop()
+    await leader_election.resign()
+    if settings.TON_INDEXER_ENABLED:
+        await ton_indexer.stop()
+    if settings.JOIN_ASYNC_VERIFICATION:
+        await join_service.stop()
+    await payout_service.stop()
+    await task_queue.stop()
+    await websocket_manager.stop()
+    await http_client.close()
     await close_db()
     await bot.session.close()
 
@@ -72,17 +114,46 @@ app.add_middleware(
 app.include_router(api_router)
 
 
+async def resolve_websocket_user(init_data: Optional[str]) -> Optional[int]:
+    """Resolve Telegram init data passed on the WebSocket URL to a user ID"""
+    if not init_data:
+        return None
+
+    try:
+        user_data = verify_telegram_webapp_data(init_data)
+    except ValueError as e:
+        logger.warning(f"WebSocket auth failed: {e}")
+        return None
+
+    async with AsyncSessionLocal() as db:
+        user = await UserCRUD.get_by_telegram_id(db, user_data['id'])
+        return user.id if user else None
+
+
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time updates"""
-    await websocket_manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, init_data: Optional[str] = None):
+    """
+    WebSocket endpoint for real-time updates
+
+    Events are only sent for subscribed topics:
+    {"action": "subscribe", "topics": ["raffles", "raffle:<id>", "type:<type>"]}
+    (and "unsubscribe" likewise). Pass Telegram init data as ?init_data=...
+    to also receive personal events (e.g. join results). Any other message
+    is answered with a pong.
+    """
+    user_id = await resolve_websocket_user(init_data)
+    await websocket_manager.connect(websocket, user_id=user_id)
 
     try:
         while True:
-            # Keep connection alive
             data = await websocket.receive_text()
-            # Echo back for ping/pong
-            await websocket.send_json({"type": "pong"})
+            try:
+                message = json.loads(data)
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                message = {"action": "ping"}
+            await websocket_manager.handle_message(websocket, message)
 
     except WebSocketDisconnect:
         websocket_manager.disconnect(websocket)
@@ -48,15 +48,32 @@ class RaffleResponse(RaffleBase):
     winner_id: Optional[int] = None
     random_org_signature: Optional[str] = None
     random_org_url: Optional[str] = None
+    seed_commitment: Optional[str] = None
 
     class Config:
         from_attributes = True
 
 
 class RaffleDetailResponse(RaffleResponse):
+    random_org_random: Optional[str] = None
+    random_org_index: Optional[int] = None
+    draw_proof: Optional[str] = None
     participants: List["ParticipantResponse"] = []
 
 
+class RaffleVerificationResponse(BaseModel):
+    raffle_id: int
+    method: Optional[str] = None  # "random_org" or "commit_reveal"
+    verified: bool
+    signature_valid: bool  # Random.org signature, or seed matching its commitment
+    range_valid: bool
+    winner_valid: bool
+    serial_number: Optional[int] = None
+    winner_index: Optional[int] = None
+    participants: int
+    error: Optional[str] = None
+
+
 # Participant schemas
 class ParticipantBase(BaseModel):
     raffle_id: int
@@ -79,6 +96,22 @@ class JoinRaffleRequest(BaseModel):
     tx_hash: str = Field(..., description="TON transaction hash")
 
 
+# Asynchronous join request
+class JoinRequestResponse(BaseModel):
+    id: int
+    raffle_id: int
+    user_id: int
+    tx_hash: str
+    status: str
+    error: Optional[str] = None
+    participant_id: Optional[int] = None
+    created_at: datetime
+    processed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 # Transaction schemas
 class TransactionResponse(BaseModel):
     id: int
@@ -106,6 +139,7 @@ class UserStatsResponse(BaseModel):
 class HistoryResponse(BaseModel):
     raffles: List[RaffleResponse]
     total: int
+    next_cursor: Optional[str] = None
 
 
 # Rebuild models with forward references
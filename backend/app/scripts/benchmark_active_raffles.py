@@ -0,0 +1,162 @@
+"""Benchmark GET /raffles/active read paths
+
+Compares the legacy path (ORM raffles with every participant eager-loaded,
+then a hand-built dict per raffle) against the column-only summary query.
+
+Runs against a throwaway database, in-memory SQLite by default:
+
+    python -m app.scripts.benchmark_active_raffles --participants 10000
+    python -m app.scripts.benchmark_active_raffles --database-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from sqlalchemy import event, select, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+from sqlalchemy.pool import StaticPool
+
+from app.database.models import Base, User, Raffle, Participant, RaffleType, RaffleStatus
+from app.database.crud import RaffleCRUD
+from app.schemas.pydantic import RaffleResponse
+
+
+async def seed(db: AsyncSession, num_participants: int):
+    """Create one active raffle per type and spread participants across them"""
+    now = datetime.utcnow()
+
+    await db.execute(insert(User), [
+        {"telegram_id": i, "created_at": now, "last_active": now}
+        for i in range(1, num_participants + 1)
+    ])
+
+    raffle_ids = []
+    for raffle_type in RaffleType:
+        raffle = Raffle(
+            type=raffle_type,
+            status=RaffleStatus.ACTIVE,
+            min_participants=num_participants,
+            entry_fee_ton=1.0,
+            prize_pool_ton=1.0,
+            created_at=now,
+        )
+        db.add(raffle)
+        await db.flush()
+        raffle_ids.append(raffle.id)
+
+    user_ids = (await db.execute(select(User.id))).scalars().all()
+    counts = {raffle_id: 0 for raffle_id in raffle_ids}
+    rows = []
+    for i, user_id in enumerate(user_ids):
+        raffle_id = raffle_ids[i % len(raffle_ids)]
+        counts[raffle_id] += 1
+        rows.append({"raffle_id": raffle_id, "user_id": user_id, "joined_at": now})
+    await db.execute(insert(Participant), rows)
+
+    for raffle_id, count in counts.items():
+        raffle = await db.get(Raffle, raffle_id)
+        raffle.participant_count = count
+
+    await db.commit()
+
+
+async def legacy_path(db: AsyncSession) -> List[RaffleResponse]:
+    """Pre-summary implementation of get_active_raffles"""
+    result = await db.execute(
+        select(Raffle)
+        .options(selectinload(Raffle.participants))
+        .where(Raffle.status.in_([RaffleStatus.ACTIVE, RaffleStatus.WAITING]))
+        .order_by(Raffle.created_at.desc())
+    )
+    response = []
+    for raffle in result.scalars().all():
+        response.append(RaffleResponse(
+            id=raffle.id,
+            type=raffle.type.value,
+            status=raffle.status.value,
+            min_participants=raffle.min_participants,
+            current_participants=len(raffle.participants),
+            entry_fee_ton=raffle.entry_fee_ton,
+            prize_pool_ton=raffle.prize_pool_ton,
+            commission_percent=raffle.commission_percent,
+            created_at=raffle.created_at,
+            waiting_until=raffle.waiting_until,
+            drawn_at=raffle.drawn_at,
+            winner_id=raffle.winner_id,
+            random_org_signature=raffle.random_org_signature,
+            random_org_url=raffle.random_org_url,
+        ))
+    return response
+
+
+async def summary_path(db: AsyncSession) -> List[RaffleResponse]:
+    """Current implementation of get_active_raffles"""
+    rows = await RaffleCRUD.get_active_summaries(db)
+    return [RaffleResponse.model_validate(row) for row in rows]
+
+
+async def measure(session_factory: async_sessionmaker, path: Callable, iterations: int, counter: Dict) -> Dict:
+    """Run a read path in fresh sessions and collect query count and latency"""
+    timings = []
+    queries = 0
+    response = []
+
+    for _ in range(iterations):
+        async with session_factory() as db:
+            counter["queries"] = 0
+            started = time.perf_counter()
+            response = await path(db)
+            timings.append((time.perf_counter() - started) * 1000)
+            queries = counter["queries"]
+
+    return {
+        "queries": queries,
+        "median_ms": statistics.median(timings),
+        "p95_ms": sorted(timings)[max(0, int(len(timings) * 0.95) - 1)],
+        "participants": sum(r.current_participants for r in response),
+    }
+
+
+async def main(database_url: str, num_participants: int, iterations: int):
+    options = {"poolclass": StaticPool} if database_url.endswith(":memory:") else {}
+    engine = create_async_engine(database_url, **options)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    counter = {"queries": 0}
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_queries(*args):
+        counter["queries"] += 1
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with session_factory() as db:
+        await seed(db, num_participants)
+
+    print(f"{num_participants} participants, {iterations} iterations")
+    for name, path in (("legacy", legacy_path), ("summary", summary_path)):
+        stats = await measure(session_factory, path, iterations, counter)
+        print(
+            f"{name:>8}: queries={stats['queries']} "
+            f"median={stats['median_ms']:.2f}ms p95={stats['p95_ms']:.2f}ms "
+            f"participants={stats['participants']}"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///:memory:")
+    parser.add_argument("--participants", type=int, default=10_000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.database_url, args.participants, args.iterations))
@@ -0,0 +1,92 @@
+"""Check that the hot raffle queries are served by their indexes
+
+Runs EXPLAIN for the scheduler, active-raffle and user history queries
+against the configured Postgres database and exits non-zero if an expected
+index is not used. Sequential scans are disabled for the session so the result does
+not depend on how much data the database currently holds.
+
+    python -m app.scripts.explain_raffle_queries
+"""
+
+import asyncio
+import sys
+from datetime import datetime
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+from app.database.session import AsyncSessionLocal, engine
+from app.database.models import Raffle, Participant, RaffleType, RaffleStatus
+
+
+CHECKS = [
+    (
+        "active raffle by type",
+        select(Raffle)
+        .where(Raffle.type == RaffleType.EXPRESS)
+        .where(Raffle.status.in_([RaffleStatus.ACTIVE, RaffleStatus.WAITING]))
+        .order_by(Raffle.created_at.desc()),
+        "ix_raffles_status_type_created_at",
+    ),
+    (
+        "raffles ready to draw",
+        select(Raffle)
+        .where(Raffle.status == RaffleStatus.WAITING)
+        .where(Raffle.waiting_until <= datetime.utcnow())
+        .order_by(Raffle.waiting_until),
+        "ix_raffles_waiting_until_waiting",
+    ),
+    (
+        "participant by raffle and user",
+        select(Participant)
+        .where(Participant.raffle_id == 1)
+        .where(Participant.user_id == 1),
+        "uq_participants_raffle_id_user_id",
+    ),
+    (
+        "user history page",
+        select(Raffle.id, Raffle.status, Participant.id, Participant.joined_at)
+        .join(Raffle, Raffle.id == Participant.raffle_id)
+        .where(Participant.user_id == 1)
+        .order_by(Participant.joined_at.desc(), Participant.id.desc())
+        .limit(20),
+        "ix_participants_user_id_joined_at_id",
+    ),
+]
+
+
+async def explain(db: AsyncSession, query) -> str:
+    """Get the Postgres plan of a query as text"""
+    sql = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    result = await db.execute(text(f"EXPLAIN {sql}"))
+    return "\n".join(row[0] for row in result.all())
+
+
+async def main() -> int:
+    if engine.dialect.name != "postgresql":
+        logger.error("EXPLAIN checks require a PostgreSQL DATABASE_URL")
+        return 1
+
+    failures = 0
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SET LOCAL enable_seqscan = off"))
+
+        for name, query, index_name in CHECKS:
+            plan = await explain(db, query)
+
+            if index_name in plan:
+                logger.info(f"OK   {name}: uses {index_name}")
+            else:
+                failures += 1
+                logger.error(f"FAIL {name}: expected {index_name}\n{plan}")
+
+        await db.rollback()
+
+    await engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,187 @@
+"""Local toncenter stand-in for development and testing
+
+Serves the subset of the toncenter v2 API used by TONService from an
+in-memory transaction list. Highload wallet payout messages sent through
+sendBocReturnHash are executed immediately: each transfer the wallet balance
+covers becomes an out message, the rest are skipped like on chain (send mode
+ignores errors). Point the backend at it with
+TON_CENTER_API_URL=http://localhost:8081 and add transfers with:
+
+    python -m app.scripts.toncenter_stub --port 8081
+    curl -X POST localhost:8081/_transfers \\
+        -d '{"source": "EQsender", "destination": "UQraffle", "value": 1000000000}'
+"""
+
+import argparse
+import base64
+import hashlib
+import time
+from typing import Dict, List, Tuple
+
+from aiohttp import web
+from tonsdk.boc import Cell, Slice
+from tonsdk.utils import Address
+
+
+def _key(address: str) -> str:
+    """Compare addresses by raw form; fall back to the string for fake ones"""
+    try:
+        return Address(address).to_string(False)
+    except Exception:
+        return address
+
+
+def _parse_highload_message(cell: Cell) -> Tuple[str, int, List[Tuple[str, int]]]:
+    """
+    Decode a highload wallet v2 external message
+
+    Returns:
+        (wallet address, query_id, [(destination, amount_nano), ...])
+    """
+    message = Slice(cell)
+    message.read_uint(2)  # ext_in_msg_info$10
+    message.read_msg_addr()  # src: addr_none
+    wallet = message.read_msg_addr()
+    message.read_coins()  # import_fee
+    if message.read_bit():
+        raise ValueError("state_init is not supported")
+    body = Slice(message.read_ref()) if message.read_bit() else message
+
+    body.skip_bits(512 + 32)  # signature, subwallet_id
+    query_id = body.read_uint(64)
+
+    orders = []
+    if body.read_bit():
+        # Forks of the HashmapE(16) have two refs, leaves one: the order message
+        stack = [body.read_ref()]
+        while stack:
+            node = stack.pop()
+            if len(node.refs) == 2:
+                stack.extend(reversed(node.refs))
+                continue
+            order = Slice(node.refs[0])
+            order.read_bits(4)  # int_msg_info$0, ihr_disabled, bounce, bounced
+            order.read_msg_addr()  # src: addr_none
+            destination = order.read_msg_addr()
+            orders.append((destination.to_string(True, True, True), order.read_coins()))
+
+    return wallet.to_string(True, True, True), query_id, orders
+
+
+class ToncenterStub:
+    """In-memory wallet transactions, newest first"""
+
+    def __init__(self):
+        self.transactions: List[Dict] = []
+        self.balances: Dict[str, int] = {}
+        self.sent_messages: Dict[str, str] = {}  # message hash -> BOC
+        self.next_lt = 1_000_000
+
+    def add_transfer(self, source: str, destination: str, value: int) -> Dict:
+        """Append an incoming transfer to destination"""
+        self.next_lt += 1_000
+        lt = self.next_lt
+        tx_hash = hashlib.sha256(f"{lt}:{source}:{destination}:{value}".encode()).hexdigest()
+        tx = {
+            "utime": int(time.time()),
+            "transaction_id": {"lt": str(lt), "hash": tx_hash},
+            "in_msg": {"source": source, "destination": destination, "value": str(value)},
+            "out_msgs": [],
+        }
+        self.transactions.insert(0, tx)
+        self.balances[_key(destination)] = self.balances.get(_key(destination), 0) + value
+        return tx
+
+    def send_boc(self, boc: str) -> str:
+        """Execute a highload wallet message once, like a wallet with replay protection"""
+        cell = Cell.one_from_boc(base64.b64decode(boc))
+        message_hash = base64.b64encode(cell.bytes_hash()).decode()
+        wallet, query_id, orders = _parse_highload_message(cell)
+
+        if message_hash in self.sent_messages:
+            raise ValueError("external message was not accepted: duplicate query_id")
+        if query_id >> 32 < time.time():
+            raise ValueError("external message was not accepted: query expired")
+        self.sent_messages[message_hash] = boc
+
+        out_msgs = []
+        for destination, value in orders:
+            if self.balances.get(_key(wallet), 0) < value:
+                continue
+            self.balances[_key(wallet)] -= value
+            self.balances[_key(destination)] = self.balances.get(_key(destination), 0) + value
+            out_msgs.append({"source": wallet, "destination": destination, "value": str(value)})
+
+        self.next_lt += 1_000
+        self.transactions.insert(0, {
+            "utime": int(time.time()),
+            "transaction_id": {"lt": str(self.next_lt), "hash": hashlib.sha256(message_hash.encode()).hexdigest()},
+            "in_msg": {"source": "", "destination": wallet, "value": "0", "hash": message_hash},
+            "out_msgs": out_msgs,
+        })
+        return message_hash
+
+    def get_transactions(self, address: str, limit: int, lt: int = None, to_lt: int = 0) -> List[Dict]:
+        """Mirror toncenter paging: start at lt (inclusive), stop above to_lt"""
+        result = []
+        for tx in self.transactions:
+            tx_lt = int(tx["transaction_id"]["lt"])
+            if _key(tx["in_msg"]["destination"]) != _key(address):
+                continue
+            if lt is not None and tx_lt > lt:
+                continue
+            if tx_lt <= to_lt:
+                break
+            result.append(tx)
+            if len(result) >= limit:
+                break
+        return result
+
+
+def create_app() -> web.Application:
+    stub = ToncenterStub()
+    app = web.Application()
+    app["stub"] = stub
+
+    async def get_transactions(request: web.Request):
+        query = request.query
+        lt = int(query["lt"]) if "lt" in query else None
+        transactions = stub.get_transactions(
+            query["address"],
+            limit=int(query.get("limit", 10)),
+            lt=lt,
+            to_lt=int(query.get("to_lt", 0)),
+        )
+        return web.json_response({"ok": True, "result": transactions})
+
+    async def get_address_balance(request: web.Request):
+        balance = stub.balances.get(_key(request.query["address"]), 0)
+        return web.json_response({"ok": True, "result": str(balance)})
+
+    async def send_boc_return_hash(request: web.Request):
+        body = await request.json()
+        try:
+            message_hash = stub.send_boc(body["boc"])
+        except ValueError as e:
+            return web.json_response({"ok": False, "error": str(e), "code": 500}, status=500)
+        return web.json_response({"ok": True, "result": {"@type": "ext.message.hash", "hash": message_hash}})
+
+    async def add_transfer(request: web.Request):
+        body = await request.json()
+        tx = stub.add_transfer(body["source"], body["destination"], int(body["value"]))
+        return web.json_response({"ok": True, "result": tx})
+
+    app.router.add_get("/getTransactions", get_transactions)
+    app.router.add_get("/getAddressBalance", get_address_balance)
+    app.router.add_post("/sendBocReturnHash", send_boc_return_hash)
+    app.router.add_post("/_transfers", add_transfer)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local toncenter stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    args = parser.parse_args()
+
+    web.run_app(create_app(), host=args.host, port=args.port)
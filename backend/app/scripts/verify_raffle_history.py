@@ -0,0 +1,87 @@
+"""Audit every completed raffle against its signed Random.org result or proof
+
+Verifies signatures offline with RANDOM_ORG_PUBLIC_KEY_PATH (no API calls)
+and commit-reveal seeds against their commitments, checks each raffle's
+range and winner, and exits non-zero if any raffle fails. Raffles drawn in
+the same Random.org batch share one signature check.
+
+    python -m app.scripts.verify_raffle_history
+    python -m app.scripts.verify_raffle_history --page-size 1000 --show-failures 20
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.database.session import AsyncSessionLocal, engine
+from app.database.models import Raffle, RaffleStatus
+from app.services.raffle_service import raffle_service
+
+
+async def main(page_size: int, show_failures: int) -> int:
+    totals = Counter()
+    failures = []
+    last_id = 0
+    started = time.perf_counter()
+
+    async with AsyncSessionLocal() as db:
+        while True:
+            result = await db.execute(
+                select(Raffle)
+                .options(selectinload(Raffle.participants))
+                .where(Raffle.status == RaffleStatus.COMPLETED, Raffle.id > last_id)
+                .order_by(Raffle.id)
+                .limit(page_size)
+            )
+            raffles = result.scalars().all()
+            if not raffles:
+                break
+
+            for raffle in raffles:
+                totals["raffles"] += 1
+                if not raffle.random_org_random and not raffle.draw_proof:
+                    # Drawn before signed results or proofs were stored
+                    totals["unsigned"] += 1
+                    continue
+
+                try:
+                    report = raffle_service.verify_raffle(raffle)
+                except ValueError as e:
+                    # Random.org public key is not configured
+                    print(e)
+                    await engine.dispose()
+                    return 2
+                if report["verified"]:
+                    totals["verified"] += 1
+                else:
+                    totals["failed"] += 1
+                    failures.append(report)
+
+            last_id = raffles[-1].id
+            # Drop loaded pages so memory stays flat over the whole history
+            db.expunge_all()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"{totals['raffles']} raffles in {elapsed:.2f}s: {totals['verified']} verified, "
+        f"{totals['failed']} failed, {totals['unsigned']} without signed data"
+    )
+    for report in failures[:show_failures]:
+        print(f"  raffle #{report['raffle_id']}: {report}")
+
+    await engine.dispose()
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--show-failures", type=int, default=10)
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(main(args.page_size, args.show_failures)))
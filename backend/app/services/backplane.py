@@ -0,0 +1,145 @@
+"""Pub/sub backplane carrying WebSocket events between processes"""
+
+import asyncio
+import json
+from typing import Awaitable, Callable, Dict, List, Optional
+from loguru import logger
+from redis import asyncio as aioredis
+
+from app.config import settings
+
+# Called with (topics, serialized message) for every event published by any process
+DeliveryHandler = Callable[[List[str], str], Awaitable[None]]
+
+
+class InMemoryBackplane:
+    """
+    Backplane within one process: events go straight to the subscribers
+
+    For a single worker, and for tests (several connection managers may
+    share one instance to stand in for several workers).
+    """
+
+    def __init__(self):
+        self.handlers: List[DeliveryHandler] = []
+        self.stats: Dict[str, int] = {"published": 0}
+
+    def subscribe(self, handler: DeliveryHandler):
+        """Register a handler for every published event"""
+        self.handlers.append(handler)
+
+    async def start(self):
+        """Nothing to connect to"""
+
+    async def stop(self):
+        """Nothing to disconnect from"""
+
+    async def publish(self, topics: List[str], text: str):
+        """Deliver an event to every subscriber"""
+        self.stats["published"] += 1
+        await self._dispatch(topics, text)
+
+    async def _dispatch(self, topics: List[str], text: str):
+        for handler in self.handlers:
+            try:
+                await handler(topics, text)
+            except Exception as e:
+                logger.error(f"WebSocket backplane handler failed: {e}")
+
+    def get_stats(self) -> Dict:
+        """Get backplane type and counters"""
+        return {"backend": "memory", **self.stats}
+
+
+class RedisBackplane(InMemoryBackplane):
+    """
+    Backplane over a Redis pub/sub channel, so every API worker and replica
+    delivers an event to its own sockets
+
+    A process receives its own events back through the channel. When Redis
+    is unreachable, events are delivered to this process's subscribers only.
+    """
+
+    def __init__(self, url: str, channel: str):
+        super().__init__()
+        self.url = url
+        self.channel = channel
+        self.redis: Optional[aioredis.Redis] = None
+        self._listener: Optional[asyncio.Task] = None
+        self.stats.update({"received": 0, "publish_failures": 0, "reconnects": 0})
+
+    async def _connect(self) -> aioredis.Redis:
+        if self.redis is None:
+            self.redis = aioredis.from_url(self.url, decode_responses=True)
+        return self.redis
+
+    async def start(self):
+        """Start listening on the channel"""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+            logger.info(f"WebSocket backplane listening on Redis channel {self.channel}")
+
+    async def stop(self):
+        """Stop listening and close the connection"""
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
+
+    async def publish(self, topics: List[str], text: str):
+        """Publish an event to every process"""
+        try:
+            redis = await self._connect()
+            await redis.publish(self.channel, json.dumps({"topics": topics, "message": text}))
+            self.stats["published"] += 1
+        except Exception as e:
+            self.stats["publish_failures"] += 1
+            logger.error(f"Failed to publish WebSocket event to Redis, delivering locally: {e}")
+            await self._dispatch(topics, text)
+
+    async def _listen(self):
+        """Listener task: hand events from the channel to the subscribers, reconnecting on errors"""
+        while True:
+            pubsub = None
+            try:
+                redis = await self._connect()
+                pubsub = redis.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message is None or message.get("type") != "message":
+                        continue
+                    event = json.loads(message["data"])
+                    self.stats["received"] += 1
+                    await self._dispatch(event["topics"], event["message"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["reconnects"] += 1
+                logger.error(f"WebSocket backplane subscription failed, reconnecting: {e}")
+                await asyncio.sleep(1)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.close()
+                    except Exception:
+                        pass
+
+    def get_stats(self) -> Dict:
+        """Get backplane type, counters and listener state"""
+        return {
+            **self.stats,
+            "backend": "redis",
+            "channel": self.channel,
+            "listening": self._listener is not None and not self._listener.done(),
+        }
+
+
+def create_backplane():
+    """Backplane selected by WS_BACKPLANE"""
+    if settings.WS_BACKPLANE == "redis":
+        return RedisBackplane(settings.REDIS_URL, settings.WS_BACKPLANE_CHANNEL)
+    return InMemoryBackplane()
@@ -0,0 +1,135 @@
+"""Commit-reveal randomness: local, network-free provably fair drawing"""
+
+import hashlib
+import hmac
+import secrets
+from typing import Dict, List, Optional, Tuple
+
+SCHEME = "hmac-drbg-sha256"
+
+
+class HmacDrbg:
+    """HMAC_DRBG with SHA-256 (NIST SP 800-90A), without reseeding"""
+
+    def __init__(self, seed_material: bytes):
+        self._key = b"\x00" * 32
+        self._value = b"\x01" * 32
+        self._update(seed_material)
+
+    def _hmac(self, data: bytes) -> bytes:
+        return hmac.new(self._key, data, hashlib.sha256).digest()
+
+    def _update(self, data: bytes = b""):
+        self._key = self._hmac(self._value + b"\x00" + data)
+        self._value = self._hmac(self._value)
+        if data:
+            self._key = self._hmac(self._value + b"\x01" + data)
+            self._value = self._hmac(self._value)
+
+    def generate(self, num_bytes: int) -> bytes:
+        """Generate the next num_bytes of output"""
+        output = b""
+        while len(output) < num_bytes:
+            self._value = self._hmac(self._value)
+            output += self._value
+        self._update()
+        return output[:num_bytes]
+
+    def randbelow(self, n: int) -> int:
+        """Uniform integer in [0, n) by rejection sampling (no modulo bias)"""
+        if n <= 0:
+            raise ValueError("Range must be positive")
+        limit = 2 ** 64 - (2 ** 64 % n)
+        while True:
+            value = int.from_bytes(self.generate(8), "big")
+            if value < limit:
+                return value % n
+
+
+class CommitRevealService:
+    """
+    Draws winners from a per-raffle secret seed committed at creation
+
+    The SHA-256 commitment of the seed is published when the raffle is
+    created; the seed is revealed in the proof once the raffle is drawn.
+    The winner is the first output of an HMAC-DRBG seeded with the seed and
+    the participants' entry transaction hashes, so anyone can recompute it.
+    """
+
+    @staticmethod
+    def new_seed() -> Tuple[str, str]:
+        """
+        Generate a secret seed for a new raffle
+
+        Returns:
+            (seed, commitment) as hex strings
+        """
+        seed = secrets.token_hex(32)
+        return seed, CommitRevealService.commitment(seed)
+
+    @staticmethod
+    def commitment(seed: str) -> str:
+        """SHA-256 commitment of a hex seed"""
+        return hashlib.sha256(bytes.fromhex(seed)).hexdigest()
+
+    @staticmethod
+    def _entries_hash(entries: List[str]) -> str:
+        return hashlib.sha256("\n".join(entries).encode()).hexdigest()
+
+    @staticmethod
+    def _winner_index(seed: str, entries_hash: str, num_participants: int) -> int:
+        drbg = HmacDrbg(bytes.fromhex(seed) + bytes.fromhex(entries_hash))
+        return drbg.randbelow(num_participants)
+
+    def pick_winner(self, seed: str, entries: List[str]) -> Dict:
+        """
+        Pick a winner from the committed seed
+
+        Args:
+            seed: Raffle's secret seed (hex)
+            entries: Participants' entry transaction hashes, in winner index order
+
+        Returns:
+            Dict with winner_index and proof (JSON-serializable)
+        """
+        entries_hash = self._entries_hash(entries)
+        winner_index = self._winner_index(seed, entries_hash, len(entries))
+        return {
+            "winner_index": winner_index,
+            "proof": {
+                "scheme": SCHEME,
+                "commitment": self.commitment(seed),
+                "seed": seed,
+                "entries_hash": entries_hash,
+                "participants": len(entries),
+                "winner_index": winner_index,
+            },
+        }
+
+    def verify_proof(self, proof: Dict, commitment: str, entries: List[str]) -> Tuple[bool, Optional[int]]:
+        """
+        Check a revealed proof against the published commitment
+
+        Args:
+            proof: Proof stored at draw time
+            commitment: Commitment published at raffle creation
+            entries: Participants' entry transaction hashes, in winner index order
+
+        Returns:
+            (seed matches commitment, recomputed winner index or None if the
+            proof does not cover these participants)
+        """
+        try:
+            seed = proof["seed"]
+            commitment_valid = proof["scheme"] == SCHEME and self.commitment(seed) == commitment
+        except (KeyError, ValueError):
+            return False, None
+
+        entries_hash = self._entries_hash(entries)
+        if not entries or proof.get("entries_hash") != entries_hash:
+            return commitment_valid, None
+        return commitment_valid, self._winner_index(seed, entries_hash, len(entries))
+
+
+# Global commit-reveal service instance
+commit_reveal_service = CommitRevealService()
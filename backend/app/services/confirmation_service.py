@@ -0,0 +1,283 @@
+"""Confirmation of pending entry payments and prize payouts"""
+
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+from app.config import settings
+from app.database.session import AsyncSessionLocal
+from app.database.models import PayoutBatch, PayoutBatchStatus, TransactionStatus, TransactionType
+from app.database.crud import PayoutCRUD, TransactionCRUD
+from app.services.ton_service import ton_service
+from app.services.payout_service import payout_service
+
+# Payments are made shortly before the join that records them
+ENTRY_LOOKBACK = timedelta(minutes=10)
+
+
+class ConfirmationService:
+    """
+    Settles pending transactions against the raffle wallet history
+
+    Entry payments are confirmed from the indexer table, or from pages of
+    wallet history when the indexer is off. Payout batches are matched to the
+    wallet transaction that processed their message: delivered prizes are
+    confirmed and undelivered ones released for another batch with backoff.
+    A batch that expired without being processed fails and releases all of
+    its prizes, but only once the scanned history covers its whole lifetime.
+    When TX_CONFIRM_MAX_PAGES pages do not reach back far enough, later runs
+    keep paging back from where the previous one stopped.
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, int] = {
+            "runs": 0,
+            "pages_fetched": 0,
+            "entries_confirmed": 0,
+            "entries_failed": 0,
+            "prizes_confirmed": 0,
+            "prizes_released": 0,
+            "batches_failed": 0,
+            "batches_unverified": 0,
+        }
+        # Older history still to scan: (lt, hash) to resume from, and the time
+        # the scan started (everything newer was covered by that run)
+        self._backlog: Optional[Tuple[int, str, datetime]] = None
+
+    async def confirm_pending(self):
+        """Confirm or fail everything pending in one pass"""
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=settings.TX_CONFIRM_TIMEOUT_SECONDS)
+        released = 0
+
+        async with AsyncSessionLocal() as db:
+            batches = await PayoutCRUD.get_unconfirmed_batches(db)
+            oldest_entry = None
+            if not settings.TON_INDEXER_ENABLED:
+                oldest_entry = await TransactionCRUD.get_oldest_pending_entry_time(db, since=stale_before)
+
+            # Scan back far enough to cover every pending batch and entry
+            scan_since = [batch.created_at for batch in batches]
+            if oldest_entry is not None:
+                scan_since.append(oldest_entry - ENTRY_LOOKBACK)
+
+            entry_hashes: Set[str] = set()
+            processed: Dict[str, Dict] = {}
+            # (oldest, newest) time ranges of wallet history seen in full
+            covered: List[Tuple[datetime, datetime]] = []
+            backlog = None
+            if scan_since:
+                since = min(scan_since)
+                entry_hashes, processed, oldest, resume = await self._scan_wallet(since)
+                covered.append((oldest, now))
+
+                if resume is not None:
+                    backlog = self._backlog
+                    if backlog is None:
+                        backlog = (*resume, now)
+                    else:
+                        # Continue paging back from where the last run stopped
+                        lt, tx_hash, started = backlog
+                        hashes, messages, oldest, resume = await self._scan_wallet(since, (lt, tx_hash))
+                        entry_hashes |= hashes
+                        processed.update(messages)
+                        covered.append((oldest, started))
+                        backlog = None if resume is None else (*resume, started)
+
+            entries = await TransactionCRUD.set_status_many(
+                db, list(entry_hashes), TransactionStatus.CONFIRMED,
+                confirmed_at=now, tx_type=TransactionType.ENTRY
+            )
+            if settings.TON_INDEXER_ENABLED:
+                entries += await TransactionCRUD.confirm_indexed_entries(db, confirmed_at=now)
+            failed_entries = await TransactionCRUD.fail_stale_entries(db, before=stale_before)
+
+            grace = timedelta(seconds=settings.PAYOUT_CONFIRM_GRACE_SECONDS)
+            for batch in batches:
+                message = processed.get(batch.message_hash)
+                if message is not None:
+                    released += await self._settle_batch(db, batch, message, now)
+                elif now >= batch.expires_at + grace:
+                    if any(
+                        oldest <= batch.created_at and batch.expires_at <= newest
+                        for oldest, newest in covered
+                    ):
+                        released += await self._fail_batch(db, batch, now)
+                    else:
+                        self.stats["batches_unverified"] += 1
+                        logger.warning(
+                            f"Payout batch #{batch.id} expired, but the wallet history since "
+                            f"{batch.created_at} is not scanned yet; keeping it until it is"
+                        )
+
+            await db.commit()
+            self._backlog = backlog
+
+        self.stats["runs"] += 1
+        self.stats["entries_confirmed"] += entries
+        self.stats["entries_failed"] += failed_entries
+
+        if entries or failed_entries:
+            logger.info(f"Entry payments: {entries} confirmed, {failed_entries} failed")
+        if failed_entries:
+            logger.warning(
+                f"{failed_entries} entry payments were not seen on chain within "
+                f"{settings.TX_CONFIRM_TIMEOUT_SECONDS}s"
+            )
+        if released:
+            payout_service.notify(released)
+
+    async def _scan_wallet(
+        self,
+        since: datetime,
+        start: Optional[Tuple[int, str]] = None
+    ) -> Tuple[Set[str], Dict[str, Dict], datetime, Optional[Tuple[int, str]]]:
+        """
+        Page through wallet history back to the given time, from start
+        (exclusive) or the newest transaction, for at most TX_CONFIRM_MAX_PAGES
+
+        Returns:
+            (incoming transfer hashes, processed external messages by hash,
+            time from which on every transaction was seen, (lt, hash) to
+            resume from if the pages ran out before reaching since, else None)
+        """
+        page_size = settings.TX_CONFIRM_PAGE_SIZE
+        entry_hashes: Set[str] = set()
+        processed: Dict[str, Dict] = {}
+        lt, tx_hash = start or (None, None)
+
+        for _ in range(settings.TX_CONFIRM_MAX_PAGES):
+            page = await ton_service.get_transactions(
+                settings.RAFFLE_WALLET_ADDRESS,
+                limit=page_size,
+                lt=lt,
+                tx_hash=tx_hash,
+                cache_ttl=settings.TON_CACHE_TTL_SECONDS
+            )
+            self.stats["pages_fetched"] += 1
+            full_page = len(page) >= page_size
+
+            # Continuation pages start with the transaction we continued from
+            if lt is not None and page and page[0]["transaction_id"]["hash"] == tx_hash:
+                page = page[1:]
+
+            for tx in page:
+                transfer = ton_service.parse_incoming_transfer(tx)
+                if transfer is not None:
+                    entry_hashes.add(transfer["tx_hash"])
+                message = ton_service.parse_processed_message(tx)
+                if message is not None:
+                    processed[message["message_hash"]] = message
+
+            if not full_page or not page:
+                # Reached the start of the wallet history
+                return entry_hashes, processed, datetime.min, None
+            oldest = page[-1]
+            oldest_time = datetime.utcfromtimestamp(oldest.get("utime") or 0)
+            if oldest_time < since:
+                return entry_hashes, processed, oldest_time, None
+            lt, tx_hash = int(oldest["transaction_id"]["lt"]), oldest["transaction_id"]["hash"]
+
+        return entry_hashes, processed, oldest_time, (lt, tx_hash)
+
+    async def _settle_batch(
+        self,
+        db: AsyncSession,
+        batch: PayoutBatch,
+        message: Dict,
+        now: datetime
+    ) -> int:
+        """
+        Confirm delivered prizes of a processed batch and release the rest
+
+        Returns:
+            Number of prizes released for retry
+        """
+        if batch.status == PayoutBatchStatus.PENDING:
+            # Accepted before a restart (or a failed response) could record it
+            await PayoutCRUD.mark_sent(db, batch)
+
+        # Undelivered messages (e.g. insufficient balance) are skipped by the
+        # wallet, so match out messages by recipient and amount, not position
+        out_msgs = Counter(message["out_msgs"])
+        delivered: List[Row] = []
+        undelivered: List[Row] = []
+        for prize in await PayoutCRUD.get_batch_prizes(db, batch.id):
+            key = (
+                ton_service.normalize_address(prize.to_wallet),
+                round(prize.amount_ton * 1_000_000_000),
+            )
+            if out_msgs[key] > 0:
+                out_msgs[key] -= 1
+                delivered.append(prize)
+            else:
+                undelivered.append(prize)
+
+        await TransactionCRUD.set_status_many(
+            db, [prize.tx_hash for prize in delivered], TransactionStatus.CONFIRMED,
+            confirmed_at=message["utime"] or now, tx_type=TransactionType.PRIZE
+        )
+        await self._release(db, undelivered, now)
+        batch.status = PayoutBatchStatus.CONFIRMED
+
+        self.stats["prizes_confirmed"] += len(delivered)
+        logger.info(
+            f"Payout batch #{batch.id} confirmed: {len(delivered)} delivered, "
+            f"{len(undelivered)} released for retry"
+        )
+        return len(undelivered)
+
+    async def _fail_batch(self, db: AsyncSession, batch: PayoutBatch, now: datetime) -> int:
+        """
+        Fail an expired batch that was never processed and release its prizes
+
+        Returns:
+            Number of prizes released for retry
+        """
+        prizes = await PayoutCRUD.get_batch_prizes(db, batch.id)
+        await self._release(db, prizes, now)
+        batch.status = PayoutBatchStatus.FAILED
+
+        self.stats["batches_failed"] += 1
+        logger.warning(
+            f"Payout batch #{batch.id} expired without being processed, "
+            f"{len(prizes)} prizes released for retry"
+        )
+        return len(prizes)
+
+    async def _release(self, db: AsyncSession, prizes: List[Row], now: datetime):
+        """Fail prize transactions and schedule their prizes for another batch"""
+        if not prizes:
+            return
+
+        await TransactionCRUD.set_status_many(
+            db, [prize.tx_hash for prize in prizes], TransactionStatus.FAILED,
+            tx_type=TransactionType.PRIZE
+        )
+
+        # Back off by how often each prize has failed already
+        by_attempts: Dict[int, List[int]] = {}
+        for prize in prizes:
+            by_attempts.setdefault(prize.payout_attempts + 1, []).append(prize.participant_id)
+        for attempts, participant_ids in by_attempts.items():
+            await PayoutCRUD.release_prizes(
+                db, participant_ids, retry_at=now + payout_service.retry_delay(attempts)
+            )
+            if attempts >= settings.PAYOUT_MAX_ATTEMPTS:
+                logger.error(
+                    f"Prizes of participants {participant_ids} failed {attempts} times, "
+                    f"giving up on automatic payout"
+                )
+
+        self.stats["prizes_released"] += len(prizes)
+
+    def get_stats(self) -> Dict:
+        """Get confirmation counters"""
+        return dict(self.stats)
+
+
+# Global confirmation service instance
+confirmation_service = ConfirmationService()
@@ -0,0 +1,87 @@
+"""Shared HTTP client for external APIs"""
+
+from typing import Dict, Optional
+import aiohttp
+from loguru import logger
+
+from app.config import settings
+
+
+class HTTPClient:
+    """
+    Lifespan-managed aiohttp session with keep-alive connection pooling,
+    per-host limits and DNS caching, shared by all external API services
+    """
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.stats: Dict[str, int] = {
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0,
+        }
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        """Count requests, new vs reused connections and DNS cache usage"""
+        trace_config = aiohttp.TraceConfig()
+
+        def counter(key: str):
+            async def increment(session, context, params):
+                self.stats[key] += 1
+            return increment
+
+        trace_config.on_request_start.append(counter("requests"))
+        trace_config.on_connection_create_end.append(counter("connections_created"))
+        trace_config.on_connection_reuseconn.append(counter("connections_reused"))
+        trace_config.on_dns_cache_hit.append(counter("dns_cache_hits"))
+        trace_config.on_dns_cache_miss.append(counter("dns_cache_misses"))
+        return trace_config
+
+    async def start(self):
+        """Create the shared session"""
+        if self._session is not None and not self._session.closed:
+            return
+
+        connector = aiohttp.TCPConnector(
+            limit=settings.HTTP_POOL_LIMIT,
+            limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=settings.HTTP_DNS_CACHE_SECONDS,
+            use_dns_cache=True,
+            keepalive_timeout=settings.HTTP_KEEPALIVE_SECONDS,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(
+                total=settings.HTTP_TIMEOUT_SECONDS,
+                connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+            ),
+            trace_configs=[self._trace_config()],
+        )
+        logger.info("HTTP client started")
+
+    async def close(self):
+        """Close the shared session and its connections"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            logger.info("HTTP client closed")
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Get the shared session, starting it if needed (e.g. in scripts)"""
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
+
+    def get_stats(self) -> Dict:
+        """Get request and connection reuse statistics"""
+        connections = self.stats["connections_created"] + self.stats["connections_reused"]
+        return {
+            **self.stats,
+            "reuse_ratio": round(self.stats["connections_reused"] / connections, 4) if connections else 0.0,
+        }
+
+
+# Global HTTP client instance
+http_client = HTTPClient()
@@ -0,0 +1,182 @@
+"""Asynchronous join pipeline: background payment verification"""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+from app.config import settings
+from app.database.session import AsyncSessionLocal
+from app.database.models import JoinRequest, JoinRequestStatus, RaffleStatus
+from app.database.crud import JoinRequestCRUD, ParticipantCRUD, RaffleCRUD
+from app.schemas.pydantic import JoinRequestResponse
+from app.services.raffle_service import raffle_service
+from app.services.ton_service import VerificationPendingError
+from app.api.websocket import websocket_manager
+
+
+class JoinQueueFullError(Exception):
+    """Raised when the verification queue cannot take more requests"""
+
+
+class JoinService:
+    """
+    Records pending joins and verifies them in a bounded worker pool
+
+    A payment that cannot be verified yet (not indexed, or toncenter
+    unavailable) is retried with exponential backoff until
+    JOIN_VERIFY_DEADLINE_SECONDS after submission; only then, or on a
+    real validation failure, is the request rejected.
+    """
+
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue] = None
+        self.workers: List[asyncio.Task] = []
+        self.retries: Set[asyncio.Task] = set()
+        self.attempts: Dict[int, int] = {}
+
+    async def start(self):
+        """Start verification workers and re-enqueue requests left pending"""
+        self.queue = asyncio.Queue(maxsize=settings.JOIN_VERIFY_QUEUE_SIZE)
+        self.workers = [
+            asyncio.create_task(self._worker(i))
+            for i in range(settings.JOIN_VERIFY_WORKERS)
+        ]
+
+        async with AsyncSessionLocal() as db:
+            pending = await JoinRequestCRUD.get_pending_ids(db)
+        for request_id in pending:
+            await self.queue.put(request_id)
+
+        logger.info(
+            f"Join verification started: {len(self.workers)} workers, "
+            f"{len(pending)} pending requests recovered"
+        )
+
+    async def stop(self):
+        """Stop verification workers (pending requests are recovered on next start)"""
+        tasks = self.workers + list(self.retries)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.workers = []
+        self.retries.clear()
+        self.attempts.clear()
+        logger.info("Join verification stopped")
+
+    async def submit(self, db: AsyncSession, raffle_id: int, user_id: int, tx_hash: str) -> JoinRequest:
+        """
+        Record a pending join and queue it for verification
+
+        A rejected request may be resubmitted with the same transaction.
+
+        Raises:
+            ValueError: If the raffle does not accept participants or the
+                transaction was already submitted
+            JoinQueueFullError: If the verification queue is full
+        """
+        if self.queue is None or self.queue.full():
+            raise JoinQueueFullError("Join queue is full, retry later")
+
+        raffle = await RaffleCRUD.get_by_id(db, raffle_id)
+        if not raffle:
+            raise ValueError("Raffle not found")
+
+        if raffle.status not in [RaffleStatus.ACTIVE, RaffleStatus.WAITING]:
+            raise ValueError("Raffle is not accepting participants")
+
+        join_request = await JoinRequestCRUD.create(
+            db, raffle_id=raffle_id, user_id=user_id, tx_hash=tx_hash
+        )
+        if join_request is None:
+            raise ValueError("Transaction already used")
+
+        await db.commit()
+        await self.queue.put(join_request.id)
+
+        logger.info(f"Queued join request #{join_request.id} for raffle #{raffle_id}")
+        return join_request
+
+    async def _worker(self, worker_id: int):
+        """Process queued join requests until cancelled"""
+        while True:
+            request_id = await self.queue.get()
+            try:
+                await self.process(request_id)
+            except Exception as e:
+                logger.error(f"Join worker {worker_id} failed on request #{request_id}: {e}")
+            finally:
+                self.queue.task_done()
+
+    def _retry_later(self, request_id: int):
+        """Re-enqueue a request after an exponentially growing delay"""
+        attempt = self.attempts.get(request_id, 0)
+        self.attempts[request_id] = attempt + 1
+        delay = min(
+            settings.JOIN_VERIFY_RETRY_BASE_SECONDS * 2 ** attempt,
+            settings.JOIN_VERIFY_RETRY_MAX_SECONDS
+        )
+        task = asyncio.create_task(self._requeue(request_id, delay))
+        self.retries.add(task)
+        task.add_done_callback(self.retries.discard)
+        return delay
+
+    async def _requeue(self, request_id: int, delay: float):
+        await asyncio.sleep(delay)
+        await self.queue.put(request_id)
+
+    async def process(self, request_id: int):
+        """Verify one join request and push the result to the user"""
+        async with AsyncSessionLocal() as db:
+            join_request = await JoinRequestCRUD.get_by_id(db, request_id)
+            if not join_request or join_request.status != JoinRequestStatus.PENDING:
+                return
+
+            raffle_id = join_request.raffle_id
+            user_id = join_request.user_id
+            tx_hash = join_request.tx_hash
+            deadline = join_request.created_at + timedelta(seconds=settings.JOIN_VERIFY_DEADLINE_SECONDS)
+
+            try:
+                # A previous run may have joined but stopped before recording the result
+                participant = await ParticipantCRUD.get_by_transaction_hash(db, tx_hash)
+                if not participant or participant.user_id != user_id:
+                    participant = await raffle_service.join_raffle(
+                        db, raffle_id=raffle_id, user_id=user_id, tx_hash=tx_hash
+                    )
+                processed = await JoinRequestCRUD.mark_processed(
+                    db, request_id, JoinRequestStatus.ACCEPTED, participant_id=participant.id
+                )
+            except VerificationPendingError as e:
+                await db.rollback()
+                if datetime.utcnow() < deadline:
+                    delay = self._retry_later(request_id)
+                    logger.info(f"Join request #{request_id} not verifiable yet ({e}), retrying in {delay:.1f}s")
+                    return
+                processed = await JoinRequestCRUD.mark_processed(
+                    db, request_id, JoinRequestStatus.REJECTED, error=str(e)
+                )
+            except ValueError as e:
+                await db.rollback()
+                processed = await JoinRequestCRUD.mark_processed(
+                    db, request_id, JoinRequestStatus.REJECTED, error=str(e)
+                )
+            await db.commit()
+            await db.refresh(join_request)
+        self.attempts.pop(request_id, None)
+
+        if not processed:
+            # Another worker recorded (and announced) the outcome first
+            logger.info(f"Join request #{request_id} already processed as {join_request.status.value}")
+            return
+
+        logger.info(f"Join request #{request_id} {join_request.status.value}")
+        await websocket_manager.send_join_result(
+            user_id,
+            JoinRequestResponse.model_validate(join_request).model_dump(mode="json")
+        )
+
+
+# Global join service instance
+join_service = JoinService()
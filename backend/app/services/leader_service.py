@@ -0,0 +1,84 @@
+"""Leader election for singleton scheduler jobs across replicas"""
+
+import os
+import secrets
+import socket
+from datetime import datetime, timedelta
+from typing import Dict
+from loguru import logger
+
+from app.config import settings
+from app.database.session import AsyncSessionLocal
+from app.database.crud import LeaseCRUD
+
+
+class LeaderElection:
+    """
+    Elects one node to run singleton jobs via a lease row in the database
+
+    Every node renews periodically; the holder keeps the lease while it
+    renews within LEADER_LEASE_SECONDS, and any node takes over once it
+    expires. A node that cannot reach the database steps down.
+    """
+
+    def __init__(self, name: str = "scheduler"):
+        self.name = name
+        self.node_id = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+        self.is_leader = False
+        self.stats: Dict[str, int] = {
+            "elections_won": 0,
+            "leadership_lost": 0,
+        }
+
+    async def renew(self) -> bool:
+        """
+        Take or renew the lease
+
+        Returns:
+            True if this node is the leader
+        """
+        now = datetime.utcnow()
+        try:
+            async with AsyncSessionLocal() as db:
+                leader = await LeaseCRUD.acquire(
+                    db,
+                    self.name,
+                    self.node_id,
+                    now=now,
+                    expires_at=now + timedelta(seconds=settings.LEADER_LEASE_SECONDS),
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to renew {self.name} lease: {e}")
+            leader = False
+
+        if leader and not self.is_leader:
+            self.stats["elections_won"] += 1
+            logger.info(f"Node {self.node_id} is now the {self.name} leader")
+        elif self.is_leader and not leader:
+            self.stats["leadership_lost"] += 1
+            logger.warning(f"Node {self.node_id} lost the {self.name} lease")
+
+        self.is_leader = leader
+        return leader
+
+    async def resign(self):
+        """Give up the lease on shutdown so another node takes over immediately"""
+        if not self.is_leader:
+            return
+
+        self.is_leader = False
+        try:
+            async with AsyncSessionLocal() as db:
+                await LeaseCRUD.release(db, self.name, self.node_id, now=datetime.utcnow())
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to release {self.name} lease: {e}")
+
+    def get_stats(self) -> Dict:
+        """Get leadership state"""
+        return {"node_id": self.node_id, "is_leader": self.is_leader, **self.stats}
+
+
+# Global leader election instance
+leader_election = LeaderElection()
@@ -0,0 +1,223 @@
+"""Prize payouts: pending prizes flushed as batched wallet transfers"""
+
+import asyncio
+import secrets
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from loguru import logger
+from tonsdk.utils import Address
+
+from app.config import settings
+from app.database.session import AsyncSessionLocal
+from app.database.models import PayoutBatch
+from app.database.crud import PayoutCRUD
+from app.services.ton_service import ton_service
+from app.services.leader_service import leader_election
+
+
+class PayoutService:
+    """
+    Pays unpaid prizes in multi-message transfers from the highload wallet
+
+    A batch is flushed once PAYOUT_BATCH_SIZE prizes are queued, or every
+    PAYOUT_FLUSH_SECONDS otherwise. Each batch is signed and stored before it
+    is sent, so a batch interrupted by a restart is resent as the same
+    message, which the wallet will not process twice. Failed sends are
+    retried with backoff until the message expires; the confirmation worker
+    then settles the batch from the chain and releases unpaid prizes.
+
+    Only the elected leader flushes, so replicas never batch the same prizes.
+    """
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._queued = 0
+        self.stats: Dict[str, int] = {
+            "batches_sent": 0,
+            "prizes_sent": 0,
+            "send_failures": 0,
+        }
+
+    def start(self):
+        """Start the flush loop, unless the payout wallet does not match RAFFLE_WALLET_ADDRESS"""
+        try:
+            ton_service.check_payout_wallet()
+        except ValueError as e:
+            logger.error(f"Payouts disabled: {e}")
+            return
+
+        self.task = asyncio.create_task(self._run())
+        logger.info("Payout service started")
+
+    async def stop(self):
+        """Stop the flush loop (unsent batches are resent on next start)"""
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        logger.info("Payout service stopped")
+
+    @staticmethod
+    def retry_delay(attempts: int) -> timedelta:
+        """Exponential backoff after the given number of failed attempts"""
+        seconds = settings.PAYOUT_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+        return timedelta(seconds=min(seconds, settings.PAYOUT_RETRY_MAX_SECONDS))
+
+    def notify(self, prizes: int = 1):
+        """Report new unpaid prizes; flushes early once a full batch is queued"""
+        self._queued += prizes
+        if self._queued >= settings.PAYOUT_BATCH_SIZE:
+            self._wakeup.set()
+
+    async def _run(self):
+        """Flush on the leader until cancelled, starting with batches left from a previous run"""
+        while True:
+            try:
+                if leader_election.is_leader:
+                    await self.flush()
+            except Exception as e:
+                logger.error(f"Payout flush failed: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.PAYOUT_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def flush(self) -> int:
+        """
+        Send unsent batches, then batch and send all unpaid prizes
+
+        Returns:
+            Number of prizes sent
+        """
+        async with self._lock:
+            self._queued = 0
+            sent = 0
+
+            async with AsyncSessionLocal() as db:
+                unsent = [
+                    batch.id for batch in await PayoutCRUD.get_unsent_batches(db, datetime.utcnow())
+                ]
+            for batch_id in unsent:
+                sent += await self._send(batch_id)
+
+            while True:
+                batch_id, size = await self._create_batch()
+                if batch_id is None:
+                    return sent
+                sent += await self._send(batch_id)
+                if size < settings.PAYOUT_BATCH_SIZE:
+                    return sent
+
+    async def _create_batch(self) -> Tuple[Optional[int], int]:
+        """
+        Sign and store a batch for the oldest unpaid prizes
+
+        Returns:
+            (batch ID or None if nothing was batched, number of prizes looked at)
+        """
+        async with AsyncSessionLocal() as db:
+            prizes = await PayoutCRUD.get_unbatched_prizes(
+                db,
+                limit=settings.PAYOUT_BATCH_SIZE,
+                now=datetime.utcnow(),
+                max_attempts=settings.PAYOUT_MAX_ATTEMPTS,
+            )
+
+            valid = []
+            for prize in prizes:
+                try:
+                    Address(prize.ton_wallet)
+                except Exception:
+                    logger.error(
+                        f"Skipping prize of raffle #{prize.raffle_id}: "
+                        f"invalid wallet {prize.ton_wallet!r} of user {prize.user_id}"
+                    )
+                    continue
+                valid.append(prize)
+
+            if not valid:
+                return None, len(prizes)
+
+            # The expiry time in the high 32 bits makes the wallet drop the
+            # message once it is too old to be sent
+            expires_at = int(time.time()) + settings.PAYOUT_MESSAGE_TTL_SECONDS
+            query_id = (expires_at << 32) | secrets.randbits(32)
+
+            boc, message_hash = ton_service.build_payout_message(
+                [
+                    (
+                        prize.ton_wallet,
+                        round(prize.prize_pool_ton * 1_000_000_000),
+                        f"Raffle #{prize.raffle_id} prize",
+                    )
+                    for prize in valid
+                ],
+                query_id
+            )
+            batch = await PayoutCRUD.create_batch(
+                db,
+                query_id=query_id,
+                boc=boc,
+                message_hash=message_hash,
+                expires_at=datetime.utcfromtimestamp(expires_at),
+                prizes=valid,
+                from_wallet=settings.RAFFLE_WALLET_ADDRESS,
+            )
+            await db.commit()
+
+            logger.info(
+                f"Payout batch #{batch.id}: {batch.recipients} prizes, {batch.total_ton} TON"
+            )
+            return batch.id, len(prizes)
+
+    async def _send(self, batch_id: int) -> int:
+        """
+        Broadcast a stored batch and record the per-prize hashes
+
+        Returns:
+            Number of prizes sent
+        """
+        async with AsyncSessionLocal() as db:
+            batch = await db.get(PayoutBatch, batch_id)
+            batch.attempts += 1
+
+            try:
+                message_hash = await ton_service.send_boc(batch.boc)
+            except Exception as e:
+                self.stats["send_failures"] += 1
+                retry_at = datetime.utcnow() + self.retry_delay(batch.attempts)
+                await PayoutCRUD.mark_attempt_failed(db, batch, str(e), next_attempt_at=retry_at)
+                await db.commit()
+                logger.error(
+                    f"Failed to send payout batch #{batch_id} "
+                    f"(attempt {batch.attempts}, retry at {retry_at}): {e}"
+                )
+                return 0
+
+            if message_hash != batch.message_hash:
+                logger.warning(
+                    f"Payout batch #{batch_id}: toncenter returned hash {message_hash}, "
+                    f"expected {batch.message_hash}"
+                )
+            prizes = await PayoutCRUD.mark_sent(db, batch)
+            await db.commit()
+
+        self.stats["batches_sent"] += 1
+        self.stats["prizes_sent"] += prizes
+        logger.info(
+            f"Sent payout batch #{batch_id}: {prizes} prizes, hash {batch.message_hash}"
+        )
+        return prizes
+
+    def get_stats(self) -> Dict:
+        """Get batch and prize counters, and whether payouts are running"""
+        return {**self.stats, "queued": self._queued, "running": self.task is not None}
+
+
+# Global payout service instance
+payout_service = PayoutService()
@@ -1,20 +1,28 @@
 """Raffle business logic service"""
 
+import json
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
-from app.database.models import Raffle, RaffleType, RaffleStatus, Participant
+from app.database.models import Raffle, RaffleType, RaffleStatus, Participant, User, TransactionType
 from app.database.crud import RaffleCRUD, UserCRUD, ParticipantCRUD, TransactionCRUD
 from app.services.ton_service import ton_service
 from app.services.random_service import random_service
+from app.services.commit_reveal_service import commit_reveal_service
+from app.services.task_queue import task_queue
+from app.api.websocket import websocket_manager
 from app.config import settings
 
 
 class RaffleService:
     """Service for raffle operations"""
 
+    # Called with (raffle_id, waiting_until) when a join starts a raffle's
+    # timer; set by the scheduler to arm the draw
+    on_timer_started: Optional[Callable[[int, datetime], None]] = None
+
     @staticmethod
     def get_raffle_config(raffle_type: RaffleType) -> dict:
         """Get configuration for raffle type"""
@@ -38,28 +46,74 @@ class RaffleService:
         return configs[raffle_type]
 
     @staticmethod
-    async def create_raffle(db: AsyncSession, raffle_type: RaffleType) -> Raffle:
-        """Create a new raffle"""
+    def _new_raffle_params(raffle_type: RaffleType) -> dict:
+        """Parameters of a new raffle of the type"""
         config = RaffleService.get_raffle_config(raffle_type)
 
         # Calculate prize pool (entry_fee * min_participants * (1 - commission))
         total_pool = config["entry_fee"] * config["min_participants"]
         prize_pool = total_pool * (1 - settings.COMMISSION_PERCENT / 100)
 
-        raffle = await RaffleCRUD.create(
-            db,
-            raffle_type=raffle_type,
-            min_participants=config["min_participants"],
-            entry_fee_ton=config["entry_fee"],
-            prize_pool_ton=prize_pool,
-            commission_percent=settings.COMMISSION_PERCENT,
-        )
+        # Committed up front so either randomness backend can draw the raffle
+        server_seed, seed_commitment = commit_reveal_service.new_seed()
+
+        return {
+            "raffle_type": raffle_type,
+            "min_participants": config["min_participants"],
+            "entry_fee_ton": config["entry_fee"],
+            "prize_pool_ton": prize_pool,
+            "commission_percent": settings.COMMISSION_PERCENT,
+            "server_seed": server_seed,
+            "seed_commitment": seed_commitment,
+        }
+
+    @staticmethod
+    async def create_raffle(db: AsyncSession, raffle_type: RaffleType) -> Raffle:
+        """Create a new raffle"""
+        raffle = await RaffleCRUD.create(db, **RaffleService._new_raffle_params(raffle_type))
 
         await db.commit()
 
         logger.info(f"Created {raffle_type.value} raffle #{raffle.id}")
         return raffle
 
+    @staticmethod
+    async def provision_next_raffle(db: AsyncSession, raffle_type: RaffleType) -> Optional[Raffle]:
+        """
+        Create the next raffle of the type ahead of time (PENDING)
+
+        It opens in the same transaction that claims the current raffle for
+        drawing, so a raffle of the type is always accepting participants.
+
+        Returns:
+            The new raffle, or None if one is already provisioned
+        """
+        raffle = await RaffleCRUD.create_pending(db, **RaffleService._new_raffle_params(raffle_type))
+        await db.commit()
+
+        if raffle is not None:
+            logger.info(f"Provisioned next {raffle_type.value} raffle #{raffle.id}")
+        return raffle
+
+    @staticmethod
+    async def open_next_raffle(db: AsyncSession, raffle_type: RaffleType):
+        """
+        Make sure a raffle of the type is accepting participants
+
+        Normally a no-op, as the provisioned raffle opened when the previous
+        one was claimed for drawing; otherwise opens the provisioned raffle
+        or creates one.
+        """
+        if await RaffleCRUD.has_open_raffle(db, raffle_type):
+            return
+
+        if await RaffleCRUD.promote_pending(db, [raffle_type]):
+            await db.commit()
+            logger.info(f"Opened provisioned {raffle_type.value} raffle")
+            return
+
+        await RaffleService.create_raffle(db, raffle_type)
+
     @staticmethod
     async def join_raffle(
         db: AsyncSession,
@@ -82,7 +136,7 @@ class RaffleService:
         Raises:
             ValueError: If validation fails
         """
-        # Get raffle
+        # Get raffle (the user is already in the session from auth)
         raffle = await RaffleCRUD.get_by_id(db, raffle_id)
         if not raffle:
             raise ValueError("Raffle not found")
@@ -90,26 +144,20 @@ class RaffleService:
         if raffle.status not in [RaffleStatus.ACTIVE, RaffleStatus.WAITING]:
             raise ValueError("Raffle is not accepting participants")
 
-        # Check if user already joined
-        existing = await ParticipantCRUD.get_by_raffle_and_user(db, raffle_id, user_id)
-        if existing:
-            raise ValueError("Already joined this raffle")
-
-        # Check if transaction already used
-        existing_tx = await TransactionCRUD.get_by_hash(db, tx_hash)
-        if existing_tx:
-            raise ValueError("Transaction already used")
-
-        # Verify transaction
-        user = await UserCRUD.get_by_id(db, user_id)
+        # Verify transaction before taking any row locks. Verification may wait
+        # for the payment to be indexed, so end the read transaction first:
+        # the wait must not hold a pooled connection
+        user = await db.get(User, user_id)
+        await db.commit()
         tx_details = await ton_service.verify_transaction(
             tx_hash=tx_hash,
             expected_amount=raffle.entry_fee_ton,
             sender_wallet=user.ton_wallet
         )
 
-        # Create transaction record
-        await TransactionCRUD.create(
+        # Duplicate joins and reused transactions are rejected by unique
+        # constraints (ON CONFLICT DO NOTHING) rather than pre-checks
+        transaction = await TransactionCRUD.create_if_absent(
             db,
             user_id=user_id,
             raffle_id=raffle_id,
@@ -117,81 +165,135 @@ class RaffleService:
             from_wallet=tx_details["from"],
             to_wallet=tx_details["to"],
             amount_ton=tx_details["amount"],
-            tx_type="entry"
+            tx_type=TransactionType.ENTRY
         )
+        if transaction is None:
+            await db.rollback()
+            raise ValueError("Transaction already used")
 
-        # Create participant
         participant = await ParticipantCRUD.create(
             db,
             raffle_id=raffle_id,
             user_id=user_id,
             transaction_hash=tx_hash
         )
+        if participant is None:
+            await db.rollback()
+            raise ValueError("Already joined this raffle")
 
-        # Update user stats
-        user.total_participations += 1
-        user.total_spent_ton += raffle.entry_fee_ton
+        # Count the participant and start the timer if the minimum is reached
+        config = RaffleService.get_raffle_config(raffle.type)
+        waiting_until = datetime.utcnow() + timedelta(minutes=config["timer_minutes"])
+        accepted = await RaffleCRUD.register_participant(db, raffle, waiting_until=waiting_until)
+        if not accepted:
+            await db.rollback()
+            raise ValueError("Raffle is not accepting participants")
+
+        await UserCRUD.add_participation(db, user_id, raffle.entry_fee_ton)
 
         await db.commit()
 
-        # Check if minimum participants reached
-        await RaffleService.check_raffle_ready(db, raffle)
+        await websocket_manager.broadcast_raffle_update(raffle.id, raffle.type.value, {
+            "current_participants": raffle.participant_count,
+            "status": raffle.status.value,
+        })
+
+        # The raffle may have changed during verification; this join started
+        # the timer if its draw time was the one set
+        if raffle.status == RaffleStatus.WAITING and raffle.waiting_until == waiting_until:
+            logger.info(
+                f"Raffle #{raffle.id} reached minimum participants. "
+                f"Drawing at {raffle.waiting_until}"
+            )
+            if RaffleService.on_timer_started is not None:
+                RaffleService.on_timer_started(raffle.id, raffle.waiting_until)
+            await websocket_manager.broadcast_raffle_started(
+                raffle.id, raffle.type.value, raffle.waiting_until.isoformat()
+            )
+
+            # The next round is ready before this one is drawn
+            await task_queue.enqueue("provision_raffle", {"raffle_type": raffle.type.value})
 
         logger.info(f"User {user_id} joined raffle #{raffle_id}")
         return participant
 
     @staticmethod
-    async def check_raffle_ready(db: AsyncSession, raffle: Raffle):
-        """Check if raffle has minimum participants and start timer"""
-        if raffle.status != RaffleStatus.ACTIVE:
-            return
+    async def start_draws(db: AsyncSession, raffle_ids: List[int], claimed_at: datetime) -> List[Raffle]:
+        """
+        Claim raffles whose timer expired for drawing (WAITING -> DRAWING)
 
-        if raffle.current_participants >= raffle.min_participants:
-            # Start timer
-            config = RaffleService.get_raffle_config(raffle.type)
-            raffle.status = RaffleStatus.WAITING
-            raffle.waiting_until = datetime.utcnow() + timedelta(
-                minutes=config["timer_minutes"]
-            )
+        The claim is atomic, so with several nodes each raffle is claimed by
+        exactly one of them. Raffles that are not waiting, whose timer has
+        not expired or that another node claims are left out.
 
-            await db.commit()
+        Args:
+            db: Database session
+            raffle_ids: Raffles to claim
+            claimed_at: Claim time, identifying this claim when the draw is
+                completed or released
 
-            logger.info(
-                f"Raffle #{raffle.id} reached minimum participants. "
-                f"Drawing at {raffle.waiting_until}"
-            )
+        Returns:
+            Claimed raffles with participants loaded
+        """
+        claimed = await RaffleCRUD.claim_draws(db, raffle_ids, claimed_at)
 
-    @staticmethod
-    async def draw_raffle(db: AsyncSession, raffle_id: int):
-        """Execute raffle drawing"""
-        raffle = await RaffleCRUD.get_by_id(db, raffle_id)
-        if not raffle:
-            raise ValueError("Raffle not found")
+        # Open the next round in the same transaction, so joins never find
+        # the type without an open raffle
+        promoted = await RaffleCRUD.promote_pending(db, list({row.type for row in claimed}))
+        await db.commit()
 
-        if raffle.status != RaffleStatus.WAITING:
-            raise ValueError("Raffle is not ready for drawing")
+        for raffle_id, raffle_type in promoted:
+            logger.info(f"Opened next {raffle_type.value} raffle #{raffle_id}")
 
-        if datetime.utcnow() < raffle.waiting_until:
-            raise ValueError("Timer not expired yet")
+        claimed_ids = [row.id for row in claimed]
+        if len(claimed_ids) < len(raffle_ids):
+            skipped = sorted(set(raffle_ids) - set(claimed_ids))
+            logger.info(f"Raffles {skipped} are not ready or drawn elsewhere, skipping")
 
-        # Update status
-        raffle.status = RaffleStatus.DRAWING
-        await db.commit()
+        return [await RaffleCRUD.get_by_id_with_participants(db, raffle_id) for raffle_id in claimed_ids]
 
+    @staticmethod
+    async def complete_draw(
+        db: AsyncSession,
+        raffle_id: int,
+        claimed_at: datetime,
+        random_result: dict
+    ) -> Raffle:
+        """
+        Record the winner picked for a claimed raffle
+
+        Args:
+            db: Database session
+            raffle_id: Raffle claimed with start_draws
+            claimed_at: Claim time passed to start_draws
+            random_result: Result from random_service.pick_winners or
+                commit_reveal_service.pick_winner
+
+        Returns:
+            Completed raffle
+
+        Raises:
+            ValueError: If the raffle is no longer held by this claim (the
+                result is discarded)
+        """
         try:
-            # Pick winner using Random.org
-            num_participants = len(raffle.participants)
-            random_result = await random_service.pick_winner(num_participants)
+            # Reloaded, as a failed draw in the same session expires loaded state
+            raffle = await RaffleCRUD.get_by_id_with_participants(db, raffle_id)
 
             winner_index = random_result["winner_index"]
             winner_participant = raffle.participants[winner_index]
 
-            # Update raffle
-            raffle.winner_id = winner_participant.user_id
-            raffle.random_org_signature = random_result["signature"]
-            raffle.random_org_url = random_result["verification_url"]
-            raffle.drawn_at = datetime.utcnow()
-            raffle.status = RaffleStatus.COMPLETED
+            # Update raffle, unless the claim was released and taken over meanwhile
+            result = {"winner_id": winner_participant.user_id, "drawn_at": datetime.utcnow()}
+            if "proof" in random_result:
+                result["draw_proof"] = json.dumps(random_result["proof"])
+            else:
+                result["random_org_signature"] = random_result["signature"]
+                result["random_org_url"] = random_result["verification_url"]
+                result["random_org_random"] = json.dumps(random_result["random"])
+                result["random_org_index"] = random_result["sequence_index"]
+            if not await RaffleCRUD.finish_draw(db, raffle, claimed_at, **result):
+                raise ValueError("Draw claim was released, discarding the result")
 
             # Update participant
             winner_participant.is_winner = True
@@ -203,66 +305,197 @@ class RaffleService:
 
             await db.commit()
 
-            logger.info(
-                f"Raffle #{raffle_id} drawn. Winner: user {winner.id} "
-                f"(index {winner_index})"
-            )
+        except Exception as e:
+            await RaffleService.abort_draw(db, raffle_id, claimed_at, e)
+            raise
+
+        logger.info(
+            f"Raffle #{raffle_id} drawn. Winner: user {winner.id} "
+            f"(index {winner_index})"
+        )
 
-            # Send prize (async task)
-            if winner.ton_wallet:
-                await RaffleService.send_prize(db, raffle, winner_participant)
+        await websocket_manager.broadcast_raffle_completed(raffle.id, raffle.type.value, raffle.winner_id)
 
-            # Create new raffle of same type
-            await RaffleService.create_raffle(db, raffle.type)
+        # Payout, winner notification and the next-raffle fallback run on task workers
+        await task_queue.enqueue("raffle_completed", {"raffle_id": raffle_id, "raffle_type": raffle.type.value})
+        await task_queue.enqueue("notify_winner", {"raffle_id": raffle_id})
 
-        except Exception as e:
-            raffle.status = RaffleStatus.WAITING
-            await db.commit()
-            logger.error(f"Failed to draw raffle #{raffle_id}: {e}")
-            raise
+        return raffle
 
     @staticmethod
-    async def send_prize(
-        db: AsyncSession,
-        raffle: Raffle,
-        winner_participant: Participant
-    ):
-        """Send prize to winner"""
-        try:
-            winner = await UserCRUD.get_by_id(db, winner_participant.user_id)
+    async def abort_draw(db: AsyncSession, raffle_id: int, claimed_at: datetime, error: Exception):
+        """Return a raffle still held by the claim to WAITING so the next check retries it"""
+        await db.rollback()
+        await RaffleCRUD.release_draws(db, [raffle_id], claimed_at)
+        await db.commit()
+        logger.error(f"Failed to draw raffle #{raffle_id}: {error}")
 
-            if not winner.ton_wallet:
-                logger.error(f"Winner {winner.id} has no wallet connected")
-                return
+    @staticmethod
+    def _entries(raffle: Raffle) -> List[str]:
+        """Participants' entry transaction hashes, in winner index order"""
+        return [p.transaction_hash or "" for p in raffle.participants]
 
-            # Send prize
-            tx_hash = await ton_service.send_prize(
-                recipient_wallet=winner.ton_wallet,
-                amount_ton=raffle.prize_pool_ton
-            )
+    @staticmethod
+    def local_draw(raffle: Raffle) -> Optional[dict]:
+        """
+        Pick the winner of a claimed raffle from its committed seed
 
-            # Update participant
-            winner_participant.prize_sent = True
-            winner_participant.prize_tx_hash = tx_hash
-
-            # Create transaction record
-            await TransactionCRUD.create(
-                db,
-                user_id=winner.id,
-                raffle_id=raffle.id,
-                tx_hash=tx_hash,
-                from_wallet=settings.RAFFLE_WALLET_ADDRESS,
-                to_wallet=winner.ton_wallet,
-                amount_ton=raffle.prize_pool_ton,
-                tx_type="prize"
-            )
+        Returns:
+            Commit-reveal result, or None if the raffle is drawn by Random.org
+            (configured backend, or a raffle created without a seed)
+        """
+        if settings.RANDOMNESS_BACKEND != "commit_reveal" or not raffle.server_seed:
+            return None
+        return commit_reveal_service.pick_winner(raffle.server_seed, RaffleService._entries(raffle))
 
-            await db.commit()
+    @staticmethod
+    async def draw_raffles(db: AsyncSession, raffle_ids: List[int], claimed_at: datetime) -> Dict[int, int]:
+        """
+        Draw several raffles with one batched Random.org request
+
+        Raffles with a committed seed are drawn locally instead when the
+        commit-reveal backend is configured. Raffles that cannot be claimed
+        or recorded are skipped (and retried by the next check); the others
+        are still drawn.
+
+        Args:
+            db: Database session
+            raffle_ids: Raffles to draw
+            claimed_at: Claim time; only raffles still held by this claim
+                are completed or released
 
-            logger.info(f"Sent {raffle.prize_pool_ton} TON to winner {winner.id}")
+        Returns:
+            Winner user ID by raffle ID, for drawn raffles
+
+        Raises:
+            ValueError: If the Random.org request fails and no raffle was
+                drawn locally (its raffles are returned to WAITING)
+        """
+        local_results = {}
+        participant_counts = {}
+        for raffle in await RaffleService.start_draws(db, raffle_ids, claimed_at):
+            local_result = RaffleService.local_draw(raffle)
+            if local_result is not None:
+                local_results[raffle.id] = local_result
+            else:
+                participant_counts[raffle.id] = len(raffle.participants)
+
+        winners = {}
+        for raffle_id, random_result in local_results.items():
+            try:
+                raffle = await RaffleService.complete_draw(db, raffle_id, claimed_at, random_result)
+            except Exception:
+                continue
+            winners[raffle_id] = raffle.winner_id
+
+        if not participant_counts:
+            return winners
 
+        try:
+            random_results = await random_service.pick_winners(list(participant_counts.values()))
         except Exception as e:
-            logger.error(f"Failed to send prize: {e}")
+            for raffle_id in participant_counts:
+                await RaffleService.abort_draw(db, raffle_id, claimed_at, e)
+            if not winners:
+                raise
+            return winners
+
+        for raffle_id, random_result in zip(participant_counts, random_results):
+            try:
+                raffle = await RaffleService.complete_draw(db, raffle_id, claimed_at, random_result)
+            except Exception:
+                continue
+            winners[raffle_id] = raffle.winner_id
+        return winners
+
+    @staticmethod
+    def verify_raffle(raffle: Raffle) -> dict:
+        """
+        Check a completed raffle against its signed Random.org result or
+        its commit-reveal proof
+
+        Verifies the signature offline (or the revealed seed against its
+        commitment), that the draw covered exactly the raffle's participants,
+        and that the drawn index is the winner. The raffle must have
+        participants loaded.
+
+        Returns:
+            Dict matching RaffleVerificationResponse
+
+        Raises:
+            ValueError: If the Random.org public key is not configured
+        """
+        report = {
+            "raffle_id": raffle.id,
+            "method": None,
+            "verified": False,
+            "signature_valid": False,
+            "range_valid": False,
+            "winner_valid": False,
+            "serial_number": None,
+            "winner_index": None,
+            "participants": len(raffle.participants),
+            "error": None,
+        }
+
+        if raffle.status != RaffleStatus.COMPLETED:
+            report["error"] = "Raffle is not completed"
+            return report
+        if raffle.draw_proof:
+            return RaffleService._verify_commit_reveal(raffle, report)
+        if not raffle.random_org_random or not raffle.random_org_signature:
+            report["error"] = "No signed random data stored for this raffle"
+            return report
+
+        report["method"] = "random_org"
+        random = json.loads(raffle.random_org_random)
+        index = raffle.random_org_index or 0
+        report["serial_number"] = random.get("serialNumber")
+        report["signature_valid"] = random_service.verify_signature(random, raffle.random_org_signature)
+
+        try:
+            # Single requests carry scalars, batched ones one entry per raffle
+            low, high = random["min"], random["max"]
+            if isinstance(high, list):
+                low, high = low[index], high[index]
+            winner_index = random["data"][index]
+            if isinstance(winner_index, list):
+                winner_index = winner_index[0]
+        except (KeyError, IndexError, TypeError):
+            report["error"] = "Malformed random data"
+            return report
+
+        report["winner_index"] = winner_index
+        report["range_valid"] = low == 0 and high == len(raffle.participants) - 1
+        report["winner_valid"] = (
+            0 <= winner_index < len(raffle.participants)
+            and raffle.participants[winner_index].user_id == raffle.winner_id
+        )
+        report["verified"] = report["signature_valid"] and report["range_valid"] and report["winner_valid"]
+        return report
+
+    @staticmethod
+    def _verify_commit_reveal(raffle: Raffle, report: dict) -> dict:
+        """Fill a verification report from a raffle's commit-reveal proof"""
+        report["method"] = "commit_reveal"
+        proof = json.loads(raffle.draw_proof)
+
+        commitment_valid, winner_index = commit_reveal_service.verify_proof(
+            proof, raffle.seed_commitment, RaffleService._entries(raffle)
+        )
+        report["signature_valid"] = commitment_valid
+        report["range_valid"] = winner_index is not None
+        if winner_index is None:
+            report["error"] = "Proof does not cover this raffle's participants"
+            return report
+
+        report["winner_index"] = winner_index
+        report["winner_valid"] = (
+            proof.get("winner_index") == winner_index
+            and raffle.participants[winner_index].user_id == raffle.winner_id
+        )
+        report["verified"] = report["signature_valid"] and report["range_valid"] and report["winner_valid"]
+        return report
 
 
 # Global raffle service instance
@@ -0,0 +1,43 @@
+"""Task handlers for raffle round follow-up work"""
+
+from typing import Dict
+from aiogram import Bot
+
+from app.database.session import AsyncSessionLocal
+from app.database.models import RaffleType
+from app.database.crud import RaffleCRUD, UserCRUD
+from app.services.raffle_service import raffle_service
+from app.services.payout_service import payout_service
+from app.services.task_queue import task_queue
+from app.bot.handlers.notifications import notify_winner
+
+
+async def provision_raffle(payload: Dict):
+    """Create the next raffle of the type ahead of the current one's draw"""
+    async with AsyncSessionLocal() as db:
+        await raffle_service.provision_next_raffle(db, RaffleType(payload["raffle_type"]))
+
+
+async def raffle_completed(payload: Dict):
+    """Queue the prize for payout and make sure the next raffle of the type is open"""
+    # Prize is paid in the next payout batch
+    payout_service.notify()
+
+    # Usually opened already when this raffle was claimed; idempotent on retries
+    async with AsyncSessionLocal() as db:
+        await raffle_service.open_next_raffle(db, RaffleType(payload["raffle_type"]))
+
+
+def register_raffle_tasks(bot: Bot):
+    """Register the raffle round task handlers"""
+
+    async def send_winner_notification(payload: Dict):
+        """Tell the winner about their prize in Telegram"""
+        async with AsyncSessionLocal() as db:
+            raffle = await RaffleCRUD.get_by_id(db, payload["raffle_id"])
+            winner = await UserCRUD.get_by_id(db, raffle.winner_id)
+        await notify_winner(bot, winner.telegram_id, raffle.prize_pool_ton, raffle.type.value)
+
+    task_queue.register("provision_raffle", provision_raffle)
+    task_queue.register("raffle_completed", raffle_completed)
+    task_queue.register("notify_winner", send_winner_notification)
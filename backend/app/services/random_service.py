@@ -1,20 +1,46 @@
 """Random.org API service for provably fair drawing"""
 
-import asyncio
-from typing import Dict
-import aiohttp
+import base64
+import binascii
+import hashlib
+import json
+from typing import Dict, List, Optional
+from cryptography import x509
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
 from loguru import logger
 
 from app.config import settings
+from app.services.http_client import HTTPClient, http_client
+from app.utils.cache import TTLCache
+from app.utils.resilience import CircuitBreaker
+
+# Verification results never change; the TTL only bounds memory together with max_entries
+VERIFIED_CACHE_TTL_SECONDS = 24 * 3600
 
 
 class RandomOrgService:
     """Service for generating provably random numbers via Random.org"""
 
-    def __init__(self):
+    def __init__(self, http: HTTPClient):
+        self.http = http
         self.api_url = "https://api.random.org/json-rpc/4/invoke"
         self.api_key = settings.RANDOM_ORG_API_KEY
 
+        # Draws fail fast while Random.org is down and resume once a probe succeeds
+        self.breaker = CircuitBreaker(
+            "random_org",
+            failure_threshold=settings.RANDOM_ORG_BREAKER_FAILURES,
+            reset_timeout=settings.RANDOM_ORG_BREAKER_RESET_SECONDS,
+        )
+        self.stats: Dict[str, int] = {"requests": 0}
+
+        # Public key is read once; signature checks are local and cached
+        self._public_key: Optional[RSAPublicKey] = None
+        self._verified = TTLCache(max_entries=4096)
+
     async def pick_winner(self, num_participants: int) -> Dict:
         """
         Pick a random winner using Random.org API
@@ -28,79 +54,171 @@ class RandomOrgService:
         Raises:
             ValueError: If API call fails
         """
+        results = await self.pick_winners([num_participants])
+        return results[0]
+
+    async def pick_winners(self, participant_counts: List[int]) -> List[Dict]:
+        """
+        Pick winners for several raffles with one signed Random.org request
+
+        Each raffle gets its own sequence of one integer in [0, count - 1].
+        All results share the signed random object, signature and serial
+        number; sequence_index tells which sequence belongs to which raffle.
+        The request is sent once and never hedged: every signed response has
+        its own serial number, and a draw must have exactly one.
+
+        Args:
+            participant_counts: Number of participants per raffle
+
+        Returns:
+            Per raffle, in the same order: dict with winner_index, signature,
+            verification_url, serial_number, random (signed object) and
+            sequence_index
+
+        Raises:
+            ValueError: If API call fails
+        """
+        if not participant_counts:
+            return []
+
         try:
-            async with aiohttp.ClientSession() as session:
-                # Prepare request
-                request_data = {
-                    "jsonrpc": "2.0",
-                    "method": "generateSignedIntegers",
-                    "params": {
-                        "apiKey": self.api_key,
-                        "n": 1,  # Generate 1 number
-                        "min": 0,  # Start from 0
-                        "max": num_participants - 1,  # End at num_participants - 1
-                        "replacement": True
-                    },
-                    "id": 1
+            n = len(participant_counts)
+            request_data = {
+                "jsonrpc": "2.0",
+                "method": "generateSignedIntegerSequences",
+                "params": {
+                    "apiKey": self.api_key,
+                    "n": n,  # One sequence per raffle
+                    "length": [1] * n,
+                    "min": [0] * n,
+                    "max": [count - 1 for count in participant_counts],
+                    "replacement": True
+                },
+                "id": 1
+            }
+
+            result = await self._invoke(request_data)
+
+            random_data = result.get("random", {})
+            sequences = random_data.get("data", [])
+            if len(sequences) != n:
+                raise ValueError(f"Expected {n} sequences, got {len(sequences)}")
+
+            # Get signature and verification URL
+            signature = result.get("signature")
+            serial_number = random_data.get("serialNumber", result.get("serialNumber"))
+
+            # Construct verification URL
+            verification_url = (
+                f"https://api.random.org/signatures/form?format=serial&serial={serial_number}"
+                if serial_number else None
+            )
+
+            logger.info(
+                f"Random.org picked {n} winners: serial={serial_number}, "
+                f"requests left={result.get('requestsLeft')}"
+            )
+
+            return [
+                {
+                    "winner_index": sequence[0],
+                    "signature": signature,
+                    "verification_url": verification_url,
+                    "serial_number": serial_number,
+                    "random": random_data,
+                    "sequence_index": index
                 }
+                for index, sequence in enumerate(sequences)
+            ]
+
+        except Exception as e:
+            logger.error(f"Random.org API failed: {e}")
+            raise ValueError(f"Failed to generate random number: {str(e)}")
 
-                async with session.post(self.api_url, json=request_data) as response:
-                    if response.status != 200:
-                        raise ValueError(f"Random.org API returned status {response.status}")
+    async def _invoke(self, request_data: Dict) -> Dict:
+        """
+        Send one JSON-RPC request through the circuit breaker
 
-                    data = await response.json()
+        Returns:
+            The "result" field of the response
 
-                    if "error" in data:
-                        error_msg = data["error"].get("message", "Unknown error")
-                        raise ValueError(f"Random.org API error: {error_msg}")
+        Raises:
+            CircuitOpenError: If the circuit is open
+            ValueError: If the request fails or the API returns an error
+        """
+        session = await self.http.get_session()
 
-                    if "result" not in data:
-                        raise ValueError("Invalid response from Random.org")
+        async with self.breaker:
+            self.stats["requests"] += 1
+            async with session.post(self.api_url, json=request_data) as response:
+                if response.status != 200:
+                    raise ValueError(f"Random.org API returned status {response.status}")
 
-                    result = data["result"]
-                    random_data = result.get("random", {})
-                    winner_index = random_data.get("data", [0])[0]
+                data = await response.json()
 
-                    # Get signature and verification URL
-                    signature = result.get("signature")
-                    serial_number = result.get("serialNumber")
+                if "error" in data:
+                    error_msg = data["error"].get("message", "Unknown error")
+                    raise ValueError(f"Random.org API error: {error_msg}")
 
-                    # Construct verification URL
-                    verification_url = (
-                        f"https://api.random.org/signatures/form?format=serial&serial={serial_number}"
-                        if serial_number else None
-                    )
+                if "result" not in data:
+                    raise ValueError("Invalid response from Random.org")
 
-                    logger.info(
-                        f"Random.org picked winner: index={winner_index}, "
-                        f"serial={serial_number}"
-                    )
+                return data["result"]
 
-                    return {
-                        "winner_index": winner_index,
-                        "signature": signature,
-                        "verification_url": verification_url,
-                        "serial_number": serial_number
-                    }
+    def _get_public_key(self) -> RSAPublicKey:
+        """Load Random.org's public key once from RANDOM_ORG_PUBLIC_KEY_PATH"""
+        if self._public_key is None:
+            if not settings.RANDOM_ORG_PUBLIC_KEY_PATH:
+                raise ValueError("Random.org public key is not configured")
 
-        except Exception as e:
-            logger.error(f"Random.org API failed: {e}")
-            raise ValueError(f"Failed to generate random number: {str(e)}")
+            with open(settings.RANDOM_ORG_PUBLIC_KEY_PATH, "rb") as f:
+                pem = f.read()
+            if b"BEGIN CERTIFICATE" in pem:
+                self._public_key = x509.load_pem_x509_certificate(pem).public_key()
+            else:
+                self._public_key = serialization.load_pem_public_key(pem)
+        return self._public_key
 
-    async def verify_signature(self, signature: str) -> bool:
+    def verify_signature(self, random: Dict, signature: str) -> bool:
         """
-        Verify Random.org signature
+        Verify a Random.org signature locally, without calling the API
+
+        The signature is RSA (PKCS#1 v1.5, SHA-512) over the JSON-encoded
+        random object. Results are cached by message digest, so raffles drawn
+        in the same batch verify their shared signature once.
 
         Args:
-            signature: Signature to verify
+            random: Signed random object, as returned by the API
+            signature: Base64 signature
 
         Returns:
             True if signature is valid
+
+        Raises:
+            ValueError: If the public key is not configured
         """
-        # Random.org signatures can be verified on their website
-        # For now, we trust the signature if it exists
-        return bool(signature)
+        message = json.dumps(random, separators=(",", ":")).encode()
+        key = (hashlib.sha256(message).digest(), signature)
+
+        found, valid = self._verified.get(key)
+        if found:
+            return valid
+
+        try:
+            self._get_public_key().verify(
+                base64.b64decode(signature), message, padding.PKCS1v15(), hashes.SHA512()
+            )
+            valid = True
+        except (InvalidSignature, binascii.Error):
+            valid = False
+
+        self._verified.set(key, valid, VERIFIED_CACHE_TTL_SECONDS)
+        return valid
+
+    def get_stats(self) -> Dict:
+        """Get request and circuit breaker statistics"""
+        return {**self.stats, "breaker": self.breaker.get_stats()}
 
 
 # Global Random.org service instance
-random_service = RandomOrgService()
+random_service = RandomOrgService(http_client)
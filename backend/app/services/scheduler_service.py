@@ -1,84 +1,254 @@
 """Scheduler service for automated tasks"""
 
-from datetime import datetime
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Set
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 
+from app.config import settings
 from app.database.session import AsyncSessionLocal
-from app.database.models import RaffleStatus
 from app.database.crud import RaffleCRUD
-from app.services.raffle_service import raffle_service
-from app.api.websocket import websocket_manager
+from app.services.raffle_service import RaffleService, raffle_service
+from app.services.confirmation_service import confirmation_service
+from app.services.leader_service import leader_election
+
+DRAW_TIMER_MARGIN = timedelta(milliseconds=50)
 
 
 class SchedulerService:
-    """Service for scheduling automated tasks"""
+    """
+    Service for scheduling automated tasks
+
+    Safe to run on every replica: draws are claimed atomically in the
+    database, so timers and sweeps on several nodes split the raffles
+    between them, and singleton jobs only run on the elected leader.
+    """
 
     def __init__(self):
         self.scheduler = AsyncIOScheduler()
+        # Raffles being drawn in this process, so a timer and the sweep never overlap
+        self._drawing: Set[int] = set()
+
+        # Draws run concurrently, each batch in its own session, up to the cap
+        self._draw_slots = asyncio.Semaphore(settings.DRAW_CONCURRENCY)
+        self._queued = 0
+        self._running = 0
+        self.draw_stats: Dict[str, float] = {
+            "batches": 0,
+            "raffles_drawn": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "total_queue_wait_seconds": 0.0,
+            "max_queue_wait_seconds": 0.0,
+            "total_run_seconds": 0.0,
+            "max_run_seconds": 0.0,
+        }
 
     def start(self):
         """Start scheduler"""
-        # Check for raffles ready to draw (every 10 seconds)
+        # Leader election for singleton jobs, first round right away
+        self.scheduler.add_job(
+            leader_election.renew,
+            trigger=IntervalTrigger(seconds=settings.LEADER_LEASE_SECONDS / 3),
+            id="renew_leader_lease",
+            replace_existing=True,
+            max_instances=1,
+            next_run_time=datetime.now(timezone.utc)
+        )
+
+        # Draw each raffle at its waiting_until; joins arm the timers
+        RaffleService.on_timer_started = self.schedule_draw
+        self.scheduler.add_job(self.restore_draw_timers, id="restore_draw_timers")
+
+        # Safety sweep for draws whose timer was missed or failed
         self.scheduler.add_job(
             self.check_raffles_ready_to_draw,
-            trigger=IntervalTrigger(seconds=10),
+            trigger=IntervalTrigger(seconds=settings.DRAW_SWEEP_INTERVAL_SECONDS),
             id="check_raffles_ready",
-            replace_existing=True
+            replace_existing=True,
+            max_instances=1
         )
 
-        # Check transaction statuses (every 5 seconds)
-        # self.scheduler.add_job(
-        #     self.check_transaction_statuses,
-        #     trigger=IntervalTrigger(seconds=5),
-        #     id="check_transactions",
-        #     replace_existing=True
-        # )
+        # Check transaction statuses
+        self.scheduler.add_job(
+            self.check_transaction_statuses,
+            trigger=IntervalTrigger(seconds=settings.TX_CONFIRM_INTERVAL_SECONDS),
+            id="check_transactions",
+            replace_existing=True,
+            max_instances=1
+        )
 
         self.scheduler.start()
         logger.info("Scheduler started")
 
     def stop(self):
         """Stop scheduler"""
+        RaffleService.on_timer_started = None
         self.scheduler.shutdown()
         logger.info("Scheduler stopped")
 
-    async def check_raffles_ready_to_draw(self):
-        """Check for raffles with expired timers"""
+    def schedule_draw(self, raffle_id: int, waiting_until: datetime):
+        """Arm a one-shot draw of the raffle at its (naive UTC) waiting_until"""
+        # Event loop timers may fire a clock tick early, before start_draws accepts the raffle
+        run_date = waiting_until.replace(tzinfo=timezone.utc) + DRAW_TIMER_MARGIN
+        self.scheduler.add_job(
+            self.draw_raffle,
+            trigger=DateTrigger(run_date=run_date),
+            args=[raffle_id],
+            id=f"draw_raffle_{raffle_id}",
+            replace_existing=True,
+            misfire_grace_time=None  # Late is better than never; the draw checks the state
+        )
+
+    async def restore_draw_timers(self):
+        """Re-arm timers of waiting raffles after a restart and draw overdue ones"""
         try:
             async with AsyncSessionLocal() as db:
-                # Get all waiting raffles
-                raffles = await RaffleCRUD.get_all_active(db)
+                timers = await RaffleCRUD.get_draw_timers(db)
+
+            now = datetime.utcnow()
+            pending = [(raffle_id, at) for raffle_id, at in timers if at > now]
+            for raffle_id, waiting_until in pending:
+                self.schedule_draw(raffle_id, waiting_until)
+            logger.info(f"Restored {len(pending)} draw timers")
+
+        except Exception as e:
+            logger.error(f"Error restoring draw timers: {e}")
 
-                for raffle in raffles:
-                    if raffle.status != RaffleStatus.WAITING:
-                        continue
+        # Overdue raffles are drawn together (one Random.org request per batch)
+        await self.check_raffles_ready_to_draw(grace=timedelta(0))
 
-                    if raffle.waiting_until and datetime.utcnow() >= raffle.waiting_until:
-                        logger.info(f"Raffle #{raffle.id} timer expired, starting draw")
+    async def draw_raffle(self, raffle_id: int):
+        """Timer job: draw one raffle"""
+        try:
+            await self._draw_batch([raffle_id])
+        except Exception as e:
+            logger.error(f"Error drawing raffle #{raffle_id}: {e}")
 
-                        try:
-                            # Execute drawing
-                            await raffle_service.draw_raffle(db, raffle.id)
+    async def check_raffles_ready_to_draw(self, grace: timedelta = None):
+        """Sweep for raffles with expired timers that were not drawn"""
+        if grace is None:
+            # Raffles that just expired belong to their timers
+            grace = timedelta(seconds=settings.DRAW_SWEEP_GRACE_SECONDS)
 
-                            # Broadcast completion
-                            await websocket_manager.broadcast_raffle_completed(
-                                raffle_id=raffle.id,
-                                winner_id=raffle.winner_id
-                            )
+        try:
+            async with AsyncSessionLocal() as db:
+                if leader_election.is_leader:
+                    await self._release_stale_claims(db)
+                raffle_ids = await RaffleCRUD.get_ready_to_draw_ids(db, datetime.utcnow() - grace)
 
-                        except Exception as e:
-                            logger.error(f"Failed to draw raffle #{raffle.id}: {e}")
+            # Draw them with one signed Random.org request per batch, batches concurrently
+            batch_size = settings.RANDOM_ORG_BATCH_SIZE
+            await asyncio.gather(*(
+                self._draw_batch(raffle_ids[start:start + batch_size])
+                for start in range(0, len(raffle_ids), batch_size)
+            ))
 
         except Exception as e:
             logger.error(f"Error checking raffles ready to draw: {e}")
 
+    async def _draw_batch(self, raffle_ids: List[int]):
+        """
+        Draw raffles not already being drawn here
+
+        Waits for a free draw slot, then draws in a session of its own within
+        DRAW_TIMEOUT_SECONDS. Raffles still held by a timed out draw's claim
+        are returned to WAITING for the sweep to retry.
+        """
+        batch = [raffle_id for raffle_id in raffle_ids if raffle_id not in self._drawing]
+        if not batch:
+            return
+
+        self._drawing.update(batch)
+        self._queued += 1
+        queued_at = time.monotonic()
+        try:
+            async with self._draw_slots:
+                self._queued -= 1
+                self._running += 1
+                started = time.monotonic()
+                self._record("queue_wait", started - queued_at)
+
+                logger.info(f"Raffle timers expired, starting draw of {batch}")
+                claimed_at = datetime.utcnow()
+                try:
+                    winners = await asyncio.wait_for(
+                        self._draw(batch, claimed_at), timeout=settings.DRAW_TIMEOUT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    self.draw_stats["timeouts"] += 1
+                    logger.error(f"Draw of raffles {batch} timed out after {settings.DRAW_TIMEOUT_SECONDS}s")
+                    await self._release(batch, claimed_at)
+                    return
+                except Exception as e:
+                    self.draw_stats["failures"] += 1
+                    logger.error(f"Failed to draw raffles {batch}: {e}")
+                    return
+                finally:
+                    self._running -= 1
+                    self._record("run", time.monotonic() - started)
+        finally:
+            self._drawing.difference_update(batch)
+
+        self.draw_stats["batches"] += 1
+        self.draw_stats["raffles_drawn"] += len(winners)
+
+    @staticmethod
+    async def _release_stale_claims(db: AsyncSession):
+        """Return raffles claimed by a node that died mid-draw to WAITING"""
+        claimed_before = datetime.utcnow() - timedelta(seconds=settings.DRAW_CLAIM_TTL_SECONDS)
+        released = await RaffleCRUD.release_stale_draws(db, claimed_before)
+        await db.commit()
+        if released:
+            logger.warning(f"Released {released} raffles stuck in drawing since before {claimed_before}")
+
+    @staticmethod
+    async def _draw(raffle_ids: List[int], claimed_at: datetime) -> Dict[int, int]:
+        """Draw a batch in its own session"""
+        async with AsyncSessionLocal() as db:
+            return await raffle_service.draw_raffles(db, raffle_ids, claimed_at)
+
+    @staticmethod
+    async def _release(raffle_ids: List[int], claimed_at: datetime):
+        """Return raffles still held by an abandoned draw's claim to WAITING"""
+        try:
+            async with AsyncSessionLocal() as db:
+                await RaffleCRUD.release_draws(db, raffle_ids, claimed_at)
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to release raffles {raffle_ids}: {e}")
+
+    def _record(self, metric: str, seconds: float):
+        self.draw_stats[f"total_{metric}_seconds"] += seconds
+        self.draw_stats[f"max_{metric}_seconds"] = max(self.draw_stats[f"max_{metric}_seconds"], seconds)
+
+    def get_draw_stats(self) -> Dict:
+        """Get draw concurrency, queue wait and run time statistics"""
+        stats = {key: round(value, 6) if isinstance(value, float) else value for key, value in self.draw_stats.items()}
+        started = stats["batches"] + stats["failures"] + stats["timeouts"]
+        return {
+            **stats,
+            "concurrency": settings.DRAW_CONCURRENCY,
+            "queued": self._queued,
+            "running": self._running,
+            "avg_queue_wait_seconds": round(self.draw_stats["total_queue_wait_seconds"] / started, 6) if started else 0.0,
+            "avg_run_seconds": round(self.draw_stats["total_run_seconds"] / started, 6) if started else 0.0,
+        }
+
     async def check_transaction_statuses(self):
-        """Check pending transaction statuses"""
-        # TODO: Implement transaction status checking
-        pass
+        """Confirm pending entry payments and prize payouts (leader only)"""
+        if not leader_election.is_leader:
+            return
+
+        try:
+            await confirmation_service.confirm_pending()
+        except Exception as e:
+            logger.error(f"Error checking transaction statuses: {e}")
 
 
 # Global scheduler instance
@@ -0,0 +1,268 @@
+"""Durable task queue on Redis Streams for work that follows a draw"""
+
+import asyncio
+import json
+import os
+import socket
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+from loguru import logger
+from redis import asyncio as aioredis
+from redis.exceptions import ConnectionError as RedisConnectionError, RedisError, ResponseError, TimeoutError as RedisTimeoutError
+
+from app.config import settings
+
+TaskHandler = Callable[[Dict], Awaitable[None]]
+
+# Moves due retries (JSON-encoded messages) from the delay set back onto the stream atomically
+PROMOTE_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, item in ipairs(due) do
+    redis.call('XADD', KEYS[2], '*', 'retry', item)
+    redis.call('ZREM', KEYS[1], item)
+end
+return #due
+"""
+
+
+class TaskQueue:
+    """
+    At-least-once task queue with consumer groups, retries and dead-lettering
+
+    Tasks are added to a Redis stream and read by a consumer group, so any
+    number of processes share the work. A task is acknowledged once its
+    handler succeeds; a failed task is retried with exponential backoff via
+    a delay set, and moved to the dead-letter stream after
+    TASK_MAX_ATTEMPTS. Tasks left unacknowledged by a crashed consumer are
+    claimed by another one after TASK_CLAIM_IDLE_SECONDS. Handlers must be
+    idempotent.
+
+    When TASK_QUEUE_ENABLED is off, or Redis is unreachable, enqueued tasks
+    run inline instead; consumers keep retrying until Redis is back.
+    """
+
+    def __init__(self):
+        self.stream = settings.TASK_QUEUE_STREAM
+        self.group = "workers"
+        self.delayed_key = f"{self.stream}:delayed"
+        self.dead_stream = f"{self.stream}:dead"
+        self.consumer = f"{socket.gethostname()}:{os.getpid()}"
+
+        self.redis: Optional[aioredis.Redis] = None
+        self.handlers: Dict[str, TaskHandler] = {}
+        self.tasks: List[asyncio.Task] = []
+        self.group_ready = False
+        # Consumers only read while this returns True (None: always)
+        self.active: Optional[Callable[[], bool]] = None
+        self.stats: Dict[str, int] = {
+            "enqueued": 0,
+            "completed": 0,
+            "retried": 0,
+            "dead_lettered": 0,
+            "reclaimed": 0,
+        }
+
+    def register(self, name: str, handler: TaskHandler):
+        """Register the handler for a task name"""
+        self.handlers[name] = handler
+
+    async def _connect(self) -> aioredis.Redis:
+        if self.redis is None:
+            self.redis = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+        return self.redis
+
+    async def _create_group(self):
+        """Create the stream and consumer group unless they exist"""
+        redis = await self._connect()
+        try:
+            await redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self.group_ready = True
+
+    async def start(self, workers: int = None, active: Optional[Callable[[], bool]] = None):
+        """
+        Start consumers (and the retry/reclaim loop) in this process
+
+        Args:
+            workers: Number of consumers (default TASK_WORKERS)
+            active: Consume only while this returns True, e.g. on the
+                leader among API replicas
+        """
+        if not settings.TASK_QUEUE_ENABLED:
+            return
+
+        self.active = active
+
+        try:
+            await self._create_group()
+        except (RedisConnectionError, RedisTimeoutError, OSError) as e:
+            # Consumers create the group once Redis is back
+            logger.error(f"Redis is unreachable, running tasks inline until it is back: {e}")
+
+        for index in range(workers or settings.TASK_WORKERS):
+            self.tasks.append(asyncio.create_task(self._consume(f"{self.consumer}:{index}")))
+        self.tasks.append(asyncio.create_task(self._maintain()))
+        logger.info(f"Task queue started with {len(self.tasks) - 1} consumers on {self.stream}")
+
+    async def stop(self):
+        """Stop consumers; unacknowledged tasks are reclaimed by other consumers"""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        self.group_ready = False
+
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
+        logger.info("Task queue stopped")
+
+    async def enqueue(self, name: str, payload: Dict):
+        """
+        Add a task to the queue (or run it right away when the queue is off
+        or Redis is unreachable)
+
+        Never raises: callers enqueue after committing their own work.
+        """
+        if name not in self.handlers:
+            logger.error(f"No handler registered for task {name}, dropping {payload}")
+            return
+
+        if settings.TASK_QUEUE_ENABLED:
+            try:
+                redis = await self._connect()
+                await redis.xadd(self.stream, {"task": name, "payload": json.dumps(payload), "attempts": 0})
+                self.stats["enqueued"] += 1
+                return
+            except Exception as e:
+                # Better done here and now than lost
+                logger.error(f"Failed to enqueue task {name}, running it inline: {e}")
+
+        try:
+            await self.handlers[name](payload)
+        except Exception as e:
+            logger.error(f"Task {name} {payload} failed: {e}")
+
+    @staticmethod
+    def retry_delay(attempts: int) -> float:
+        """Exponential backoff after the given number of failed attempts"""
+        return min(
+            settings.TASK_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0),
+            settings.TASK_RETRY_MAX_SECONDS
+        )
+
+    async def _consume(self, consumer: str):
+        """Read new tasks for this consumer until cancelled"""
+        redis = await self._connect()
+        while True:
+            if self.active is not None and not self.active():
+                await asyncio.sleep(1)
+                continue
+
+            try:
+                if not self.group_ready:
+                    await self._create_group()
+                response = await redis.xreadgroup(
+                    self.group, consumer, {self.stream: ">"}, count=1, block=5000
+                )
+                for _, messages in response or []:
+                    for message_id, fields in messages:
+                        await self._process(message_id, fields)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Task consumer {consumer} failed: {e}")
+                await asyncio.sleep(1)
+
+    async def _process(self, message_id: str, fields: Dict):
+        """Run one task, then acknowledge it, schedule a retry or dead-letter it"""
+        if "retry" in fields:
+            fields = json.loads(fields["retry"])
+        name = fields.get("task")
+        attempts = int(fields.get("attempts", 0)) + 1
+        handler = self.handlers.get(name)
+
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for task {name}")
+            await asyncio.wait_for(handler(json.loads(fields["payload"])), settings.TASK_TIMEOUT_SECONDS)
+            error = None
+        except Exception as e:
+            error = e
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if error is None:
+                self.stats["completed"] += 1
+            elif attempts >= settings.TASK_MAX_ATTEMPTS:
+                self.stats["dead_lettered"] += 1
+                logger.error(f"Task {name} {message_id} failed {attempts} times, dead-lettering: {error}")
+                pipe.xadd(self.dead_stream, {**fields, "attempts": attempts, "error": str(error)})
+            else:
+                self.stats["retried"] += 1
+                delay = self.retry_delay(attempts)
+                logger.warning(f"Task {name} {message_id} failed (attempt {attempts}), retrying in {delay}s: {error}")
+                retry = {"task": name, "payload": fields["payload"], "attempts": attempts, "id": message_id}
+                pipe.zadd(self.delayed_key, {json.dumps(retry): time.time() + delay})
+
+            pipe.xack(self.stream, self.group, message_id)
+            pipe.xdel(self.stream, message_id)
+            await pipe.execute()
+
+    async def _maintain(self):
+        """Promote due retries and take over tasks stuck with dead consumers"""
+        redis = await self._connect()
+        promote = redis.register_script(PROMOTE_DUE_SCRIPT)
+        consumer = f"{self.consumer}:reclaim"
+
+        while True:
+            if self.active is not None and not self.active():
+                await asyncio.sleep(1)
+                continue
+
+            try:
+                if not self.group_ready:
+                    await self._create_group()
+                await promote(keys=[self.delayed_key, self.stream], args=[time.time(), 100])
+
+                _, messages, *_ = await redis.xautoclaim(
+                    self.stream, self.group, consumer,
+                    min_idle_time=settings.TASK_CLAIM_IDLE_SECONDS * 1000, count=10
+                )
+                for message_id, fields in messages:
+                    if fields is None:
+                        continue  # Deleted while pending
+                    self.stats["reclaimed"] += 1
+                    await self._process(message_id, fields)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Task queue maintenance failed: {e}")
+
+            await asyncio.sleep(1)
+
+    async def get_stats(self) -> Dict:
+        """Get processing counters and queue depths"""
+        stats = {"enabled": settings.TASK_QUEUE_ENABLED, **self.stats}
+        if not settings.TASK_QUEUE_ENABLED:
+            return stats
+
+        try:
+            redis = await self._connect()
+            pending = await redis.xpending(self.stream, self.group)
+            stats.update({
+                "redis": "available",
+                "stream_length": await redis.xlen(self.stream),
+                "pending": pending["pending"],
+                "delayed": await redis.zcard(self.delayed_key),
+                "dead": await redis.xlen(self.dead_stream),
+            })
+        except (RedisError, OSError) as e:
+            logger.warning(f"Task queue depths unavailable: {e}")
+            stats["redis"] = "unavailable"
+        return stats
+
+
+# Global task queue instance
+task_queue = TaskQueue()
@@ -0,0 +1,222 @@
+"""Incremental indexer of incoming transfers to the raffle wallet"""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+
+from app.config import settings
+from app.database.session import AsyncSessionLocal
+from app.database.crud import WalletTransferCRUD
+from app.services.ton_service import ton_service
+from app.services.leader_service import leader_election
+
+
+class TONIndexer:
+    """
+    Follows the raffle wallet with an (lt, hash) cursor and stores incoming
+    transfers in wallet_transfers, so payment verification is a local lookup
+
+    Only the elected leader polls; other replicas read what it indexes.
+    """
+
+    def __init__(self, name: str = "raffle_wallet"):
+        self.name = name
+        self.wallet = settings.RAFFLE_WALLET_ADDRESS
+        self.task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._indexed = asyncio.Event()
+        # While a backlog is being caught up: newest indexed transaction, and the
+        # (lt, hash, to_lt) ranges still missing, each resumed from (lt, hash)
+        self._head: Optional[Tuple[int, str]] = None
+        self._gaps: List[Tuple[int, str, int]] = []
+
+    def start(self):
+        """Start the polling loop"""
+        self.task = asyncio.create_task(self._run())
+        logger.info(f"TON indexer started for {self.wallet}")
+
+    async def stop(self):
+        """Stop the polling loop"""
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        logger.info("TON indexer stopped")
+
+    def poke(self):
+        """Request an immediate poll instead of waiting for the next interval"""
+        self._wakeup.set()
+
+    async def _run(self):
+        """Poll toncenter on the leader until cancelled"""
+        while True:
+            try:
+                if leader_election.is_leader:
+                    await self.poll()
+                else:
+                    # The leader moves the cursor meanwhile; resume from it
+                    self._head, self._gaps = None, []
+            except Exception as e:
+                logger.error(f"TON indexer poll failed: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.TON_INDEXER_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def poll(self) -> int:
+        """
+        Fetch transactions newer than the cursor and store incoming transfers
+
+        At most TON_INDEXER_MAX_PAGES pages are fetched per poll, newest
+        first. A longer backlog leaves a gap that later polls keep filling
+        from where they stopped; the stored cursor only moves once no gap
+        is left, so a restart re-reads the backlog instead of skipping it.
+
+        Returns:
+            Number of newly stored transfers
+        """
+        async with AsyncSessionLocal() as db:
+            cursor = await WalletTransferCRUD.get_cursor(db, self.name)
+            head, gaps = self._head, list(self._gaps)
+            if not gaps:
+                head = (cursor.lt, cursor.tx_hash) if cursor else None
+            head_lt = head[0] if head else 0
+            pages = settings.TON_INDEXER_MAX_PAGES
+
+            # Newest transactions first, so fresh payments are not held up by a backlog
+            new_transactions, resume, used = await self._fetch_since(head_lt, None, pages)
+            pages -= used
+            if new_transactions:
+                newest = new_transactions[0]["transaction_id"]
+                head = (int(newest["lt"]), newest["hash"])
+            if resume is not None and cursor is not None:
+                logger.warning(
+                    f"TON indexer fell more than {settings.TON_INDEXER_MAX_PAGES} pages behind; "
+                    f"catching up on older transfers since lt={head_lt} over the next polls"
+                )
+                gaps.append((*resume, head_lt))
+
+            # Then continue the backlog left by earlier polls
+            while gaps and pages > 0:
+                lt, tx_hash, to_lt = gaps[-1]
+                transactions, resume, used = await self._fetch_since(to_lt, (lt, tx_hash), pages)
+                pages -= used
+                new_transactions.extend(transactions)
+                if resume is None:
+                    gaps.pop()
+                    logger.info(f"TON indexer caught up on transfers since lt={to_lt}")
+                else:
+                    gaps[-1] = (*resume, to_lt)
+
+            stored = 0
+            if new_transactions:
+                transfers = [
+                    transfer for transfer in map(ton_service.parse_incoming_transfer, new_transactions)
+                    if transfer is not None
+                ]
+                stored = await WalletTransferCRUD.add_many(db, transfers)
+
+            if not gaps and head is not None and (cursor is None or head != (cursor.lt, cursor.tx_hash)):
+                await WalletTransferCRUD.set_cursor(db, self.name, head[0], head[1])
+            await db.commit()
+            self._head, self._gaps = head, gaps
+
+            if new_transactions:
+                logger.info(
+                    f"TON indexer: {len(new_transactions)} new transactions, "
+                    f"{stored} incoming transfers stored"
+                )
+
+        # Wake everyone waiting for a transfer to arrive
+        indexed, self._indexed = self._indexed, asyncio.Event()
+        indexed.set()
+        return stored
+
+    async def _fetch_since(
+        self,
+        to_lt: int,
+        start: Optional[Tuple[int, str]],
+        max_pages: int
+    ) -> Tuple[List[Dict], Optional[Tuple[int, str]], int]:
+        """
+        Page backwards from start (or the newest transaction) until the cursor is reached
+
+        Returns:
+            Transactions newer than to_lt, newest first; the (lt, hash) to
+            resume paging from if max_pages ran out first, else None; and
+            the number of pages fetched
+        """
+        page_size = settings.TON_INDEXER_PAGE_SIZE
+        transactions: List[Dict] = []
+        lt, tx_hash = start or (None, None)
+
+        for pages in range(1, max_pages + 1):
+            page = await ton_service.get_transactions(
+                self.wallet, limit=page_size, lt=lt, tx_hash=tx_hash, to_lt=to_lt
+            )
+            full_page = len(page) >= page_size
+
+            # Continuation pages start with the transaction we continued from
+            if lt is not None and page and page[0]["transaction_id"]["hash"] == tx_hash:
+                page = page[1:]
+
+            fresh = [tx for tx in page if int(tx["transaction_id"]["lt"]) > to_lt]
+            transactions.extend(fresh)
+
+            if not full_page or len(fresh) < len(page) or not page:
+                return transactions, None, pages
+
+            oldest = page[-1]["transaction_id"]
+            lt, tx_hash = int(oldest["lt"]), oldest["hash"]
+
+        return transactions, (lt, tx_hash), max_pages
+
+    async def wait_for_transfer(self, tx_hash: str, timeout: float) -> Optional[Dict]:
+        """
+        Look up an indexed transfer, waiting briefly for it to arrive
+
+        Returns:
+            Transfer dict (same shape as TONService.parse_incoming_transfer),
+            or None if it was not indexed within the timeout
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        poked = False
+
+        while True:
+            async with AsyncSessionLocal() as db:
+                transfer = await WalletTransferCRUD.get_by_hash(db, tx_hash)
+
+            if transfer is not None:
+                return {
+                    "tx_hash": transfer.tx_hash,
+                    "lt": transfer.lt,
+                    "source": transfer.source,
+                    "destination": transfer.destination,
+                    "amount_nano": transfer.amount_nano,
+                    "utime": transfer.utime,
+                }
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+
+            # Ask for one early poll; afterwards follow the regular interval.
+            # Another process may be the one indexing, so re-check the table
+            # at least once per poll interval
+            if not poked:
+                self.poke()
+                poked = True
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(self._indexed.wait()),
+                    min(remaining, settings.TON_INDEXER_POLL_SECONDS)
+                )
+            except asyncio.TimeoutError:
+                pass
+
+
+# Global TON indexer instance
+ton_indexer = TONIndexer()
@@ -1,21 +1,277 @@
 """TON Blockchain service"""
 
 import asyncio
-from typing import Optional, Dict
+from datetime import datetime
+from typing import Optional, Dict, List, Tuple
 import aiohttp
 from loguru import logger
+from tonsdk.contract.wallet import Wallets, WalletVersionEnum
+from tonsdk.utils import Address, bytes_to_b64str
 
 from app.config import settings
+from app.services.http_client import HTTPClient, http_client
+from app.utils.cache import TTLCache, SingleFlight
+from app.utils.rate_limit import Priority, PriorityRateLimiter
+from app.utils.resilience import CircuitBreaker, ProviderError, hedged
+
+
+class VerificationPendingError(ValueError):
+    """Payment not verifiable yet (not indexed, or toncenter unavailable); a retry may succeed"""
 
 
 class TONService:
     """Service for interacting with TON blockchain"""
 
-    def __init__(self):
-        self.api_url = "https://toncenter.com/api/v2"
+    def __init__(self, http: HTTPClient):
+        self.http = http
+        self.api_url = settings.TON_CENTER_API_URL
         self.api_key = settings.TON_CENTER_API_KEY
         self.raffle_wallet = settings.RAFFLE_WALLET_ADDRESS
 
+        # Identical concurrent requests share one fetch; results are cached briefly
+        self.single_flight = SingleFlight()
+        self.cache = TTLCache(max_entries=settings.TON_CACHE_MAX_ENTRIES)
+
+        # Every toncenter call takes a token; payouts and draws go first
+        self.rate_limiter = PriorityRateLimiter(
+            rate=settings.TON_CENTER_RPS,
+            burst=settings.TON_CENTER_BURST,
+        )
+
+        # Fail fast while toncenter is down instead of waiting out timeouts
+        self.breaker = CircuitBreaker(
+            "toncenter",
+            failure_threshold=settings.TON_CENTER_BREAKER_FAILURES,
+            reset_timeout=settings.TON_CENTER_BREAKER_RESET_SECONDS,
+            failures=(ProviderError, aiohttp.ClientError, asyncio.TimeoutError),
+        )
+        self.stats: Dict[str, int] = {"hedged_requests": 0, "hedge_wins": 0}
+
+        # Highload wallet used for prize payouts, derived from the mnemonic on first use
+        self._payout_wallet = None
+
+    async def _request(
+        self,
+        method: str,
+        params: Dict,
+        cache_ttl: float = 0,
+        priority: Priority = Priority.NORMAL,
+        hedge: bool = False
+    ):
+        """
+        Call a toncenter API method
+
+        Concurrent calls with the same method and params are coalesced into
+        one HTTP request. With cache_ttl > 0 the result is also served from
+        and stored in the response cache. Requests are throttled by the
+        client-side rate limiter in the given priority lane. With hedge, a
+        backup request is sent if the first is slow or fails (idempotent
+        reads only); the first response wins.
+
+        Returns:
+            The "result" field of the response (shared between callers, do not mutate)
+
+        Raises:
+            ValueError: If the request fails or the API returns an error
+        """
+        key = (method, tuple(sorted(params.items())))
+
+        if cache_ttl > 0:
+            found, result = self.cache.get(key)
+            if found:
+                return result
+
+        fetch = self._hedged_fetch if hedge else self._fetch
+        result = await self.single_flight.do(key, lambda: fetch(method, params, priority))
+
+        if cache_ttl > 0:
+            self.cache.set(key, result, cache_ttl)
+        return result
+
+    async def _fetch(
+        self,
+        method: str,
+        params: Dict,
+        priority: Priority,
+        body: Optional[Dict] = None
+    ):
+        """
+        Perform a rate-limited toncenter API request, backing off on 429
+
+        Sent as a GET with query params, or as a JSON POST when body is given.
+        Connection errors, timeouts and 5xx responses count against the
+        circuit breaker; while it is open, calls raise CircuitOpenError.
+        """
+        session = await self.http.get_session()
+        url = f"{self.api_url}/{method}"
+        params = {**params, "api_key": self.api_key}
+
+        for attempt in range(settings.TON_CENTER_MAX_RETRIES + 1):
+            async with self.breaker:
+                await self.rate_limiter.acquire(priority)
+
+                if body is None:
+                    request = session.get(url, params=params)
+                else:
+                    request = session.post(url, params=params, json=body)
+
+                async with request as response:
+                    if response.status == 429:
+                        retry_after = self._retry_after(response.headers.get("Retry-After"), attempt)
+                        self.rate_limiter.pause(retry_after)
+                        logger.warning(f"toncenter throttled {method}, retrying in {retry_after:.2f}s")
+                        continue
+
+                    if response.status >= 500:
+                        raise ProviderError(f"{method} returned status {response.status}")
+                    if response.status != 200:
+                        raise ValueError(f"{method} returned status {response.status}")
+
+                    data = await response.json()
+
+                    if not data.get("ok"):
+                        raise ValueError("API returned error")
+
+                    return data.get("result")
+
+        raise ValueError(f"{method} rate limited after {settings.TON_CENTER_MAX_RETRIES} retries")
+
+    async def _hedged_fetch(self, method: str, params: Dict, priority: Priority):
+        """_fetch with up to TON_CENTER_HEDGES backup requests"""
+        attempts = 0
+
+        async def attempt():
+            nonlocal attempts
+            attempts += 1
+            backup = attempts > 1
+            if backup:
+                self.stats["hedged_requests"] += 1
+            result = await self._fetch(method, params, priority)
+            if backup:
+                self.stats["hedge_wins"] += 1
+            return result
+
+        return await hedged(
+            attempt,
+            delay=settings.TON_CENTER_HEDGE_DELAY_SECONDS,
+            hedges=settings.TON_CENTER_HEDGES
+        )
+
+    @staticmethod
+    def _retry_after(header: Optional[str], attempt: int) -> float:
+        """Delay from a Retry-After header, or exponential backoff without one"""
+        try:
+            return max(float(header), 0.0)
+        except (TypeError, ValueError):
+            return min(0.5 * 2 ** attempt, 10.0)
+
+    async def get_transactions(
+        self,
+        address: str,
+        limit: int = 100,
+        lt: Optional[int] = None,
+        tx_hash: Optional[str] = None,
+        to_lt: Optional[int] = None,
+        cache_ttl: float = 0,
+        priority: Priority = Priority.NORMAL,
+        hedge: bool = False
+    ) -> List[Dict]:
+        """
+        Get wallet transactions, newest first
+
+        Args:
+            address: Wallet address
+            limit: Page size
+            lt: Start from this logical time (inclusive, together with tx_hash)
+            tx_hash: Hash of the transaction at lt
+            to_lt: Stop at this logical time (exclusive)
+            cache_ttl: Serve from / store in the response cache for this long
+            priority: Rate limiter lane
+            hedge: Send a backup request if the first is slow or fails
+
+        Returns:
+            Raw toncenter transactions
+        """
+        params = {"address": address, "limit": limit}
+        if lt is not None and tx_hash is not None:
+            params["lt"] = lt
+            params["hash"] = tx_hash
+        if to_lt:
+            params["to_lt"] = to_lt
+
+        return await self._request(
+            "getTransactions", params, cache_ttl=cache_ttl, priority=priority, hedge=hedge
+        ) or []
+
+    @staticmethod
+    def parse_incoming_transfer(tx: Dict) -> Optional[Dict]:
+        """
+        Extract an incoming value transfer from a raw transaction
+
+        Returns:
+            Dict with tx_hash, lt, source, destination, amount_nano and utime,
+            or None if the transaction carries no incoming value
+        """
+        in_msg = tx.get("in_msg") or {}
+        amount_nano = int(in_msg.get("value") or 0)
+        if not in_msg.get("source") or amount_nano <= 0:
+            return None
+
+        transaction_id = tx.get("transaction_id", {})
+        utime = tx.get("utime")
+        return {
+            "tx_hash": transaction_id.get("hash"),
+            "lt": int(transaction_id.get("lt", 0)),
+            "source": in_msg.get("source"),
+            "destination": in_msg.get("destination"),
+            "amount_nano": amount_nano,
+            "utime": datetime.utcfromtimestamp(utime) if utime else None,
+        }
+
+    @staticmethod
+    def parse_processed_message(tx: Dict) -> Optional[Dict]:
+        """
+        Extract the external message a wallet transaction processed
+
+        Returns:
+            Dict with message_hash, utime and out_msgs as a list of
+            (raw destination address, amount_nano), or None if the
+            transaction was not triggered by an external message
+        """
+        in_msg = tx.get("in_msg") or {}
+        if in_msg.get("source") or not in_msg.get("hash"):
+            return None
+
+        return {
+            "message_hash": in_msg["hash"],
+            "utime": datetime.utcfromtimestamp(tx["utime"]) if tx.get("utime") else None,
+            "out_msgs": [
+                (TONService.normalize_address(out_msg["destination"]), int(out_msg.get("value") or 0))
+                for out_msg in tx.get("out_msgs") or []
+                if out_msg.get("destination")
+            ],
+        }
+
+    @staticmethod
+    def normalize_address(address: str) -> str:
+        """Raw form (workchain:hex) of a user-friendly or raw address"""
+        return Address(address).to_string(False)
+
+    async def _find_remote_transfer(self, tx_hash: str) -> Optional[Dict]:
+        """Scan the latest wallet transactions on toncenter for a hash"""
+        # A cached page may predate the payment, so re-check a fresh page on a miss
+        for cache_ttl in (settings.TON_CACHE_TTL_SECONDS, 0):
+            # A join waits on this lookup, so don't let one slow request hold it up
+            transactions = await self.get_transactions(
+                self.raffle_wallet, limit=100, cache_ttl=cache_ttl, hedge=True
+            )
+
+            for tx in transactions:
+                if tx.get("transaction_id", {}).get("hash") == tx_hash:
+                    return self.parse_incoming_transfer(tx)
+
+        return None
+
     async def verify_transaction(
         self,
         tx_hash: str,
@@ -25,6 +281,9 @@ class TONService:
         """
         Verify TON transaction
 
+        With the indexer enabled this is a local lookup in wallet_transfers
+        that waits up to TON_VERIFY_WAIT_SECONDS for the payment to be indexed.
+
         Args:
             tx_hash: Transaction hash
             expected_amount: Expected amount in TON
@@ -34,96 +293,154 @@ class TONService:
             Transaction details if valid
 
         Raises:
+            VerificationPendingError: If the transaction is not found (yet) or
+                cannot be looked up right now
             ValueError: If transaction is invalid
         """
         try:
-            async with aiohttp.ClientSession() as session:
-                # Get transaction details
-                url = f"{self.api_url}/getTransactions"
-                params = {
-                    "address": self.raffle_wallet,
-                    "limit": 100,
-                    "api_key": self.api_key
-                }
-
-                async with session.get(url, params=params) as response:
-                    if response.status != 200:
-                        raise ValueError("Failed to fetch transactions")
-
-                    data = await response.json()
+            if settings.TON_INDEXER_ENABLED:
+                from app.services.ton_indexer import ton_indexer
+
+                transfer = await ton_indexer.wait_for_transfer(
+                    tx_hash, timeout=settings.TON_VERIFY_WAIT_SECONDS
+                )
+            else:
+                transfer = await self._find_remote_transfer(tx_hash)
+        except Exception as e:
+            logger.warning(f"Transaction lookup failed: {e}")
+            raise VerificationPendingError(f"Transaction lookup failed: {str(e)}")
 
-                    if not data.get("ok"):
-                        raise ValueError("API returned error")
+        if transfer is None:
+            raise VerificationPendingError("Transaction not found")
 
-                    transactions = data.get("result", [])
-
-                    # Find matching transaction
-                    for tx in transactions:
-                        if tx.get("transaction_id", {}).get("hash") == tx_hash:
-                            # Verify amount
-                            in_msg = tx.get("in_msg", {})
-                            amount_nano = int(in_msg.get("value", 0))
-                            amount_ton = amount_nano / 1_000_000_000
-
-                            if abs(amount_ton - expected_amount) > 0.01:
-                                raise ValueError(
-                                    f"Amount mismatch: expected {expected_amount}, got {amount_ton}"
-                                )
-
-                            # Verify destination
-                            if in_msg.get("destination") != self.raffle_wallet:
-                                raise ValueError("Wrong destination wallet")
-
-                            # Verify sender (if provided)
-                            if sender_wallet:
-                                tx_sender = in_msg.get("source")
-                                if tx_sender != sender_wallet:
-                                    raise ValueError("Sender wallet mismatch")
-
-                            return {
-                                "hash": tx_hash,
-                                "from": in_msg.get("source"),
-                                "to": in_msg.get("destination"),
-                                "amount": amount_ton,
-                                "confirmed": True
-                            }
-
-                    raise ValueError("Transaction not found")
+        try:
+            amount_ton = transfer["amount_nano"] / 1_000_000_000
+
+            # Verify amount
+            if abs(amount_ton - expected_amount) > 0.01:
+                raise ValueError(
+                    f"Amount mismatch: expected {expected_amount}, got {amount_ton}"
+                )
+
+            # Verify destination
+            if transfer["destination"] != self.raffle_wallet:
+                raise ValueError("Wrong destination wallet")
+
+            # Verify sender (if provided)
+            if sender_wallet and transfer["source"] != sender_wallet:
+                raise ValueError("Sender wallet mismatch")
+
+            return {
+                "hash": tx_hash,
+                "from": transfer["source"],
+                "to": transfer["destination"],
+                "amount": amount_ton,
+                "confirmed": True
+            }
 
         except Exception as e:
             logger.error(f"Transaction verification failed: {e}")
             raise ValueError(f"Transaction verification failed: {str(e)}")
 
-    async def send_prize(
+    def get_cache_stats(self) -> Dict:
+        """Get response cache and request coalescing statistics"""
+        return {
+            "cache": self.cache.get_stats(),
+            "single_flight": self.single_flight.get_stats(),
+        }
+
+    def get_breaker_stats(self) -> Dict:
+        """Get toncenter circuit breaker state and hedging counters"""
+        return {**self.stats, "breaker": self.breaker.get_stats()}
+
+    def get_rate_limit_stats(self) -> Dict:
+        """Get rate limiter queue depth and throttling statistics"""
+        return self.rate_limiter.get_stats()
+
+    def _get_payout_wallet(self):
+        """Highload wallet v2 contract for the raffle wallet mnemonic"""
+        if self._payout_wallet is None:
+            _, _, _, self._payout_wallet = Wallets.from_mnemonics(
+                settings.RAFFLE_WALLET_MNEMONIC.split(),
+                WalletVersionEnum.hv2,
+                workchain=0
+            )
+        return self._payout_wallet
+
+    def check_payout_wallet(self):
+        """
+        Check that the mnemonic's highload wallet is RAFFLE_WALLET_ADDRESS
+
+        Raises:
+            ValueError: If the mnemonic or address is invalid, or the
+                addresses differ
+        """
+        try:
+            derived = self.normalize_address(self._get_payout_wallet().address.to_string())
+            configured = self.normalize_address(self.raffle_wallet)
+        except Exception as e:
+            raise ValueError(f"Invalid payout wallet configuration: {str(e)}")
+
+        if derived != configured:
+            raise ValueError(
+                f"RAFFLE_WALLET_MNEMONIC derives highload wallet {derived}, "
+                f"not RAFFLE_WALLET_ADDRESS {configured}"
+            )
+
+    def build_payout_message(
         self,
-        recipient_wallet: str,
-        amount_ton: float
-    ) -> str:
+        recipients: List[Tuple[str, int, str]],
+        query_id: int
+    ) -> Tuple[str, str]:
         """
-        Send prize to winner
+        Sign one external message paying several recipients at once
 
         Args:
-            recipient_wallet: Winner's wallet address
-            amount_ton: Amount to send in TON
+            recipients: (wallet address, amount in nanoTON, comment) per message,
+                at most 254
+            query_id: Highload wallet query ID, (expires_at << 32) | nonce.
+                The wallet rejects a query ID it has already processed, so
+                resending the same message never pays twice
 
         Returns:
-            Transaction hash
-
-        Note:
-            This is a placeholder. In production, you would use
-            pytoniq or tonsdk to sign and send transactions.
+            (signed message BOC, message hash), both base64
+        """
+        wallet = self._get_payout_wallet()
+        message = wallet.create_transfer_message(
+            [
+                {
+                    "address": address,
+                    "amount": amount_nano,
+                    "payload": comment,
+                    # Pay fees separately, ignore errors of individual messages
+                    "send_mode": 3,
+                }
+                for address, amount_nano, comment in recipients
+            ],
+            query_id=query_id,
+            # query_id already carries the expiry time
+            timeout=0,
+        )
+        cell = message["message"]
+        return bytes_to_b64str(cell.to_boc(False)), bytes_to_b64str(cell.bytes_hash())
+
+    async def send_boc(self, boc: str) -> str:
         """
-        logger.info(f"Sending {amount_ton} TON to {recipient_wallet}")
+        Broadcast a signed external message
 
-        # TODO: Implement actual transaction sending
-        # This requires:
-        # 1. Load wallet from mnemonic
-        # 2. Create and sign transaction
-        # 3. Send to network
-        # 4. Return transaction hash
+        Args:
+            boc: Message BOC, base64
+
+        Returns:
+            Hash of the external message
 
-        # Placeholder return
-        return f"placeholder_tx_hash_{recipient_wallet}_{amount_ton}"
+        Raises:
+            ValueError: If the API rejects the message
+        """
+        result = await self._fetch(
+            "sendBocReturnHash", {}, Priority.CRITICAL, body={"boc": boc}
+        )
+        return result["hash"]
 
     async def get_wallet_balance(self, wallet_address: str) -> float:
         """
@@ -136,26 +453,16 @@ class TONService:
             Balance in TON
         """
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.api_url}/getAddressBalance"
-                params = {
-                    "address": wallet_address,
-                    "api_key": self.api_key
-                }
-
-                async with session.get(url, params=params) as response:
-                    if response.status != 200:
-                        raise ValueError("Failed to fetch balance")
-
-                    data = await response.json()
-
-                    if not data.get("ok"):
-                        raise ValueError("API returned error")
-
-                    balance_nano = int(data.get("result", 0))
-                    balance_ton = balance_nano / 1_000_000_000
+            result = await self._request(
+                "getAddressBalance",
+                {"address": wallet_address},
+                cache_ttl=settings.TON_BALANCE_CACHE_TTL_SECONDS,
+                priority=Priority.LOW
+            )
+            balance_nano = int(result or 0)
+            balance_ton = balance_nano / 1_000_000_000
 
-                    return balance_ton
+            return balance_ton
 
         except Exception as e:
             logger.error(f"Failed to get balance: {e}")
@@ -163,4 +470,4 @@ class TONService:
 
 
 # Global TON service instance
-ton_service = TONService()
+ton_service = TONService(http_client)
@@ -0,0 +1,27 @@
+"""Keyset pagination cursors"""
+
+import base64
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(joined_at: datetime, row_id: int) -> str:
+    """Encode a (timestamp, id) position as an opaque cursor string"""
+    raw = f"{joined_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        timestamp, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
@@ -0,0 +1,118 @@
+"""Client-side rate limiting for external APIs"""
+
+import asyncio
+import enum
+import heapq
+import itertools
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class Priority(enum.IntEnum):
+    """Request priority lanes (lower value is served first)"""
+    CRITICAL = 0  # Prize payouts, draw-critical calls
+    NORMAL = 1  # Payment verification, indexing
+    LOW = 2  # Balance checks and other informational calls
+
+
+class PriorityRateLimiter:
+    """
+    Token bucket that hands out tokens to waiters by priority lane
+
+    Also honours server-side throttling: pause() blocks every lane until the
+    given time, e.g. after a 429 with Retry-After.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        self.granted = 0
+        self.throttled = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def _try_take(self) -> bool:
+        if time.monotonic() < self.paused_until:
+            return False
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    async def acquire(self, priority: Priority = Priority.NORMAL):
+        """Wait for a token in the given priority lane"""
+        started = time.monotonic()
+
+        if not self._waiters and self._try_take():
+            self.granted += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        await future
+
+        waited = time.monotonic() - started
+        self.granted += 1
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    async def _dispatch(self):
+        """Release queued waiters, highest priority first, as tokens accrue"""
+        while self._waiters:
+            _, _, future = self._waiters[0]
+            if future.cancelled():
+                heapq.heappop(self._waiters)
+                continue
+
+            if self._try_take():
+                heapq.heappop(self._waiters)
+                future.set_result(None)
+                continue
+
+            now = time.monotonic()
+            if now < self.paused_until:
+                delay = self.paused_until - now
+            else:
+                delay = (1 - self.tokens) / self.rate
+            await asyncio.sleep(max(delay, 0.001))
+
+    def pause(self, seconds: float):
+        """Block all lanes for the given time (server asked us to back off)"""
+        self.throttled += 1
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+    def get_stats(self) -> Dict:
+        """Get queue depth per lane and wait statistics"""
+        depth = {lane.name.lower(): 0 for lane in Priority}
+        for priority, _, future in self._waiters:
+            if not future.done():
+                depth[Priority(priority).name.lower()] += 1
+
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "queue_depth": depth,
+            "granted": self.granted,
+            "throttled": self.throttled,
+            "paused_for_seconds": round(max(0.0, self.paused_until - time.monotonic()), 3),
+            "total_wait_seconds": round(self.total_wait_seconds, 6),
+            "max_wait_seconds": round(self.max_wait_seconds, 6),
+        }
@@ -0,0 +1,166 @@
+"""Failure isolation for external APIs: circuit breaker and hedged requests"""
+
+import asyncio
+import enum
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+
+class CircuitOpenError(ValueError):
+    """Call rejected without being made because the provider's circuit is open"""
+
+
+class ProviderError(ValueError):
+    """Provider-side failure (e.g. a 5xx response) that counts against its circuit"""
+
+
+class CircuitState(str, enum.Enum):
+    """Circuit breaker states"""
+    CLOSED = "closed"  # Calls go through
+    OPEN = "open"  # Calls fail fast until the reset timeout passes
+    HALF_OPEN = "half_open"  # A limited number of probe calls go through
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker, used as an async context manager
+
+    Opens after failure_threshold consecutive failures; while open, calls
+    raise CircuitOpenError immediately. After reset_timeout up to
+    half_open_max_calls probes are let through: a successful probe closes
+    the circuit, a failed one opens it again. Only exceptions of the given
+    failure types count as failures; any other outcome (including domain
+    errors raised from a valid response) means the provider is up.
+
+        async with breaker:
+            response = await session.get(url)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        half_open_max_calls: int = 1,
+        failures: Tuple[Type[BaseException], ...] = (Exception,),
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.failures = failures
+
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probes = 0
+
+        self.calls = 0
+        self.failed = 0
+        self.rejected = 0
+        self.opened = 0
+
+    def _allow(self):
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                raise CircuitOpenError(f"{self.name} circuit is open")
+            self.state = CircuitState.HALF_OPEN
+            self._probes = 0
+
+        if self.state == CircuitState.HALF_OPEN:
+            if self._probes >= self.half_open_max_calls:
+                self.rejected += 1
+                raise CircuitOpenError(f"{self.name} circuit is half-open, probe in progress")
+            self._probes += 1
+
+        self.calls += 1
+
+    def _open(self):
+        self.state = CircuitState.OPEN
+        self.opened_at = time.monotonic()
+        self.opened += 1
+
+    def record_success(self):
+        """Close the circuit (a probe succeeded) or reset the failure streak"""
+        self.consecutive_failures = 0
+        self.state = CircuitState.CLOSED
+
+    def record_failure(self):
+        """Count a failure, opening the circuit at the threshold or on a failed probe"""
+        self.failed += 1
+        self.consecutive_failures += 1
+        if self.state == CircuitState.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    async def __aenter__(self):
+        self._allow()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        probe = self.state == CircuitState.HALF_OPEN
+        if exc_type is not None and issubclass(exc_type, asyncio.CancelledError):
+            # Abandoned (e.g. a losing hedge): says nothing about the provider
+            pass
+        elif exc_type is not None and issubclass(exc_type, self.failures):
+            self.record_failure()
+        else:
+            self.record_success()
+
+        if probe:
+            self._probes = max(self._probes - 1, 0)
+        return False
+
+    def get_stats(self) -> Dict:
+        """Get state and call counters"""
+        retry_in = 0.0
+        if self.state == CircuitState.OPEN:
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in_seconds": round(retry_in, 3),
+            "calls": self.calls,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "opened": self.opened,
+        }
+
+
+async def hedged(call: Callable[[], Awaitable[Any]], delay: float, hedges: int = 1) -> Any:
+    """
+    Run call, starting a backup attempt if it is slow or fails
+
+    A new attempt starts whenever the running ones have not finished within
+    delay seconds, or right away when one fails, up to hedges extra
+    attempts. The first successful result wins and the remaining attempts
+    are cancelled.
+
+    Raises:
+        The last attempt's exception if all attempts fail
+    """
+    pending: List[asyncio.Task] = [asyncio.create_task(call())]
+    started = 1
+    error: Optional[BaseException] = None
+
+    try:
+        while pending:
+            timeout = delay if started <= hedges else None
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                pending.remove(task)
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+
+            # Still running past the delay, or an attempt failed
+            if started <= hedges:
+                pending.append(asyncio.create_task(call()))
+                started += 1
+
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
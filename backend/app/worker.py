@@ -0,0 +1,50 @@
+"""Task worker process: runs queued draw follow-up work
+
+Prize payouts and the wallet indexer are singletons and run on the elected
+API leader, not here.
+
+Scale out by running more of these next to the API (TASK_QUEUE_ENABLED=true):
+
+    python -m app.worker
+"""
+
+import asyncio
+import signal
+
+from aiogram import Bot
+from aiogram.enums import ParseMode
+from loguru import logger
+
+from app.config import settings
+from app.database.session import close_db
+from app.services.http_client import http_client
+from app.services.task_queue import task_queue
+from app.services.raffle_tasks import register_raffle_tasks
+
+
+async def main():
+    if not settings.TASK_QUEUE_ENABLED:
+        logger.error("TASK_QUEUE_ENABLED is off, tasks run inline in the API")
+        return
+
+    bot = Bot(token=settings.TELEGRAM_BOT_TOKEN, parse_mode=ParseMode.HTML)
+    await http_client.start()
+    register_raffle_tasks(bot)
+    await task_queue.start()
+    logger.info("Worker started")
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+    await stopping.wait()
+
+    logger.info("Shutting down worker...")
+    await task_queue.stop()
+    await http_client.close()
+    await close_db()
+    await bot.session.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+"""Test settings: the app reads its configuration from the environment on import"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# Tests always run against a throwaway SQLite database
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(prefix="raffle-tests-"), "test.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "1:test")
+os.environ.setdefault("ADMIN_USER_ID", "1")
+os.environ.setdefault("RAFFLE_WALLET_ADDRESS", "UQtest")
+os.environ.setdefault("RAFFLE_WALLET_MNEMONIC", "test")
+os.environ.setdefault("TON_CENTER_API_KEY", "test")
+os.environ.setdefault("RANDOM_ORG_API_KEY", "test")
+# The toncenter stub does not throttle
+os.environ.setdefault("TON_CENTER_RPS", "1000")
+os.environ.setdefault("TON_CENTER_BURST", "1000")
+
+
+@pytest.fixture(scope="session")
+def migrated_database():
+    """Path of a database with every migration applied, copied for each test"""
+    from app.database.session import init_db
+
+    asyncio.run(init_db())
+    template = f"{DATABASE_PATH}.template"
+    shutil.copy(DATABASE_PATH, template)
+    return template
+
+
+@pytest.fixture
+def database(migrated_database):
+    """Empty, migrated database"""
+    shutil.copy(migrated_database, DATABASE_PATH)
+
+
+@pytest.fixture
+def payout_wallet(monkeypatch):
+    """Address of the raffle wallet, configured with a matching mnemonic"""
+    from app.config import settings
+    from app.services.ton_service import ton_service
+    from helpers import new_wallet
+
+    mnemonic, address = new_wallet()
+    monkeypatch.setattr(settings, "RAFFLE_WALLET_MNEMONIC", mnemonic)
+    monkeypatch.setattr(settings, "RAFFLE_WALLET_ADDRESS", address)
+    monkeypatch.setattr(ton_service, "raffle_wallet", address)
+    monkeypatch.setattr(ton_service, "_payout_wallet", None)
+    return address
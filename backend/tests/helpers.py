@@ -0,0 +1,62 @@
+"""Shared test helpers"""
+
+from contextlib import asynccontextmanager
+from typing import List, Tuple
+
+from aiohttp.test_utils import TestServer
+from tonsdk.contract.wallet import Wallets, WalletVersionEnum
+from tonsdk.crypto import mnemonic_new
+from tonsdk.utils import Address
+
+from app.database.models import Participant, Raffle, RaffleStatus, RaffleType, User
+from app.database.session import AsyncSessionLocal
+from app.scripts.toncenter_stub import create_app
+from app.services.http_client import http_client
+from app.services.ton_service import ton_service
+
+
+@asynccontextmanager
+async def running_toncenter():
+    """Serve a toncenter stub and point ton_service at it; yields the ToncenterStub"""
+    app = create_app()
+    server = TestServer(app)
+    await server.start_server()
+
+    api_url = ton_service.api_url
+    ton_service.api_url = str(server.make_url("")).rstrip("/")
+    ton_service.cache.clear()
+    try:
+        yield app["stub"]
+    finally:
+        ton_service.api_url = api_url
+        ton_service.cache.clear()
+        await http_client.close()
+        await server.close()
+
+
+def new_wallet() -> Tuple[str, str]:
+    """(mnemonic, highload wallet v2 address) of a fresh wallet"""
+    mnemonic = mnemonic_new()
+    _, _, _, wallet = Wallets.from_mnemonics(mnemonic, WalletVersionEnum.hv2, workchain=0)
+    return " ".join(mnemonic), wallet.address.to_string(True, True, True)
+
+
+async def add_prizes(amounts: List[float]) -> List[int]:
+    """Add one won, unpaid prize per amount; returns the participant IDs"""
+    async with AsyncSessionLocal() as db:
+        participants = []
+        for index, amount in enumerate(amounts, start=1):
+            user = User(
+                telegram_id=index,
+                ton_wallet=Address(f"0:{index:064x}").to_string(True, True, True),
+            )
+            raffle = Raffle(
+                type=RaffleType.EXPRESS, status=RaffleStatus.COMPLETED,
+                min_participants=2, entry_fee_ton=1.0, prize_pool_ton=amount,
+            )
+            db.add_all([user, raffle])
+            await db.flush()
+            participants.append(Participant(raffle_id=raffle.id, user_id=user.id, is_winner=True))
+        db.add_all(participants)
+        await db.commit()
+        return [participant.id for participant in participants]
@@ -0,0 +1,53 @@
+"""Tests for request coalescing"""
+
+import asyncio
+
+import pytest
+
+from app.utils.cache import SingleFlight
+
+
+def test_followers_share_the_leader_result():
+    async def run():
+        single_flight = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(single_flight.do("key", fetch) for _ in range(3)))
+        assert results == ["result"] * 3
+        assert calls == 1
+        assert single_flight.get_stats() == {"in_flight": 0, "calls": 1, "shared": 2}
+
+    asyncio.run(run())
+
+
+def test_cancelled_leader_fails_followers_without_cancelling_them():
+    async def run():
+        single_flight = SingleFlight()
+        started = asyncio.Event()
+
+        async def fetch():
+            started.set()
+            await asyncio.sleep(10)
+
+        leader = asyncio.create_task(single_flight.do("key", fetch))
+        await started.wait()
+        follower = asyncio.create_task(single_flight.do("key", fetch))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+        # The follower gets an ordinary error it can handle, and is not itself cancelled
+        with pytest.raises(RuntimeError):
+            await follower
+        assert not follower.cancelled()
+        assert single_flight.get_stats()["in_flight"] == 0
+
+    asyncio.run(run())
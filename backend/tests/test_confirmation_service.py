@@ -0,0 +1,138 @@
+"""Tests for payout batch confirmation against the toncenter stub"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+
+from helpers import add_prizes, running_toncenter
+
+from app.config import settings
+from app.database.models import Participant, PayoutBatch, PayoutBatchStatus, Transaction, TransactionStatus
+from app.database.session import AsyncSessionLocal
+from app.services.confirmation_service import ConfirmationService
+from app.services.payout_service import PayoutService
+from app.services.ton_service import ton_service
+
+
+def _at(moment: datetime) -> int:
+    return int((moment - datetime(1970, 1, 1)).total_seconds())
+
+
+def _add_processed_message(stub, message_hash: str, utime: int):
+    """Record the wallet transaction that processed an external message"""
+    stub.next_lt += 1_000
+    stub.transactions.insert(0, {
+        "utime": utime,
+        "transaction_id": {"lt": str(stub.next_lt), "hash": f"processed-{message_hash}"},
+        "in_msg": {"source": "", "destination": settings.RAFFLE_WALLET_ADDRESS, "value": "0", "hash": message_hash},
+        "out_msgs": [],
+    })
+
+
+def _add_transfers(stub, count: int, first: datetime, last: datetime):
+    step = (last - first) / max(count - 1, 1)
+    for index in range(count):
+        tx = stub.add_transfer("EQsender", settings.RAFFLE_WALLET_ADDRESS, 1_000_000_000)
+        tx["utime"] = _at(first + step * index)
+
+
+async def _add_batch(created_at: datetime, message_hash: str) -> int:
+    async with AsyncSessionLocal() as db:
+        batch = PayoutBatch(
+            query_id=1, boc="", message_hash=message_hash, status=PayoutBatchStatus.SENT,
+            total_ton=1.0, recipients=0, created_at=created_at,
+            expires_at=created_at + timedelta(minutes=10),
+        )
+        db.add(batch)
+        await db.commit()
+        return batch.id
+
+
+async def _batch_status(batch_id: int) -> PayoutBatchStatus:
+    async with AsyncSessionLocal() as db:
+        return (await db.get(PayoutBatch, batch_id)).status
+
+
+def test_batch_beyond_the_scanned_pages_is_not_failed(database, monkeypatch):
+    monkeypatch.setattr(settings, "TX_CONFIRM_PAGE_SIZE", 10)
+    monkeypatch.setattr(settings, "TX_CONFIRM_MAX_PAGES", 2)
+    monkeypatch.setattr(settings, "TON_INDEXER_ENABLED", False)
+
+    async def run():
+        now = datetime.utcnow()
+        created_at = now - timedelta(hours=3)
+        async with running_toncenter() as stub:
+            _add_processed_message(stub, "message", _at(created_at + timedelta(minutes=5)))
+            _add_transfers(stub, 50, created_at + timedelta(minutes=20), now)
+            batch_id = await _add_batch(created_at, "message")
+
+            service = ConfirmationService()
+            statuses = []
+            for _ in range(4):
+                await service.confirm_pending()
+                statuses.append(await _batch_status(batch_id))
+
+        # Kept while its lifetime is outside the scanned history, then found on chain
+        assert PayoutBatchStatus.FAILED not in statuses
+        assert statuses[0] == PayoutBatchStatus.SENT
+        assert statuses[-1] == PayoutBatchStatus.CONFIRMED
+        assert service.stats["batches_unverified"] >= 1
+
+    asyncio.run(run())
+
+
+def test_batch_missing_from_covered_history_is_failed(database, monkeypatch):
+    monkeypatch.setattr(settings, "TON_INDEXER_ENABLED", False)
+
+    async def run():
+        now = datetime.utcnow()
+        created_at = now - timedelta(hours=3)
+        async with running_toncenter() as stub:
+            _add_transfers(stub, 5, created_at - timedelta(minutes=5), now)
+            batch_id = await _add_batch(created_at, "never-sent")
+
+            service = ConfirmationService()
+            await service.confirm_pending()
+            assert await _batch_status(batch_id) == PayoutBatchStatus.FAILED
+
+    asyncio.run(run())
+
+
+def test_expired_batch_releases_its_prizes(database, payout_wallet, monkeypatch):
+    async def run():
+        [participant_id] = await add_prizes([1.0])
+        async with running_toncenter() as stub:
+            stub.add_transfer("EQsender", payout_wallet, 10_000_000_000)
+
+            async def unavailable(boc: str) -> str:
+                raise ValueError("toncenter is down")
+
+            monkeypatch.setattr(ton_service, "send_boc", unavailable)
+            await PayoutService().flush()
+
+            # The message expired long ago without being processed
+            now = datetime.utcnow()
+            async with AsyncSessionLocal() as db:
+                await db.execute(update(PayoutBatch).values(
+                    created_at=now - timedelta(hours=1), expires_at=now - timedelta(minutes=30)
+                ))
+                await db.commit()
+
+            service = ConfirmationService()
+            await service.confirm_pending()
+
+        async with AsyncSessionLocal() as db:
+            [batch] = (await db.execute(select(PayoutBatch))).scalars().all()
+            [prize_status] = (await db.execute(select(Transaction.status))).scalars().all()
+            prize = await db.get(Participant, participant_id)
+
+        assert batch.status == PayoutBatchStatus.FAILED
+        assert prize_status == TransactionStatus.FAILED
+        # Detached from the batch and backing off before the next one
+        assert prize.payout_batch_id is None and prize.prize_tx_hash is None
+        assert not prize.prize_sent and prize.payout_attempts == 1
+        assert prize.payout_retry_at > now + PayoutService.retry_delay(1) - timedelta(seconds=5)
+        assert service.stats["prizes_released"] == 1
+
+    asyncio.run(run())
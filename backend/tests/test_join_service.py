@@ -0,0 +1,49 @@
+"""Tests for the asynchronous join pipeline"""
+
+import asyncio
+
+from app.database.crud import JoinRequestCRUD
+from app.database.models import JoinRequest, JoinRequestStatus, RaffleType, User
+from app.database.session import AsyncSessionLocal
+from app.services import join_service as join_module
+from app.services.join_service import JoinService
+from app.services.raffle_service import raffle_service
+
+
+def test_losing_replica_keeps_the_recorded_outcome(database, monkeypatch):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            raffle = await raffle_service.create_raffle(db, RaffleType.EXPRESS)
+            user = User(telegram_id=1, ton_wallet="EQwallet")
+            db.add(user)
+            await db.commit()
+            join_request = await JoinRequestCRUD.create(db, raffle.id, user.id, "tx")
+            await db.commit()
+            request_id = join_request.id
+
+        async def join_raffle(db, raffle_id, user_id, tx_hash):
+            # Another replica accepts the same request while this one verifies
+            async with AsyncSessionLocal() as other:
+                assert await JoinRequestCRUD.mark_processed(other, request_id, JoinRequestStatus.ACCEPTED)
+                await other.commit()
+            raise ValueError("You have already joined this raffle")
+
+        notified = []
+
+        async def send_join_result(user_id, result):
+            notified.append(result)
+
+        monkeypatch.setattr(join_module.raffle_service, "join_raffle", join_raffle)
+        monkeypatch.setattr(join_module.websocket_manager, "send_join_result", send_join_result)
+
+        await JoinService().process(request_id)
+
+        async with AsyncSessionLocal() as db:
+            join_request = await db.get(JoinRequest, request_id)
+            assert join_request.status == JoinRequestStatus.ACCEPTED
+            assert join_request.error is None
+            assert not await JoinRequestCRUD.mark_processed(db, request_id, JoinRequestStatus.REJECTED)
+        # The winner announces the outcome; the loser stays silent
+        assert notified == []
+
+    asyncio.run(run())
@@ -0,0 +1,129 @@
+"""Tests for batched prize payouts against the toncenter stub"""
+
+import asyncio
+from datetime import datetime, timedelta
+from typing import List
+
+import pytest
+from sqlalchemy import select, update
+
+from helpers import add_prizes, new_wallet, running_toncenter
+
+from app.config import settings
+from app.database.models import (
+    Participant, PayoutBatch, PayoutBatchStatus, Transaction, TransactionStatus,
+)
+from app.database.session import AsyncSessionLocal
+from app.scripts.toncenter_stub import _key
+from app.services.confirmation_service import ConfirmationService
+from app.services.payout_service import PayoutService
+from app.services.ton_service import ton_service
+
+
+async def _prizes() -> List[Participant]:
+    async with AsyncSessionLocal() as db:
+        return list((await db.execute(select(Participant).order_by(Participant.id))).scalars().all())
+
+
+async def _batches() -> List[PayoutBatch]:
+    async with AsyncSessionLocal() as db:
+        return list((await db.execute(select(PayoutBatch).order_by(PayoutBatch.id))).scalars().all())
+
+
+async def _prize_statuses() -> List[TransactionStatus]:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Transaction.status).order_by(Transaction.id))
+        return list(result.scalars().all())
+
+
+def test_retry_delay_backs_off_exponentially_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(settings, "PAYOUT_RETRY_BASE_SECONDS", 10)
+    monkeypatch.setattr(settings, "PAYOUT_RETRY_MAX_SECONDS", 100)
+
+    delays = [PayoutService.retry_delay(attempts).total_seconds() for attempts in range(6)]
+    assert delays == [10, 10, 20, 40, 80, 100]
+
+
+def test_prizes_are_sent_in_batches_and_settled(database, payout_wallet, monkeypatch):
+    monkeypatch.setattr(settings, "PAYOUT_BATCH_SIZE", 2)
+
+    async def run():
+        await add_prizes([1.0, 2.0, 3.0])
+        async with running_toncenter() as stub:
+            # Enough for the first two prizes only
+            stub.balances[_key(payout_wallet)] = 3_500_000_000
+
+            assert await PayoutService().flush() == 3
+            batches = await _batches()
+            assert [batch.recipients for batch in batches] == [2, 1]
+            assert [batch.status for batch in batches] == [PayoutBatchStatus.SENT] * 2
+            assert {batch.message_hash for batch in batches} == set(stub.sent_messages)
+            assert all(prize.prize_sent for prize in await _prizes())
+
+            service = ConfirmationService()
+            await service.confirm_pending()
+
+        assert [batch.status for batch in await _batches()] == [PayoutBatchStatus.CONFIRMED] * 2
+        # The wallet skipped the prize its balance did not cover
+        assert await _prize_statuses() == [
+            TransactionStatus.CONFIRMED, TransactionStatus.CONFIRMED, TransactionStatus.FAILED
+        ]
+        prizes = await _prizes()
+        assert [prize.payout_batch_id for prize in prizes] == [1, 1, None]
+        assert not prizes[2].prize_sent and prizes[2].payout_attempts == 1
+        assert service.stats["prizes_released"] == 1
+
+    asyncio.run(run())
+
+
+def test_failed_send_is_retried_with_backoff(database, payout_wallet, monkeypatch):
+    async def run():
+        await add_prizes([1.0])
+        async with running_toncenter() as stub:
+            stub.balances[_key(payout_wallet)] = 10_000_000_000
+            send_boc = ton_service.send_boc
+
+            async def unavailable(boc: str) -> str:
+                raise ValueError("toncenter is down")
+
+            monkeypatch.setattr(ton_service, "send_boc", unavailable)
+            service = PayoutService()
+            assert await service.flush() == 0
+
+            [batch] = await _batches()
+            assert batch.status == PayoutBatchStatus.PENDING
+            assert batch.attempts == 1 and batch.last_error == "toncenter is down"
+            assert batch.next_attempt_at > datetime.utcnow() + PayoutService.retry_delay(1) - timedelta(seconds=5)
+
+            # Backing off: neither resent nor batched again
+            monkeypatch.setattr(ton_service, "send_boc", send_boc)
+            assert await service.flush() == 0
+            assert not stub.sent_messages
+
+            async with AsyncSessionLocal() as db:
+                await db.execute(update(PayoutBatch).values(next_attempt_at=datetime.utcnow()))
+                await db.commit()
+            assert await service.flush() == 1
+
+        [batch] = await _batches()
+        assert batch.status == PayoutBatchStatus.SENT and batch.attempts == 2
+        assert list(stub.sent_messages) == [batch.message_hash]
+
+    asyncio.run(run())
+
+
+def test_payouts_refuse_a_wallet_other_than_the_raffle_wallet(payout_wallet, monkeypatch):
+    ton_service.check_payout_wallet()
+
+    _, other_address = new_wallet()
+    monkeypatch.setattr(ton_service, "raffle_wallet", other_address)
+    with pytest.raises(ValueError, match="derives highload wallet"):
+        ton_service.check_payout_wallet()
+
+    async def run():
+        service = PayoutService()
+        service.start()
+        assert service.task is None
+        assert service.get_stats()["running"] is False
+
+    asyncio.run(run())
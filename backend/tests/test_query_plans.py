@@ -0,0 +1,49 @@
+"""Tests that the hot raffle queries are served by their indexes on Postgres
+
+Set TEST_POSTGRES_DSN (postgresql://...) to a throwaway database to run them;
+migrations are applied to it first.
+"""
+
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.config import settings
+from app.database.session import _upgrade_to_head
+from app.scripts.explain_raffle_queries import CHECKS, explain
+
+
+POSTGRES_DSN = os.environ.get("TEST_POSTGRES_DSN")
+
+pytestmark = pytest.mark.skipif(not POSTGRES_DSN, reason="TEST_POSTGRES_DSN is not set")
+
+
+@pytest.fixture(scope="module")
+def postgres_url():
+    """Async URL of the test Postgres database, migrated to head"""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        # Alembic's env.py reads the URL from settings
+        monkeypatch.setattr(settings, "DATABASE_URL", POSTGRES_DSN)
+        _upgrade_to_head()
+    return POSTGRES_DSN.replace("postgresql://", "postgresql+asyncpg://")
+
+
+@pytest.mark.parametrize("name, query, index_name", CHECKS, ids=[check[0] for check in CHECKS])
+def test_query_uses_index(postgres_url, name, query, index_name):
+    async def run():
+        engine = create_async_engine(postgres_url, poolclass=NullPool)
+        try:
+            async with AsyncSession(engine) as db:
+                # Plans must not depend on how much data the database holds
+                await db.execute(text("SET LOCAL enable_seqscan = off"))
+                plan = await explain(db, query)
+                await db.rollback()
+        finally:
+            await engine.dispose()
+        assert index_name in plan, plan
+
+    asyncio.run(run())
@@ -0,0 +1,42 @@
+"""Tests for joining raffles"""
+
+import asyncio
+
+from app.database.models import RaffleStatus, RaffleType, User
+from app.database.session import AsyncSessionLocal
+from app.services import raffle_service as raffle_module
+from app.services.raffle_service import raffle_service
+
+
+def test_join_does_not_hold_a_transaction_while_verifying(database, monkeypatch):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            raffle = await raffle_service.create_raffle(db, RaffleType.EXPRESS)
+            users = [User(telegram_id=index + 1, ton_wallet=f"EQwallet{index}") for index in range(raffle.min_participants)]
+            db.add_all(users)
+            await db.commit()
+
+            verified = []
+
+            async def verify_transaction(tx_hash, expected_amount, sender_wallet):
+                # The wait for the payment must not pin a pooled connection
+                assert not db.in_transaction()
+                verified.append(tx_hash)
+                return {"from": sender_wallet, "to": "UQtest", "amount": expected_amount}
+
+            monkeypatch.setattr(raffle_module.ton_service, "verify_transaction", verify_transaction)
+            timers = []
+            monkeypatch.setattr(
+                raffle_module.RaffleService, "on_timer_started",
+                lambda raffle_id, waiting_until: timers.append(raffle_id)
+            )
+
+            for index, user in enumerate(users):
+                await raffle_service.join_raffle(db, raffle.id, user.id, f"tx{index}")
+
+            assert len(verified) == raffle.min_participants
+            assert raffle.participant_count == raffle.min_participants
+            assert raffle.status == RaffleStatus.WAITING
+            assert timers == [raffle.id]
+
+    asyncio.run(run())
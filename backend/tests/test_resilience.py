@@ -0,0 +1,132 @@
+"""Tests for the circuit breaker and hedged requests"""
+
+import asyncio
+
+import pytest
+
+from helpers import running_toncenter
+
+from app.config import settings
+from app.services.ton_service import ton_service
+from app.utils.resilience import CircuitBreaker, CircuitOpenError, CircuitState, ProviderError, hedged
+
+
+async def _fail(breaker: CircuitBreaker):
+    with pytest.raises(ProviderError):
+        async with breaker:
+            raise ProviderError("502")
+
+
+def test_breaker_opens_then_probes_and_closes():
+    async def run():
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.05)
+        await _fail(breaker)
+        assert breaker.state == CircuitState.CLOSED
+        await _fail(breaker)
+        assert breaker.state == CircuitState.OPEN
+
+        # Open: calls fail fast without running
+        with pytest.raises(CircuitOpenError):
+            async with breaker:
+                pytest.fail("call made while open")
+
+        # After the reset timeout one probe goes through, others are rejected
+        await asyncio.sleep(0.06)
+        async with breaker:
+            assert breaker.state == CircuitState.HALF_OPEN
+            with pytest.raises(CircuitOpenError):
+                async with breaker:
+                    pass
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.consecutive_failures == 0
+
+    asyncio.run(run())
+
+
+def test_failed_probe_opens_breaker_again():
+    async def run():
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+        await _fail(breaker)
+        await asyncio.sleep(0.06)
+        await _fail(breaker)
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.opened == 2
+
+    asyncio.run(run())
+
+
+def test_breaker_ignores_other_errors():
+    async def run():
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=10, failures=(ProviderError,))
+        with pytest.raises(ValueError):
+            async with breaker:
+                raise ValueError("Invalid response")
+        assert breaker.state == CircuitState.CLOSED
+
+    asyncio.run(run())
+
+
+def test_hedge_wins_when_first_attempt_is_slow():
+    async def run():
+        attempts = []
+
+        async def call():
+            attempts.append(len(attempts))
+            if len(attempts) == 1:
+                await asyncio.sleep(10)
+                return "slow"
+            return "backup"
+
+        assert await hedged(call, delay=0.01, hedges=1) == "backup"
+        assert len(attempts) == 2
+
+    asyncio.run(run())
+
+
+def test_hedge_starts_right_away_when_an_attempt_fails():
+    async def run():
+        attempts = 0
+
+        async def call():
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                raise ProviderError("502")
+            return "backup"
+
+        # Far below the delay: the backup was not waiting for it
+        assert await asyncio.wait_for(hedged(call, delay=10, hedges=1), timeout=1) == "backup"
+
+    asyncio.run(run())
+
+
+def test_hedge_raises_when_every_attempt_fails():
+    async def run():
+        attempts = 0
+
+        async def call():
+            nonlocal attempts
+            attempts += 1
+            raise ProviderError(f"attempt {attempts}")
+
+        with pytest.raises(ProviderError, match="attempt 3"):
+            await hedged(call, delay=0.01, hedges=2)
+        assert attempts == 3
+
+    asyncio.run(run())
+
+
+def test_remote_transfer_lookup_is_hedged(database, monkeypatch):
+    monkeypatch.setattr(settings, "TON_CENTER_HEDGE_DELAY_SECONDS", 0)
+
+    async def run():
+        async with running_toncenter() as stub:
+            tx = stub.add_transfer("EQsender", settings.RAFFLE_WALLET_ADDRESS, 2_000_000_000)
+            hedged_before = ton_service.stats["hedged_requests"]
+
+            transfer = await ton_service._find_remote_transfer(tx["transaction_id"]["hash"])
+
+        assert transfer["amount_nano"] == 2_000_000_000
+        assert ton_service.stats["hedged_requests"] == hedged_before + 1
+
+    asyncio.run(run())
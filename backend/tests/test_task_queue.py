@@ -0,0 +1,24 @@
+"""Tests for the Redis task queue"""
+
+import asyncio
+
+from app.config import settings
+from app.services.task_queue import TaskQueue
+
+
+def test_stats_report_unavailable_redis(monkeypatch):
+    monkeypatch.setattr(settings, "TASK_QUEUE_ENABLED", True)
+    monkeypatch.setattr(settings, "REDIS_URL", "redis://127.0.0.1:1/0")
+
+    async def run():
+        queue = TaskQueue()
+        try:
+            stats = await queue.get_stats()
+        finally:
+            await queue.stop()
+        assert stats["enabled"] is True
+        assert stats["redis"] == "unavailable"
+        assert "pending" not in stats
+
+    asyncio.run(run())
+
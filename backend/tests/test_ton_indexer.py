@@ -0,0 +1,94 @@
+"""Tests for the wallet indexer against the toncenter stub"""
+
+import asyncio
+from typing import Set
+
+from sqlalchemy import select
+
+from helpers import running_toncenter
+
+from app.config import settings
+from app.database.crud import WalletTransferCRUD
+from app.database.models import WalletTransfer
+from app.database.session import AsyncSessionLocal
+from app.services.ton_indexer import TONIndexer
+
+
+def _add_transfers(stub, count: int) -> Set[str]:
+    return {
+        stub.add_transfer("EQsender", settings.RAFFLE_WALLET_ADDRESS, 1_000_000_000)["transaction_id"]["hash"]
+        for _ in range(count)
+    }
+
+
+async def _indexed_hashes() -> Set[str]:
+    async with AsyncSessionLocal() as db:
+        return set((await db.execute(select(WalletTransfer.tx_hash))).scalars().all())
+
+
+async def _catch_up(indexer: TONIndexer) -> int:
+    """Poll until no gap is left; returns the number of polls"""
+    for polls in range(1, 20):
+        await indexer.poll()
+        if not indexer._gaps:
+            return polls
+    raise AssertionError("indexer never caught up")
+
+
+async def _cursor_lt() -> int:
+    async with AsyncSessionLocal() as db:
+        return (await WalletTransferCRUD.get_cursor(db, "raffle_wallet")).lt
+
+
+def test_backlog_is_caught_up_over_several_polls(database, monkeypatch):
+    monkeypatch.setattr(settings, "TON_INDEXER_PAGE_SIZE", 5)
+    monkeypatch.setattr(settings, "TON_INDEXER_MAX_PAGES", 2)
+
+    async def run():
+        async with running_toncenter() as stub:
+            indexer = TONIndexer()
+            expected = _add_transfers(stub, 1)
+            assert await indexer.poll() == 1
+            cursor_lt = await _cursor_lt()
+
+            # Four polls' worth of pages arrive at once
+            expected |= _add_transfers(stub, 35)
+            # Two pages (a continuation page repeats the transaction it starts from)
+            assert await indexer.poll() == 9
+            assert indexer._gaps
+            # The cursor stays put until the gap is closed
+            assert await _cursor_lt() == cursor_lt
+
+            # Fresh transfers are indexed ahead of the backlog
+            fresh = _add_transfers(stub, 2)
+            expected |= fresh
+            await indexer.poll()
+            assert fresh <= await _indexed_hashes()
+
+            assert await _catch_up(indexer) > 1
+
+            assert await _indexed_hashes() == expected
+            assert await _cursor_lt() == stub.next_lt
+
+    asyncio.run(run())
+
+
+def test_restart_during_a_backlog_reads_it_again(database, monkeypatch):
+    monkeypatch.setattr(settings, "TON_INDEXER_PAGE_SIZE", 5)
+    monkeypatch.setattr(settings, "TON_INDEXER_MAX_PAGES", 2)
+
+    async def run():
+        async with running_toncenter() as stub:
+            expected = _add_transfers(stub, 1)
+            await TONIndexer().poll()
+
+            expected |= _add_transfers(stub, 25)
+            await TONIndexer().poll()
+
+            # A new process starts from the stored cursor, not past the gap
+            await _catch_up(TONIndexer())
+
+            assert await _indexed_hashes() == expected
+            assert await _cursor_lt() == stub.next_lt
+
+    asyncio.run(run())
@@ -0,0 +1,105 @@
+"""Tests for WebSocket topic subscriptions"""
+
+import asyncio
+import json
+
+from app.api.websocket import ConnectionManager
+from app.services.backplane import InMemoryBackplane
+
+
+class FakeWebSocket:
+    """Records the frames sent to a client"""
+
+    def __init__(self):
+        self.sent = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed = True
+
+
+async def _exchange(manager, websocket, message):
+    sent = len(websocket.sent)
+    await manager.handle_message(websocket, message)
+    # Let the writer task send the reply
+    await asyncio.wait_for(_until(lambda: len(websocket.sent) > sent), timeout=1)
+    return websocket.sent[-1]
+
+
+async def _until(condition):
+    while not condition():
+        await asyncio.sleep(0.001)
+
+
+def test_unsubscribe_rejects_invalid_topics_with_error_frame():
+    async def run():
+        manager = ConnectionManager(InMemoryBackplane())
+        websocket = FakeWebSocket()
+        await manager.connect(websocket)
+
+        reply = await _exchange(manager, websocket, {"action": "subscribe", "topics": ["raffles", "raffle:1"]})
+        assert reply == {"type": "subscriptions", "topics": ["raffle:1", "raffles"]}
+
+        for topics in ([["raffles"]], [{"raffle": 1}], [1], ["user:1"]):
+            reply = await _exchange(manager, websocket, {"action": "unsubscribe", "topics": topics})
+            assert reply["type"] == "error"
+
+        # The connection survives and its subscriptions are unchanged
+        assert websocket in manager.connections
+        assert not websocket.closed
+        reply = await _exchange(manager, websocket, {"action": "unsubscribe", "topics": ["raffle:1"]})
+        assert reply == {"type": "subscriptions", "topics": ["raffles"]}
+        assert "raffle:1" not in manager.topics
+
+        manager.disconnect(websocket)
+
+    asyncio.run(run())
+
+
+def test_unsubscribe_keeps_personal_topic():
+    async def run():
+        manager = ConnectionManager(InMemoryBackplane())
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, user_id=7)
+
+        reply = await _exchange(manager, websocket, {"action": "unsubscribe", "topics": ["user:7"]})
+        assert reply["type"] == "error"
+        assert manager.topics["user:7"] == {websocket}
+
+        manager.disconnect(websocket)
+
+    asyncio.run(run())
+
+
+def test_new_connections_receive_raffle_events():
+    async def run():
+        manager = ConnectionManager(InMemoryBackplane())
+        websocket = FakeWebSocket()
+        await manager.connect(websocket)
+
+        await manager.broadcast_raffle_update(1, "express", {"current_participants": 3})
+        await asyncio.wait_for(_until(lambda: websocket.sent), timeout=1)
+        assert websocket.sent[-1]["type"] == "raffle_update"
+
+        # Narrowing down: only the subscribed raffle's events arrive
+        reply = await _exchange(manager, websocket, {"action": "subscribe", "topics": ["raffle:2"]})
+        assert reply == {"type": "subscriptions", "topics": ["raffle:2", "raffles"]}
+        reply = await _exchange(manager, websocket, {"action": "unsubscribe", "topics": ["raffles"]})
+        assert reply == {"type": "subscriptions", "topics": ["raffle:2"]}
+
+        sent = len(websocket.sent)
+        await manager.broadcast_raffle_update(1, "express", {"current_participants": 4})
+        await manager.broadcast_raffle_update(2, "express", {"current_participants": 1})
+        await asyncio.wait_for(_until(lambda: len(websocket.sent) > sent), timeout=1)
+        await asyncio.sleep(0.01)
+        assert [message["raffle_id"] for message in websocket.sent[sent:]] == [2]
+
+        manager.disconnect(websocket)
+
+    asyncio.run(run())